@@ -0,0 +1,63 @@
+#!/usr/bin/env ruby
+# Applies manifests of several deployment tasks in one puppet process, so
+# ruby, puppet, types, providers and facts are loaded once instead of once
+# per task. Every manifest (section) is still compiled and applied as its
+# own catalog, sections do not share variables or stages, and the run
+# stops at the first failed section. Time of every section is logged and
+# appended as json line to TIMING_LOG.
+#   fused_apply.rb <task> <modulepath> <manifest>...
+require 'json'
+require 'puppet'
+require 'puppet/util/command_line'
+
+TIMING_LOG = '/var/log/nsx-t-task-timing.log'
+
+def log_timing(record)
+  File.open(TIMING_LOG, 'a') { |file| file.puts(record.to_json) }
+rescue SystemCallError => error
+  Puppet.debug("Can not write #{TIMING_LOG}: #{error.message}")
+end
+
+def apply_section(app, manifest)
+  app.command_line.args.replace([manifest])
+  app.main
+  0
+rescue SystemExit => result
+  result.status
+end
+
+if ARGV.size < 3
+  abort("usage: #{$0} <task> <modulepath> <manifest>...")
+end
+task, modulepath, *manifests = ARGV
+# tasks run in plugin directory, paths are relative to it
+modulepath = modulepath.split(':').map { |path| File.expand_path(path) }.join(':')
+manifests = manifests.map { |manifest| File.expand_path(manifest) }
+
+started = Time.now
+command_line = Puppet::Util::CommandLine.new('puppet', ['apply', '--modulepath', modulepath, '--detailed-exitcodes',
+                                                        '--logdest', 'console', '--logdest', '/var/log/puppet.log'])
+Puppet.initialize_settings(command_line.args)
+app = Puppet::Application.find('apply').new(command_line)
+app.preinit
+app.parse_options
+app.setup
+setup = Time.now - started
+Puppet.notice("fuel-plugin-nsx-t: #{task} loaded puppet in #{setup.round(1)}s for #{manifests.size} sections")
+
+manifests.each do |manifest|
+  section = File.basename(manifest, '.pp')
+  section_started = Time.now
+  status = apply_section(app, manifest)
+  elapsed = Time.now - section_started
+  log_timing('task' => task, 'section' => section, 'elapsed' => elapsed.round(3), 'setup' => setup.round(3),
+             'status' => status, 'time' => section_started.to_i)
+  Puppet.notice("fuel-plugin-nsx-t: #{task} section #{section} finished in #{elapsed.round(1)}s, status #{status}")
+  # detailed exit codes: 2 - changes, 4 and 6 - failures
+  if status != 0 and status != 2
+    Puppet.err("fuel-plugin-nsx-t: #{task} section #{section} failed, next sections are not applied")
+    exit(1)
+  end
+end
+Puppet.notice("fuel-plugin-nsx-t: #{task} finished in #{(Time.now - started).round(1)}s, " +
+              "#{(setup * (manifests.size - 1)).round(1)}s of puppet load saved")
@@ -2,16 +2,6 @@ notice('fuel-plugin-nsx-t: configure-plugin.pp')
 
 include ::nsxt::params
 
-file { $::nsxt::params::nsx_plugin_dir:
-  ensure => directory,
-}
-
-file { $::nsxt::params::nsx_plugin_config:
-  ensure  => present,
-  content => template('nsxt/nsx.ini')
-}
-
-
 $settings     = hiera($::nsxt::params::hiera_key)
 $managers     = $settings['nsx_api_managers']
 $user         = $settings['nsx_api_user']
@@ -21,42 +11,103 @@ $vlan_tz      = $settings['default_vlan_tz_uuid']
 $tier0_router = $settings['default_tier0_router_uuid']
 $edge_cluster = $settings['default_edge_cluster_uuid']
 
-nsx_config {
-  'nsx_v3/nsx_api_managers':          value => $managers;
-  'nsx_v3/nsx_api_user':              value => $user;
-  'nsx_v3/nsx_api_password':          value => $password;
-  'nsx_v3/default_overlay_tz_uuid':   value => $overlay_tz;
-  'nsx_v3/default_vlan_tz_uuid':      value => $vlan_tz;
-  'nsx_v3/default_tier0_router_uuid': value => $tier0_router;
-  'nsx_v3/default_edge_cluster_uuid': value => $edge_cluster;
+if pick($settings['client_auto_tune'], true) {
+  # the same number of API workers as neutron server gets on this node
+  $neutron_config  = hiera_hash('neutron_config', {})
+  $workers_max     = hiera('workers_max', 16)
+  $service_workers = pick($neutron_config['workers'], min(max($::processorcount, 2), $workers_max))
+  $client          = get_nsxt_client_settings($managers, $service_workers)
+} else {
+  $client = $settings
 }
 
-file { '/etc/neutron/plugin.ini':
-  ensure  => link,
-  target  => $::nsxt::params::nsx_plugin_config,
-  replace => true,
-  require => File[$::nsxt::params::nsx_plugin_dir]
+# neutron server of existing controller keeps configuration
+$stamp_data  = {
+  'settings' => $settings,
+  'client'   => $client,
 }
+$stamp_files = [$::nsxt::params::nsx_plugin_config, '/etc/neutron/plugin.ini']
+
+if nsxt_task_converged('configure-plugin', $stamp_data, $stamp_files) {
+  notice('fuel-plugin-nsx-t: nsx plugin configuration is converged, skipped')
+} else {
+  file { $::nsxt::params::nsx_plugin_dir:
+    ensure => directory,
+  }
+
+  # template provides initial file only, settings are managed by nsx_config
+  file { $::nsxt::params::nsx_plugin_config:
+    ensure  => present,
+    content => template('nsxt/nsx.ini'),
+    replace => false,
+  }
+
+  # all settings are written to nsx.ini at once
+  Nsx_config {
+    provider => 'ini_batch',
+  }
 
-if !$settings['insecure'] {
-  nsx_config { 'nsx_v3/insecure': value => $settings['insecure']; }
+  nsx_config {
+    'nsx_v3/nsx_api_managers':          value => $managers;
+    'nsx_v3/nsx_api_user':              value => $user;
+    'nsx_v3/nsx_api_password':          value => $password;
+    'nsx_v3/default_overlay_tz_uuid':   value => $overlay_tz;
+    'nsx_v3/default_vlan_tz_uuid':      value => $vlan_tz;
+    'nsx_v3/default_tier0_router_uuid': value => $tier0_router;
+    'nsx_v3/default_edge_cluster_uuid': value => $edge_cluster;
+  }
+
+  nsx_config {
+    'nsx_v3/concurrent_connections':    value => $client['concurrent_connections'];
+    'nsx_v3/http_timeout':              value => $client['http_timeout'];
+    'nsx_v3/http_read_timeout':         value => $client['http_read_timeout'];
+    'nsx_v3/http_retries':              value => $client['http_retries'];
+    'nsx_v3/conn_idle_timeout':         value => $client['conn_idle_timeout'];
+  }
+
+  file { '/etc/neutron/plugin.ini':
+    ensure  => link,
+    target  => $::nsxt::params::nsx_plugin_config,
+    replace => true,
+    require => File[$::nsxt::params::nsx_plugin_dir]
+  }
+
+  if !$settings['insecure'] {
+    nsx_config { 'nsx_v3/insecure': value => $settings['insecure']; }
 
-  $ca_filename = try_get_value($settings['ca_file'],'name','')
+    $ca_filename = try_get_value($settings['ca_file'],'name','')
 
-  if !empty($ca_filename) {
-    $ca_certificate_content = $settings['ca_file']['content']
-    $ca_file = "${::nsxt::params::nsx_plugin_dir}/${ca_filename}"
+    if !empty($ca_filename) {
+      $ca_certificate_content = $settings['ca_file']['content']
+      $ca_file = "${::nsxt::params::nsx_plugin_dir}/${ca_filename}"
 
-    nsx_config { 'nsx_v3/ca_file': value => $ca_file; }
+      nsx_config { 'nsx_v3/ca_file': value => $ca_file; }
 
-    file { $ca_file:
-      ensure  => present,
-      content => $ca_certificate_content,
-      require => File[$::nsxt::params::nsx_plugin_dir],
+      file { $ca_file:
+        ensure  => present,
+        content => $ca_certificate_content,
+        require => File[$::nsxt::params::nsx_plugin_dir],
+      }
+    } else {
+      nsx_config { 'nsx_v3/ca_file': ensure => absent; }
     }
+  } else {
+    # nsx.ini is not replaced by template, settings of verified connection
+    # written by previous deployment are removed
+    nsx_config { ['nsx_v3/insecure', 'nsx_v3/ca_file']: ensure => absent; }
   }
-}
 
-File[$::nsxt::params::nsx_plugin_dir]->
-File[$::nsxt::params::nsx_plugin_config]->
-Nsx_config<||>
+  File[$::nsxt::params::nsx_plugin_dir]->
+  File[$::nsxt::params::nsx_plugin_config]->
+  Nsx_config<||>
+
+  stage { 'nsxt-stamp':
+    require => Stage['main'],
+  }
+  class { '::nsxt::task_stamp':
+    stage => 'nsxt-stamp',
+    task  => 'configure-plugin',
+    data  => $stamp_data,
+    files => $stamp_files,
+  }
+}
@@ -2,13 +2,76 @@ notice('fuel-plugin-nsx-t: create-repo.pp')
 
 include ::nsxt::params
 
-$settings = hiera($::nsxt::params::hiera_key)
-$managers = $settings['nsx_api_managers']
-$username = $settings['nsx_api_user']
-$password = $settings['nsx_api_password']
-
-class { '::nsxt::create_repo':
-  managers => $managers,
-  username => $username,
-  password => $password,
+$settings     = hiera($::nsxt::params::hiera_key)
+$managers     = $settings['nsx_api_managers']
+$username     = $settings['nsx_api_user']
+$password     = $settings['nsx_api_password']
+$distribution = pick($settings['repo_distribution'], 'manager')
+$repo_port    = $::nsxt::params::repo_port
+
+$roles        = hiera('roles')
+$remote_repo  = $distribution == 'primary-controller' and !('primary-controller' in $roles)
+
+if $remote_repo {
+  # primary controller already downloaded host components and serves
+  # repository over admin network, which is up before netconfig, these
+  # nodes do not connect to nsx-t managers
+  $network_metadata   = hiera_hash('network_metadata')
+  $primary_controller = get_nodes_hash_by_roles($network_metadata, ['primary-controller'])
+  $primary_admin_ips  = values(get_node_to_ipaddr_map_by_network_role($primary_controller, 'admin/pxe'))
+  $repo_url           = "http://${primary_admin_ips[0]}:${repo_port}/"
+  $repo_version       = get_nsxt_repo_archive_sum($repo_url)
+} else {
+  $repo_url     = ''
+  $repo_version = get_nsxt_version($managers, $username, $password)
+}
+
+# existing nodes of scale-out already have repository, unless nsx-t
+# managers were upgraded and serve host components of another version, or
+# repository of primary controller was rebuilt
+$stamp_data  = {
+  'managers'     => $managers,
+  'repo_url'     => $repo_url,
+  'repo_version' => $repo_version,
+  'username'     => $username,
+  'distribution' => $distribution,
+  'repo_port'    => $repo_port,
+  'roles'        => $roles,
+}
+$stamp_files = ['/etc/apt/sources.list.d/nsx-t-local.list', '/etc/apt/preferences.d/nsx-t-local.pref',
+                '/opt/nsx-t-repo/.archive.sha256']
+
+if nsxt_task_converged('create-repo', $stamp_data, $stamp_files) {
+  notice('fuel-plugin-nsx-t: repository is converged, skipped')
+} else {
+  if $remote_repo {
+    class { '::nsxt::remote_repo':
+      repo_url => $repo_url,
+    }
+  } else {
+    class { '::nsxt::create_repo':
+      managers => $managers,
+      username => $username,
+      password => $password,
+    }
+
+    if $distribution == 'primary-controller' {
+      class { '::nsxt::serve_repo':
+        listen_address  => get_network_role_property('admin/pxe', 'ipaddr'),
+        allowed_network => get_network_role_property('admin/pxe', 'network'),
+        port            => $repo_port,
+        require         => Class['::nsxt::create_repo'],
+      }
+    }
+  }
+
+  stage { 'nsxt-stamp':
+    require => Stage['main'],
+  }
+  class { '::nsxt::task_stamp':
+    stage => 'nsxt-stamp',
+    task  => 'create-repo',
+    data  => $stamp_data,
+    files => $stamp_files,
+  }
 }
@@ -0,0 +1,12 @@
+notice('fuel-plugin-nsx-t: disable-upgrade-service.pp')
+
+include ::nsxt::params
+
+$settings = hiera($::nsxt::params::hiera_key)
+$managers = $settings['nsx_api_managers']
+$username = $settings['nsx_api_user']
+$password = $settings['nsx_api_password']
+
+# runs when nsx-t-create-repo finished on all nodes, nodes download host
+# components concurrently and leave install-upgrade service enabled
+disable_nsxt_upgrade_service($managers, $username, $password)
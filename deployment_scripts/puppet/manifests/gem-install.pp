@@ -1,6 +1,23 @@
 notice('fuel-plugin-nsx-t: gem-install.pp')
 
-# ruby gem package must be pre installed before puppet module used
-package { ['ruby-json', 'ruby-rest-client']:
-  ensure => latest,
+# ruby gem package must be pre installed before puppet module used, they
+# are installed with single dpkg run from offline bundle of plugin, which
+# pre_build_hook builds from gem-bundle.lock
+$module_path = get_module_path('nsxt')
+$install     = nsxt_gem_bundle("${module_path}/files/gems")
+
+if !is_array($install) {
+  # plugin was built without bundle
+  package { 'ruby-json':
+    ensure => latest,
+  }
+} elsif empty($install) {
+  notice('fuel-plugin-nsx-t: ruby gem packages of bundle are installed')
+} else {
+  $packages = join($install, ' ')
+
+  exec { 'install-gem-bundle':
+    command => "dpkg -i ${packages}",
+    path    => '/usr/sbin:/usr/bin:/sbin:/bin',
+  }
 }
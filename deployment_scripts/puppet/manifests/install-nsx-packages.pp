@@ -13,21 +13,60 @@ $nsx_packages = ['libgoogle-glog0', 'libjson-spirit', 'nicira-ovs-hypervisor-nod
                 'openvswitch-common', 'openvswitch-datapath-dkms', 'openvswitch-pki',
                 'openvswitch-switch', 'python-openvswitch', 'tcpdump-ovs']
 
-package { $nsx_required_packages:
-  ensure => latest,
-}
-package { $nsx_packages:
-  ensure  => latest,
-  require => [Package[$nsx_required_packages],Service['openvswitch-switch']]
-}
-service { 'openvswitch-switch':
-  ensure => stopped,
-  enable => false,
-}
-# This not shell(ubuntu dash) script, this bash script.
-# if you leave it there all the command like '/bin/sh -c' cannot be executed
-# example: start galera via pacemaker
-file { '/etc/profile.d/nsx-alias.sh':
-  ensure  => absent,
-  require => Package[$nsx_packages],
+# packages are checked with latest versions in repository, which is
+# rebuilt only when create-repo is not converged
+$stamp_packages = concat($nsx_required_packages, $nsx_packages)
+$stamp_files    = ['/var/lib/nsx-t/create-repo.stamp']
+
+if nsxt_task_converged('install-nsx-packages', {}, $stamp_files, $stamp_packages) {
+  notice('fuel-plugin-nsx-t: nsx-t packages are converged, skipped')
+} else {
+  # every list is installed in single apt transaction pinned to candidate
+  # versions, versions of local repository for nsx-t packages
+  $install_script = '/tmp/install_packages.sh'
+  $install_log    = '/var/log/nsx-t-package-install.log'
+  $required_list  = join($nsx_required_packages, ' ')
+  $nsx_list       = join($nsx_packages, ' ')
+
+  file { $install_script:
+    ensure  => file,
+    mode    => '0755',
+    source  => 'puppet:///modules/nsxt/install_packages.sh',
+    replace => true,
+  }
+  exec { 'install-nsx-required-packages':
+    path     => '/usr/sbin:/usr/bin:/sbin:/bin',
+    command  => "${install_script} required ${install_log} ${required_list}",
+    unless   => "${install_script} --check required ${install_log} ${required_list}",
+    provider => 'shell',
+    require  => File[$install_script],
+  }
+  exec { 'install-nsx-packages':
+    path     => '/usr/sbin:/usr/bin:/sbin:/bin',
+    command  => "${install_script} nsx ${install_log} ${nsx_list}",
+    unless   => "${install_script} --check nsx ${install_log} ${nsx_list}",
+    provider => 'shell',
+    require  => [Exec['install-nsx-required-packages'], Service['openvswitch-switch']],
+  }
+  service { 'openvswitch-switch':
+    ensure => stopped,
+    enable => false,
+  }
+  # This not shell(ubuntu dash) script, this bash script.
+  # if you leave it there all the command like '/bin/sh -c' cannot be executed
+  # example: start galera via pacemaker
+  file { '/etc/profile.d/nsx-alias.sh':
+    ensure  => absent,
+    require => Exec['install-nsx-packages'],
+  }
+
+  stage { 'nsxt-stamp':
+    require => Stage['main'],
+  }
+  class { '::nsxt::task_stamp':
+    stage    => 'nsxt-stamp',
+    task     => 'install-nsx-packages',
+    files    => $stamp_files,
+    packages => $stamp_packages,
+  }
 }
@@ -2,7 +2,19 @@ notice('fuel-plugin-nsx-t: install-nsx-plugin.pp')
 
 include ::nsxt::params
 
-package { $::nsxt::params::plugin_package:
-  ensure => present,
-}
+if nsxt_task_converged('install-nsx-plugin', {}, [], [$::nsxt::params::plugin_package]) {
+  notice('fuel-plugin-nsx-t: nsx plugin package is converged, skipped')
+} else {
+  package { $::nsxt::params::plugin_package:
+    ensure => present,
+  }
 
+  stage { 'nsxt-stamp':
+    require => Stage['main'],
+  }
+  class { '::nsxt::task_stamp':
+    stage    => 'nsxt-stamp',
+    task     => 'install-nsx-plugin',
+    packages => [$::nsxt::params::plugin_package],
+  }
+}
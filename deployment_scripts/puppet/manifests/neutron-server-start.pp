@@ -1,16 +1,48 @@
 notice('fuel-plugin-nsx-t: neutron-server-start.pp')
 
 include ::neutron::params
+include ::nsxt::params
 
-service { 'neutron-server-start':
-  ensure     => 'running',
-  name       => $::neutron::params::server_service,
-  enable     => true,
-  hasstatus  => true,
-  hasrestart => true,
-}
+$settings       = hiera($::nsxt::params::hiera_key)
+$management_vip = hiera('management_vip')
+$ssl_hash       = hiera_hash('use_ssl', {})
 
-include ::nsxt::params
+# neutron server which plugin already started is not stopped on all
+# controllers in rolling restart mode, it is restarted here one controller
+# at a time: controller is taken out of haproxy backend and comes back
+# only when its neutron server answers
+$rolling_restart = $settings['rolling_restart'] and nsxt_task_stamped('neutron-server')
+
+if $rolling_restart {
+  $neutron_protocol = get_ssl_property($ssl_hash, {}, 'neutron', 'internal', 'protocol', 'http')
+  $api_address      = get_network_role_property('neutron/api', 'ipaddr')
+
+  nsxt_rolling_restart { 'neutron-server-start':
+    ensure         => 'restarted',
+    service        => $::neutron::params::server_service,
+    process        => '/usr/bin/neutron-server',
+    config_files   => ['/etc/neutron/neutron.conf', '/etc/neutron/plugin.ini', $::nsxt::params::nsx_plugin_config],
+    packages       => [$::nsxt::params::plugin_package, $::neutron::params::server_package],
+    haproxy_socket => $::nsxt::params::haproxy_socket,
+    backend        => 'neutron',
+    health_url     => "http://${api_address}:9696/",
+    vip_url        => "${neutron_protocol}://${management_vip}:9696/",
+  }
+  $neutron_server = Nsxt_rolling_restart['neutron-server-start']
+
+  Neutron_config<||> -> Nsxt_rolling_restart['neutron-server-start']
+} else {
+  service { 'neutron-server-start':
+    ensure     => 'running',
+    name       => $::neutron::params::server_service,
+    enable     => true,
+    hasstatus  => true,
+    hasrestart => true,
+  }
+  $neutron_server = Service['neutron-server-start']
+
+  Neutron_config<||> ~> Service['neutron-server-start']
+}
 
 neutron_config {
   'DEFAULT/core_plugin':                value => $::nsxt::params::core_plugin;
@@ -18,18 +50,18 @@ neutron_config {
   'service_providers/service_provider': ensure => absent;
 }
 
-Neutron_config<||> ~> Service['neutron-server']
-
 if 'primary-controller' in hiera('roles') {
   include ::neutron::db::sync
 
-  Exec['neutron-db-sync'] ~> Service['neutron-server-start']
+  if $rolling_restart {
+    Exec['neutron-db-sync'] -> Nsxt_rolling_restart['neutron-server-start']
+  } else {
+    Exec['neutron-db-sync'] ~> Service['neutron-server-start']
+  }
   Neutron_config<||> ~> Exec['neutron-db-sync']
 
   $neutron_config         = hiera_hash('neutron_config')
-  $management_vip         = hiera('management_vip')
   $service_endpoint       = hiera('service_endpoint', $management_vip)
-  $ssl_hash               = hiera_hash('use_ssl', {})
   $internal_auth_protocol = get_ssl_property($ssl_hash, {}, 'keystone', 'internal', 'protocol', 'http')
   $internal_auth_address  = get_ssl_property($ssl_hash, {}, 'keystone', 'internal', 'hostname', [$service_endpoint])
   $identity_uri           = "${internal_auth_protocol}://${internal_auth_address}:5000"
@@ -55,7 +87,7 @@ if 'primary-controller' in hiera('roles') {
     try_sleep   => '15',
     command     => 'neutron net-list --http-timeout=4 2>&1 > /dev/null',
     provider    => 'shell',
-    subscribe   => Service['neutron-server'],
+    subscribe   => $neutron_server,
     refreshonly => true,
   }
 }
@@ -65,5 +97,17 @@ exec { 'fix-plugin-ini':
   path      => '/usr/sbin:/usr/bin:/sbin:/bin',
   command   => 'sed -ri \'s|NEUTRON_PLUGIN_CONFIG=""|NEUTRON_PLUGIN_CONFIG="/etc/neutron/plugin.ini"|\' /usr/share/neutron-common/plugin_guess_func',
   provider  => 'shell',
-  before    => Service['neutron-server'],
+  before    => $neutron_server,
+}
+
+# neutron-server-stop.pp does not stop neutron server while this is the same
+stage { 'nsxt-stamp':
+  require => Stage['main'],
+}
+class { '::nsxt::task_stamp':
+  stage    => 'nsxt-stamp',
+  task     => 'neutron-server',
+  data     => $settings,
+  files    => [$::nsxt::params::nsx_plugin_config],
+  packages => [$::nsxt::params::plugin_package, $::neutron::params::server_package],
 }
@@ -1,8 +1,22 @@
 notice('fuel-plugin-nsx-t: neutron-server-stop.pp')
 
 include ::neutron::params
+include ::nsxt::params
 
-service { 'neutron-server-stop':
-  ensure     => 'stopped',
-  name       => $::neutron::params::server_service,
+# neutron server of existing controller is not stopped when nsx plugin,
+# its configuration and neutron server package are the same as when
+# neutron-server-start.pp started it
+$settings = hiera($::nsxt::params::hiera_key)
+$packages = [$::nsxt::params::plugin_package, $::neutron::params::server_package]
+
+if nsxt_task_converged('neutron-server', $settings, [$::nsxt::params::nsx_plugin_config], $packages) {
+  notice('fuel-plugin-nsx-t: neutron server is converged, not stopped')
+} elsif $settings['rolling_restart'] and nsxt_task_stamped('neutron-server') {
+  # neutron-server-start.pp restarts it one controller at a time
+  notice('fuel-plugin-nsx-t: neutron server is restarted by rolling restart, not stopped')
+} else {
+  service { 'neutron-server-stop':
+    ensure     => 'stopped',
+    name       => $::neutron::params::server_service,
+  }
 }
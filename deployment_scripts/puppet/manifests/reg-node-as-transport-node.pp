@@ -9,6 +9,10 @@ $password            = $settings['nsx_api_password']
 $uplink_profile_uuid = $settings['uplink_profile_uuid']
 $transport_zone_uuid = $settings['default_overlay_tz_uuid']
 
+# nodes deployed at once register at the same moment, spread them over
+# window, NSX-T manager takes a few registrations a second
+$start_jitter = pick($settings['registration_jitter'], 10)
+
 if 'primary-controller' in hiera('roles') or 'controller' in hiera('roles') {
   $pnics               = $settings['controller_pnics_pairs']
   $static_ip_pool_uuid = $settings['controller_ip_pool_uuid']
@@ -17,9 +21,12 @@ if 'primary-controller' in hiera('roles') or 'controller' in hiera('roles') {
   $static_ip_pool_uuid = $settings['compute_ip_pool_uuid']
 }
 
+# all VTEP interfaces are brought up at once
 $vtep_interfaces = get_interfaces($pnics)
-up_interface { $vtep_interfaces:
-  before => Nsxt_create_transport_node['Add transport node'],
+nsxt_up_interfaces { 'VTEP interfaces':
+  ensure     => present,
+  interfaces => $vtep_interfaces,
+  before     => Nsxt_create_transport_node['Add transport node'],
 }
 
 firewall {'0000 Accept STT traffic':
@@ -49,20 +56,5 @@ nsxt_create_transport_node { 'Add transport node':
   pnics             => $pnics,
   static_ip_pool_id => $static_ip_pool_uuid,
   transport_zone_id => $transport_zone_uuid,
-}
-
-# workaround, otherwise $title variable not work, always has a value 'main'
-define up_interface {
-  file { $title:
-    ensure  => file,
-    path    => "/etc/network/interfaces.d/ifcfg-${title}",
-    mode    => '0644',
-    content => "auto ${title}\niface ${title} inet manual",
-    replace => true,
-  } ->
-  exec { $title:
-    path     => '/usr/sbin:/usr/bin:/sbin:/bin',
-    command  => "ifup ${title}",
-    provider => 'shell',
-  }
+  start_jitter      => $start_jitter,
 }
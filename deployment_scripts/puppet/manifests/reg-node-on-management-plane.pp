@@ -7,11 +7,16 @@ $managers     = $settings['nsx_api_managers']
 $user         = $settings['nsx_api_user']
 $password     = $settings['nsx_api_password']
 
+# nodes deployed at once register at the same moment, spread them over
+# window, NSX-T manager takes a few registrations a second
+$start_jitter = pick($settings['registration_jitter'], 10)
+
 nsxt_add_to_fabric { 'Register controller node on management plane':
-  ensure   => present,
-  managers => $managers,
-  username => $user,
-  password => $password,
+  ensure       => present,
+  managers     => $managers,
+  username     => $user,
+  password     => $password,
+  start_jitter => $start_jitter,
 }
 
 if !$settings['insecure'] {
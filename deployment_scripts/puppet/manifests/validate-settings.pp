@@ -0,0 +1,20 @@
+notice('fuel-plugin-nsx-t: validate-settings.pp')
+
+include ::nsxt::params
+
+$settings = hiera($::nsxt::params::hiera_key)
+
+if !$settings['insecure'] {
+  $ca_filename = try_get_value($settings['ca_file'],'name','')
+  if empty($ca_filename) {
+    # default path to ca for Ubuntu 14.0.4
+    $ca = '/etc/ssl/certs/ca-certificates.crt'
+  } else {
+    # runs before ca file is written to plugin directory
+    $ca = $settings['ca_file']['content']
+  }
+} else {
+  $ca = ''
+}
+
+validate_nsxt_settings($settings, hiera_hash('network_metadata'), $ca)
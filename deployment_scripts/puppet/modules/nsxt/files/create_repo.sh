@@ -1,13 +1,68 @@
 #!/bin/bash -e
+# Build local apt repository from nsx-t host components archive.
+# Nothing is done if the archive is the same as on the last build. Unchanged
+# packages keep their files, so apt-ftparchive takes them from its cache
+# database and only new or changed packages are scanned.
+set -o pipefail
+
 repo_dir=$1
 component_archive=$2
+repo_list=${3:-/etc/apt/sources.list.d/nsx-t-local.list}
+
+stamp="$repo_dir/.archive.sha256"
+cache_db="$repo_dir/.packages.db"
 
 mkdir -p "$repo_dir"
 cd "$repo_dir"
-tar --wildcards --strip-components=1 -zxvf "$component_archive" "*/"
-dpkg-scanpackages . /dev/null | gzip -9c > Packages.gz
+
+archive_sum=$(sha256sum "$component_archive" | cut -d' ' -f1)
+if [ -f Packages.gz ] && [ "$(cat "$stamp" 2>/dev/null)" = "$archive_sum" ]; then
+  echo "Repository $repo_dir is up to date"
+  exit 0
+fi
+
+if type -P pigz > /dev/null; then
+  compress='pigz'
+else
+  compress='gzip'
+fi
+
+# repository is not up to date until index of new archive is validated
+rm -f "$stamp"
+staging=$(mktemp -d "${repo_dir%/}.XXXXXX")
+trap 'rm -fr "$staging" "$repo_dir/Packages.gz.new"' EXIT
+tar --wildcards --strip-components=1 --use-compress-program="$compress" -C "$staging" -xf "$component_archive" "*/"
+
+shopt -s nullglob
+# drop packages which are not in the new archive, index and Release are
+# replaced only after the new index is validated
+for file in "$repo_dir"/*.deb; do
+  [ -e "$staging/${file##*/}" ] || rm -f "$file"
+done
+# tar keeps mtime, replace only files which differ in size or mtime
+for file in "$staging"/*; do
+  target="$repo_dir/${file##*/}"
+  if [ "$(stat -c '%s %Y' "$file")" != "$(stat -c '%s %Y' "$target" 2>/dev/null)" ]; then
+    mv -f "$file" "$target"
+  fi
+done
+
+if type -P apt-ftparchive > /dev/null; then
+  apt-ftparchive --db "$cache_db" packages . | $compress -c > Packages.gz.new
+else
+  dpkg-scanpackages . /dev/null | $compress -c > Packages.gz.new
+fi
+# index has to list every package of archive
+debs=(*.deb)
+indexed=$($compress -dc Packages.gz.new | grep -c '^Package: ' || true)
+if [ "${#debs[@]}" -eq 0 ] || [ "$indexed" -ne "${#debs[@]}" ]; then
+  echo "Index of $repo_dir lists $indexed of ${#debs[@]} packages" >&2
+  exit 1
+fi
+mv -f Packages.gz.new Packages.gz
 echo 'Label: nsx-t-protected-packages' > Release
 chmod 755 .
 chmod 644 ./*
-apt-get update
-rm -fr "${component_archive:?}"
+# refresh only nsx-t source, other sources are updated by fuel
+apt-get update -o Dir::Etc::sourcelist="$repo_list" -o Dir::Etc::sourceparts=- -o APT::Get::List-Cleanup=0
+echo "$archive_sum" > "$stamp"
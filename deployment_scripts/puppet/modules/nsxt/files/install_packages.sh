@@ -0,0 +1,55 @@
+#!/bin/bash -e
+# Install packages in single apt transaction, pinned to their candidate
+# versions, which are versions of local nsx-t repository for its packages.
+# Packages already installed in candidate version are skipped, nothing is
+# done if all are. Pinning may make candidate older than installed version,
+# apt downgrades such packages to it. Time of transaction is appended to log
+# as json line.
+#   install_packages.sh [--check] <section> <log> <package>...
+# --check only exits 0 if all packages are installed in candidate version.
+check=false
+if [ "$1" = '--check' ]; then
+  check=true
+  shift
+fi
+section=$1
+log=$2
+shift 2
+
+started=$(date +%s.%N)
+declare -A candidate installed
+# one apt-cache and one dpkg-query call for all packages
+while read -r package version; do
+  candidate[$package]=$version
+done < <(LANG=C apt-cache policy "$@" | awk '/^[^ ].*:$/ {sub(":$", ""); package=$1} /^  Candidate:/ {print package, $2}')
+while read -r package status version; do
+  if [ "$status" = 'installed' ]; then
+    installed[$package]=$version
+  fi
+done < <(dpkg-query -W -f '${Package} ${Status} ${Version}\n' "$@" 2>/dev/null | awk '{print $1, $4, $5}')
+
+pending=()
+for package in "$@"; do
+  version=${candidate[$package]}
+  if [ -z "$version" ] || [ "$version" = '(none)' ]; then
+    echo "Package $package has no installation candidate" >&2
+    exit 1
+  fi
+  current=${installed[$package]}
+  if [ "$current" = "$version" ]; then
+    continue
+  fi
+  pending+=("$package=$version")
+done
+
+if $check; then
+  [ ${#pending[@]} -eq 0 ]
+  exit
+fi
+if [ ${#pending[@]} -gt 0 ]; then
+  DEBIAN_FRONTEND=noninteractive apt-get -q -y --force-yes -o DPkg::Options::=--force-confold install "${pending[@]}"
+fi
+elapsed=$(awk "BEGIN {printf \"%.3f\", $(date +%s.%N) - $started}")
+printf '{"section": "%s", "packages": %d, "installed": %d, "elapsed": %s, "time": %d}\n' \
+  "$section" $# ${#pending[@]} "$elapsed" "${started%.*}" >> "$log" || true
+echo "$section: installed ${#pending[@]} of $# packages in ${elapsed}s"
@@ -0,0 +1,32 @@
+#!/usr/bin/env python
+"""Serve local nsx-t apt repository to other nodes of environment.
+
+usage: serve_repo.py <listen_address> <port> <repo_dir>
+"""
+import os
+import sys
+
+try:
+    from BaseHTTPServer import HTTPServer
+    from SimpleHTTPServer import SimpleHTTPRequestHandler
+    from SocketServer import ThreadingMixIn
+except ImportError:
+    from http.server import HTTPServer
+    from http.server import SimpleHTTPRequestHandler
+    from socketserver import ThreadingMixIn
+
+
+class RepoServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def main():
+    listen_address, port, repo_dir = sys.argv[1:4]
+    os.chdir(repo_dir)
+    RepoServer((listen_address, int(port)),
+               SimpleHTTPRequestHandler).serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+require File.join(File.dirname(__FILE__), '..', '..', '..', 'puppet_x', 'nsxt', 'manager_selector')
+require File.join(File.dirname(__FILE__), '..', '..', '..', 'puppet_x', 'nsxt', 'upgrade_service')
+
+module Puppet::Parser::Functions
+  newfunction(:disable_nsxt_upgrade_service, :doc => <<-EOS
+Disables install-upgrade service enabled by get_nsxt_components, must be
+called when all nodes got nsx-t host components. Managers which do not
+answer are skipped, ex:
+  disable_nsxt_upgrade_service('172.16.0.1,172.16.0.2,172.16.0.3', username, password)
+EOS
+  ) do |args|
+    managers = args[0]
+    username = args[1]
+    password = args[2]
+    managers = managers.split(',').map do |manager|
+      # Suppression scheme, NSX-T 1.0 supports only https scheme
+      manager.to_s.strip =~ /(https?:\/\/)?(?<manager>.+)/
+      Regexp.last_match[:manager]
+    end
+    PuppetX::Nsxt::ManagerSelector.ordered(managers, username, password, '').each do |manager|
+      begin
+        enabled_on = PuppetX::Nsxt::UpgradeService.enabled_on(manager, username, password)
+        if enabled_on.nil?
+          debug("install-upgrade service is already disabled on #{manager}")
+        else
+          PuppetX::Nsxt::UpgradeService.disable(manager, username, password)
+          notice("install-upgrade service disabled on #{enabled_on}")
+        end
+        return
+      rescue Errno::ECONNREFUSED, Errno::EHOSTUNREACH => error
+        PuppetX::Nsxt::ManagerSelector.mark_failed(manager)
+        notice("\nCan not get response from #{manager} - '#{error.message}', try next if exist\n")
+      rescue PuppetX::Nsxt::HttpError => error
+        raise Puppet::Error,("\nCannot disable install-upgrade service on nsx-t manager #{manager}:\n#{error.message}\n#{error.response}\n")
+      end
+    end
+    raise Puppet::Error,("\nCan not disable install-upgrade service, no nsx-t manager answered\n")
+  end
+end
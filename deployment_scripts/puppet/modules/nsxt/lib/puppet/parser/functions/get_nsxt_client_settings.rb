@@ -0,0 +1,35 @@
+module Puppet::Parser::Functions
+  newfunction(:get_nsxt_client_settings, :type => :rvalue, :doc => <<-EOS
+Returns the hash of nsx_v3 client settings for nsx.ini sized by number of
+nsx-t managers and neutron API workers on controller:
+  concurrent_connections - every worker process keeps its own pool to each
+    manager, requests are spread over managers, so one process needs
+    64/managers connections to each manager; connections from all workers
+    of controller to one manager are limited by 256, but pool is never
+    smaller than 10
+  http_timeout - connect timeout, shorter with several managers to fail
+    over to the next one quicker
+  http_retries - at least one attempt for every manager
+  http_read_timeout, conn_idle_timeout - longer idle timeout keeps large
+    pools warm
+example:
+  get_nsxt_client_settings('172.16.0.1,172.16.0.2,172.16.0.3', 8)
+EOS
+  ) do |args|
+    managers = args[0].to_s.split(',').map(&:strip).reject(&:empty?).size
+    managers = 1 if managers < 1
+    workers = [args[1].to_i, 1].max
+
+    per_process = (64.0 / managers).ceil
+    per_manager = 256 / workers
+    concurrent_connections = [[per_process, per_manager].min, 10].max
+
+    return {
+      'concurrent_connections' => concurrent_connections,
+      'http_timeout'           => managers > 1 ? 5 : 10,
+      'http_retries'           => [managers, 3].max,
+      'http_read_timeout'      => 180,
+      'conn_idle_timeout'      => concurrent_connections > 10 ? 30 : 10,
+    }
+  end
+end
@@ -1,78 +1,98 @@
-require 'rest-client'
 require 'json'
 require 'openssl'
 require 'open-uri'
+require File.join(File.dirname(__FILE__), '..', '..', '..', 'puppet_x', 'nsxt', 'session')
+require File.join(File.dirname(__FILE__), '..', '..', '..', 'puppet_x', 'nsxt', 'manager_selector')
+require File.join(File.dirname(__FILE__), '..', '..', '..', 'puppet_x', 'nsxt', 'downloader')
+require File.join(File.dirname(__FILE__), '..', '..', '..', 'puppet_x', 'nsxt', 'upgrade_service')
 
 module Puppet::Parser::Functions
   newfunction(:get_nsxt_components, :type => :rvalue, :doc => <<-EOS
-Returns the address of nsx-t manager, on which enable install-upgrade service
+Returns the path to nsx-t host components archive downloaded from nsx-t
+manager, on which enable install-upgrade service. Valid archive in cache
+directory (default /tmp) for the same nsx-t version is reused. Service is
+left enabled for other nodes, disable it with disable_nsxt_upgrade_service
+when all nodes got host components.
 example:
-  get_nsxt_components('172.16.0.1,172.16.0.2,172.16.0.3', username, password)
+  get_nsxt_components('172.16.0.1,172.16.0.2,172.16.0.3', username, password, '/tmp')
 EOS
   ) do |args|
     managers = args[0]
     username = args[1]
     password = args[2]
-    managers.split(',').each do |manager|
+    cache_dir = args[3].to_s.empty? ? '/tmp' : args[3]
+    managers = managers.split(',').map do |manager|
       # Suppression scheme, NSX-T 1.0 supports only https scheme
       manager.to_s.strip =~ /(https?:\/\/)?(?<manager>.+)/
-      manager = Regexp.last_match[:manager]
-      service_enabled = check_service_enabled(manager, username, password)
-      if service_enabled == 'error'
-        next
-      elsif service_enabled == 'disabled'
-        service_enabled_on_manager = enable_upgrade_service(manager, username, password)
-      else
-        service_enabled_on_manager = service_enabled
-      end
-      if check_service_running(service_enabled_on_manager, username, password)
-        return get_component(service_enabled_on_manager, username, password)
-      else
-        service_enabled_on_manager = enable_upgrade_service(service_enabled_on_manager, username, password)
-        if check_service_running(service_enabled_on_manager, username, password)
-          return get_component(service_enabled_on_manager, username, password)
+      Regexp.last_match[:manager]
+    end
+    PuppetX::Nsxt::ManagerSelector.ordered(managers, username, password, '').each do |manager|
+      cached_archive = get_cached_component(manager, username, password, cache_dir)
+      return cached_archive if cached_archive
+      begin
+        # service stays enabled for nodes which download concurrently,
+        # nsx-t-disable-upgrade-service task disables it
+        return PuppetX::Nsxt::UpgradeService.acquire(manager, username, password, false) do |enabled_on|
+          get_component(enabled_on, username, password, cache_dir)
         end
+      rescue Errno::ECONNREFUSED, Errno::EHOSTUNREACH => error
+        PuppetX::Nsxt::ManagerSelector.mark_failed(manager)
+        notice("\nCan not get response from #{manager} - '#{error.message}', try next if exist\n")
+      rescue PuppetX::Nsxt::HttpError => error
+        raise Puppet::Error,("\nCan not enable install-upgrade service on nsx-t manager #{manager}:\n#{error.message}\n#{error.response}\n")
       end
-      raise Puppet::Error,("\nCan not enable install-upgrade service on nsx-t manager\n")
     end
+    raise Puppet::Error,("\nCan not get nsx-t host components from #{managers.join(', ')}\n")
   end
 end
 
-def disable_upgrade_service(manager, username, password)
-  debug("Try disable install-upgrade service on #{manager}")
-  request = {'service_name' => 'install-upgrade', 'service_properties' => {'enabled' => false }}
-  api_url = "https://#{manager}/api/v1/node/services/install-upgrade"
-  response = nsxt_api(api_url, username, password, 'put', request.to_json)
-  debug("response:\n #{response}")
-  if response['service_properties']['enabled'] == false
-    return
+def get_component_path(cache_dir)
+  File.join(cache_dir, 'nsxt-components.tgz')
+end
+
+# archive from previous run is valid if it was downloaded for the same
+# nsx-t version and still matches recorded checksum or size
+def get_cached_component(manager, username, password, cache_dir)
+  file_path = get_component_path(cache_dir)
+  meta = PuppetX::Nsxt::Downloader.read_meta(file_path)
+  return nil if meta.nil?
+  begin
+    node_version = get_node_version(manager, username, password)
+  rescue Puppet::Error
+    return nil
   end
-  raise Puppet::Error,("\nCannot disable install-upgrade service on nsx-t manager #{manager}\n")
+  if meta['node_version'] == node_version and PuppetX::Nsxt::Downloader.verify(file_path, meta['checksum'], meta['size'])
+    debug("Reuse #{file_path} downloaded from #{meta['url']}")
+    return file_path
+  end
+  return nil
 end
 
-def get_component(manager, username, password)
-  file_path = '/tmp/nsxt-components.tgz'
-  component_url = get_component_url(manager, username, password)
+def get_component(manager, username, password, cache_dir)
+  file_path = get_component_path(cache_dir)
+  node_version = get_node_version(manager, username, password)
+  manifest = get_manifest(manager, node_version)
+  component_url = get_component_url(manager, node_version, manifest)
+  checksum = get_component_checksum(manifest)
   begin
-    File.open(file_path, 'wb') do |saved_file|
-      open(component_url, 'rb') do |read_file|
-        saved_file.write(read_file.read)
-      end
-    end
+    meta = PuppetX::Nsxt::Downloader.fetch(component_url, file_path, checksum)
   rescue => error
-    raise Puppet::Error,("\nCan not get file from #{url}:\n#{error.message}\n")
+    raise Puppet::Error,("\nCan not get file from #{component_url}:\n#{error.message}\n")
   end
-  disable_upgrade_service(manager, username, password)
+  PuppetX::Nsxt::Downloader.write_meta(file_path, meta.merge('url' => component_url, 'node_version' => node_version))
   return file_path
 end
 
-def get_component_url(manager, username, password)
-  node_version = get_node_version(manager, username, password)
+def get_manifest(manager, node_version)
+  manifest_url = "http://#{manager}:8080/repository/#{node_version}/metadata/manifest"
   begin
-    manifest = open("http://#{manager}:8080/repository/#{node_version}/metadata/manifest").read
+    return open(manifest_url).read
   rescue => error
-    raise Puppet::Error,("\nCan not get url for nsx-t components from #{url}:\n#{error.message}\n")
+    raise Puppet::Error,("\nCan not get url for nsx-t components from #{manifest_url}:\n#{error.message}\n")
   end
+end
+
+def get_component_url(manager, node_version, manifest)
   manifest.split(/\n/).each do |str|
     if str.include? 'NSX_HOST_COMPONENT_UBUNTU_1404_TAR'
       url = str.split('=')[1]
@@ -85,6 +105,19 @@ def get_component_url(manager, username, password)
   end
 end
 
+# checksum of host components archive if manifest provides it, e.g.
+# NSX_HOST_COMPONENT_UBUNTU_1404_TAR_SHA256=<hex>
+def get_component_checksum(manifest)
+  manifest.split(/\n/).each do |str|
+    key, value = str.split('=', 2)
+    if key.to_s.include? 'NSX_HOST_COMPONENT_UBUNTU_1404_TAR' and key =~ /(SHA256|SHA1|MD5)\s*\z/i
+      return {'algorithm' => Regexp.last_match[1].downcase, 'value' => value.to_s.strip}
+    end
+  end
+  debug("No checksum for nsx-t host components in manifest, verify by size")
+  return nil
+end
+
 def get_node_version(manager, username, password)
   debug("Try get nsx-t node version from #{manager}")
   api_url = "https://#{manager}/api/v1/node"
@@ -96,59 +129,22 @@ def get_node_version(manager, username, password)
   raise Puppet::Error,("\nCan not get node version from #{manager}\n")
 end
 
-def check_service_enabled(manager, username, password)
-  debug("Check install-upgrade service enabled on #{manager}")
-  api_url = "https://#{manager}/api/v1/node/services/install-upgrade"
-  response = nsxt_api(api_url, username, password, 'get')
-  debug("response:\n #{response}")
-  if not response.to_s.empty?
-    if response['service_properties']['enabled'] == true
-      return response['service_properties']['enabled_on']
-    end
-    return 'disabled'
-  end
-  return 'error'
-end
-
-def check_service_running(manager, username, password)
-  debug("Check install-upgrade service running on #{manager}")
-  api_url = "https://#{manager}/api/v1/node/services/install-upgrade/status"
-  response = nsxt_api(api_url, username, password, 'get')
-  debug("response:\n #{response}")
-  if not response.to_s.empty?
-    if response['runtime_state'] == 'running'
-      return true
-    end
-  end
-  return false
-end
-
-def enable_upgrade_service(manager, username, password)
-  debug("Try enable install-upgrade service on #{manager}")
-  request = {'service_name' => 'install-upgrade', 'service_properties' => {'enabled' => true }}
-  api_url = "https://#{manager}/api/v1/node/services/install-upgrade"
-  response = nsxt_api(api_url, username, password, 'put', request.to_json)
-  debug("response:\n #{response}")
-  if response['service_properties']['enabled'] == true
-    return response['service_properties']['enabled_on']
-  end
-  raise Puppet::Error,("\nCannot enable install-upgrade service on nsx-t manager #{manager}\n")
-end
-
 def nsxt_api(api_url, username, password, method, request='', timeout=5)
   retry_count = 3
   begin
     if method == 'get'
-      response = RestClient::Request.execute(method: :get, url: api_url, timeout: timeout, user: username, password: password, verify_ssl: OpenSSL::SSL::VERIFY_NONE)
+      response = PuppetX::Nsxt::Session.request(:get, api_url, username, password, '', nil, timeout)
     elsif method == 'put'
-      response = RestClient::Request.execute(method: :put, url: api_url, payload: request, timeout: timeout, user: username, password: password, verify_ssl: OpenSSL::SSL::VERIFY_NONE, headers: {'Content-Type' => 'application/json'})
+      response = PuppetX::Nsxt::Session.request(:put, api_url, username, password, '', request, timeout)
     end
     response_hash = JSON.parse(response.body)
     return response_hash
   rescue Errno::ECONNREFUSED
+    PuppetX::Nsxt::ManagerSelector.mark_failed_url(api_url)
     notice("\nCan not get response from #{api_url} - 'Connection refused', try next if exist\n")
     return ""
   rescue Errno::EHOSTUNREACH
+    PuppetX::Nsxt::ManagerSelector.mark_failed_url(api_url)
     notice("\nCan not get response from #{api_url} - 'No route to host', try next if exist\n")
     return ""
   rescue => error
@@ -157,7 +153,7 @@ def nsxt_api(api_url, username, password, method, request='', timeout=5)
       sleep 10
       retry
     else
-      raise Puppet::Error,("\nCan not get response from #{api_url} :\n#{error.message}\n#{JSON.parse(error.response)['error_message']}\n")
+      raise Puppet::Error,("\nCan not get response from #{api_url} :\n#{error.message}\n#{PuppetX::Nsxt::Session.error_message(error)}\n")
     end
   end
 end
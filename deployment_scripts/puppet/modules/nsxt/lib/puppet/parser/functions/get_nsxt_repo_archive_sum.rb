@@ -0,0 +1,25 @@
+require 'net/http'
+require 'uri'
+
+module Puppet::Parser::Functions
+  newfunction(:get_nsxt_repo_archive_sum, :type => :rvalue, :doc => <<-EOS
+Returns sha256 of host components archive which repository served by
+primary controller is built from, empty string if it can not be read.
+Nodes which use that repository do not connect to nsx-t managers.
+example:
+  get_nsxt_repo_archive_sum('http://10.20.0.3:8090/')
+EOS
+  ) do |args|
+    uri = URI.join(args[0], '.archive.sha256')
+    begin
+      http = Net::HTTP.new(uri.host, uri.port)
+      http.open_timeout = 10
+      http.read_timeout = 10
+      response = http.get(uri.request_uri)
+      response.is_a?(Net::HTTPSuccess) ? response.body.strip : ''
+    rescue StandardError, Timeout::Error => error
+      debug("Can not get archive sha256 of #{uri}: #{error.message}")
+      ''
+    end
+  end
+end
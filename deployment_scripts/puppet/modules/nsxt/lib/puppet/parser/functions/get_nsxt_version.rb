@@ -0,0 +1,28 @@
+require 'json'
+require File.join(File.dirname(__FILE__), '..', '..', '..', 'puppet_x', 'nsxt', 'session')
+require File.join(File.dirname(__FILE__), '..', '..', '..', 'puppet_x', 'nsxt', 'manager_selector')
+
+module Puppet::Parser::Functions
+  newfunction(:get_nsxt_version, :type => :rvalue, :doc => <<-EOS
+Returns node_version of nsx-t managers, which host components of local
+repository are built for, empty string if no manager answers.
+example:
+  get_nsxt_version('172.16.0.1,172.16.0.2,172.16.0.3', username, password)
+EOS
+  ) do |args|
+    managers = args[0].to_s.split(',').map(&:strip).reject(&:empty?)
+    username = args[1]
+    password = args[2]
+    PuppetX::Nsxt::ManagerSelector.ordered(managers, username, password, '').each do |manager|
+      key = PuppetX::Nsxt::ManagerSelector.key(manager)
+      begin
+        response = PuppetX::Nsxt::Session.request(:get, "https://#{key}/api/v1/node", username, password, '')
+        return JSON.parse(response.body)['node_version'].to_s
+      rescue StandardError, Timeout::Error => error
+        PuppetX::Nsxt::ManagerSelector.mark_failed(manager)
+        debug("Can not get nsx-t node version from #{key}: #{error.message}")
+      end
+    end
+    ''
+  end
+end
@@ -0,0 +1,23 @@
+require File.join(File.dirname(__FILE__), '..', '..', '..', 'puppet_x', 'nsxt', 'gem_bundle')
+
+module Puppet::Parser::Functions
+  newfunction(:nsxt_gem_bundle, :type => :rvalue, :doc => <<-EOS
+Verifies checksums of offline gem bundle in directory and returns package
+files of bundle which are to be installed: not installed or installed in
+older version. Returns false if plugin was built without bundle, ex:
+  nsxt_gem_bundle('/etc/fuel/plugins/nsx-t-1.0/puppet/modules/nsxt/files/gems')
+EOS
+  ) do |args|
+    dir = args[0]
+    if not PuppetX::Nsxt::GemBundle.present?(dir)
+      debug("No gem bundle in #{dir}")
+      false
+    else
+      begin
+        PuppetX::Nsxt::GemBundle.pending(dir).map { |entry| entry['file'] }
+      rescue PuppetX::Nsxt::GemBundle::ChecksumError => error
+        raise Puppet::ParseError, error.message
+      end
+    end
+  end
+end
@@ -0,0 +1,20 @@
+require File.join(File.dirname(__FILE__), '..', '..', '..', 'puppet_x', 'nsxt', 'fingerprint')
+
+module Puppet::Parser::Functions
+  newfunction(:nsxt_task_converged, :type => :rvalue, :doc => <<-EOS
+Returns true if task was already converged on this node with the same
+input data (plugin settings, etc.), and files and packages which the task
+manages did not change since then. Stamp is written by nsxt_task_stamp
+resource at the end of successful task run, ex:
+  nsxt_task_converged('configure-plugin', $settings, ['/etc/neutron/plugins/vmware/nsx.ini'], ['python-vmware-nsx'])
+EOS
+  ) do |args|
+    task = args[0]
+    data = args[1]
+    files = args[2] || []
+    packages = args[3] || []
+    converged = PuppetX::Nsxt::Fingerprint.converged?(task, data, files, packages)
+    debug("Task #{task} #{converged ? 'is' : 'is not'} converged, stamp #{PuppetX::Nsxt::Fingerprint.path(task)}")
+    converged
+  end
+end
@@ -0,0 +1,12 @@
+require File.join(File.dirname(__FILE__), '..', '..', '..', 'puppet_x', 'nsxt', 'fingerprint')
+
+module Puppet::Parser::Functions
+  newfunction(:nsxt_task_stamped, :type => :rvalue, :doc => <<-EOS
+Returns true if task converged on this node at least once, whatever its
+input and state were then, ex:
+  nsxt_task_stamped('neutron-server')
+EOS
+  ) do |args|
+    !PuppetX::Nsxt::Fingerprint.read(args[0]).nil?
+  end
+end
@@ -0,0 +1,52 @@
+require 'tempfile'
+require File.join(File.dirname(__FILE__), '..', '..', '..', 'puppet_x', 'nsxt', 'validator')
+
+module Puppet::Parser::Functions
+  newfunction(:validate_nsxt_settings, :doc => <<-EOS
+Checks NSX-T objects referenced by plugin settings: transport zones, tier-0
+router, edge cluster, uplink profile and IP pools exist and have right type,
+transport zones have host switch name, IP pools have address for every node
+and pnic pairs use uplinks of uplink profile. Fails with all found errors.
+Nodes are counted by roles from network_metadata. The last argument is path
+to CA file, certificate content or '' to not verify managers, ex:
+  validate_nsxt_settings($settings, hiera_hash('network_metadata'), $ca)
+EOS
+  ) do |args|
+    settings = args[0]
+    nodes = (args[1] || {})['nodes'] || {}
+    ca = args[2].to_s
+    managers = settings['nsx_api_managers'].to_s.split(',').map do |manager|
+      # Suppression scheme, NSX-T 1.0 supports only https scheme
+      manager.to_s.strip =~ /(https?:\/\/)?(?<manager>.+)/
+      Regexp.last_match[:manager]
+    end
+
+    node_counts = Hash.new(0)
+    nodes.each_value do |node|
+      roles = Array(node['node_roles'])
+      if roles.include?('primary-controller') or roles.include?('controller')
+        node_counts['controller'] += 1
+      elsif roles.include?('compute')
+        node_counts['compute'] += 1
+      end
+    end
+
+    ca_file = Tempfile.new('nsx-t-ca')
+    begin
+      if ca.include?('-----BEGIN')
+        ca_file.write(ca)
+        ca_file.flush
+        ca = ca_file.path
+      end
+      started = Time.now
+      errors = PuppetX::Nsxt::Validator.validate(settings, node_counts, managers, settings['nsx_api_user'], settings['nsx_api_password'], ca)
+      debug("NSX-T settings checked in #{(Time.now - started).round(2)}s")
+    ensure
+      ca_file.close!
+    end
+    if not errors.empty?
+      raise Puppet::Error,("\nNSX-T plugin settings are not valid:\n#{errors.join("\n")}\n")
+    end
+    notice("NSX-T plugin settings are valid")
+  end
+end
@@ -0,0 +1,114 @@
+require 'fileutils'
+require 'puppet/util/ini_file'
+
+# Applies all nsx_config changes of puppet run to nsx.ini in one pass:
+# file is parsed once on prefetch, which also finds out resources that
+# have to change, and written once (temp file + rename) when the last of
+# them is flushed. File is not touched if nothing changes.
+Puppet::Type.type(:nsx_config).provide(:ini_batch) do
+
+  def self.file_path
+    '/etc/neutron/plugins/vmware/nsx.ini'
+  end
+
+  def self.separator
+    ' = '
+  end
+
+  def self.prefetch(resources)
+    ini_file = Puppet::Util::IniFile.new(file_path, separator)
+    @changes = {}
+    @pending = {}
+    resources.each do |name, resource|
+      section, setting = name.split('/', 2)
+      value = ini_file.get_value(section, setting)
+      resource.provider = new(:name => name, :ensure => (value.nil? ? :absent : :present), :value => value)
+      @pending[name] = true if out_of_sync?(resource, value)
+    end
+    debug("#{@pending.size} of #{resources.size} settings of #{file_path} to change")
+  end
+
+  def self.out_of_sync?(resource, value)
+    if resource[:ensure] == :absent or resource[:value] == resource[:ensure_absent_val]
+      return (not value.nil?)
+    end
+    value != resource[:value]
+  end
+
+  # nil value removes setting
+  def self.change(name, value)
+    (@changes ||= {})[name] = value
+  end
+
+  def self.flushed(name)
+    @pending.delete(name) if @pending
+    write if @pending.nil? or @pending.empty?
+  end
+
+  # settings of resources which failed or were skipped are not pending
+  # anymore when transaction ends, write what was changed
+  def self.post_resource_eval
+    write
+  end
+
+  def self.write
+    return if @changes.nil? or @changes.empty?
+    changes = @changes
+    @changes = {}
+    temp_path = "#{file_path}.puppet-tmp"
+    if File.exist?(file_path)
+      FileUtils.cp(file_path, temp_path, :preserve => true)
+    else
+      FileUtils.mkdir_p(File.dirname(file_path))
+    end
+    ini_file = Puppet::Util::IniFile.new(temp_path, separator)
+    changes.each do |name, value|
+      section, setting = name.split('/', 2)
+      if value.nil?
+        ini_file.remove_setting(section, setting)
+      else
+        ini_file.set_value(section, setting, value)
+      end
+    end
+    ini_file.save
+    if File.exist?(file_path) and FileUtils.compare_file(file_path, temp_path)
+      File.delete(temp_path)
+    else
+      File.rename(temp_path, file_path)
+      debug("#{changes.size} settings written to #{file_path}")
+    end
+  ensure
+    File.delete(temp_path) if temp_path and File.exist?(temp_path)
+  end
+
+  def exists?
+    @property_hash[:ensure] == :present
+  end
+
+  def create
+    self.value = resource[:value]
+    @property_hash[:ensure] = :present
+  end
+
+  def destroy
+    self.class.change(resource[:name], nil)
+    @property_hash[:ensure] = :absent
+  end
+
+  def value
+    @property_hash[:value]
+  end
+
+  def value=(value)
+    if value == resource[:ensure_absent_val]
+      self.class.change(resource[:name], nil)
+    else
+      self.class.change(resource[:name], value)
+    end
+    @property_hash[:value] = value
+  end
+
+  def flush
+    self.class.flushed(resource[:name])
+  end
+end
@@ -7,22 +7,33 @@ Puppet::Type.type(:nsxt_add_to_fabric).provide(:nsxt_add_to_fabric, :parent => P
 
   def create
     debug("Attempting to register a node")
+    stagger_start
     # need define for return error from cycle
     out_reg = ''
-    @resource[:managers].each do |manager|
+    ordered_managers.each do |manager|
       thumbprint = get_manager_thumbprint(manager, ca_file = @resource[:ca_file])
       if not thumbprint.empty?
-        # 12 retry x 15 sleep time = 3 minutes timeout
-        retry_count = 12
-        while retry_count > 0
-          out_reg = nsxtcli("join management-plane #{manager} username #{@resource[:username]} thumbprint #{thumbprint} password #{@resource[:password]}")
-          if exists?
-            notice("Node added to NSX-T fabric")
-            return true
-          else
-            retry_count -= 1
-            sleep 15
+        join = "join management-plane #{manager} username #{@resource[:username]} thumbprint #{thumbprint} password #{@resource[:password]}"
+        out_reg = nsxtcli(join)
+        forget_node_id
+        # node uuid may appear only after join
+        node_id = get_node_id
+        checks = 0
+        converged = wait_converged('registered_on_management_plane', node_id) do
+          checks += 1
+          node_id = get_node_id if node_id.empty?
+          if node_id.empty? and checks > 1
+            # join failed transiently, node has no uuid a tick later
+            out_reg = nsxtcli(join)
+            node_id = get_node_id
           end
+          (not node_id.empty?) and nsxtcli("get managers").include?("Connected") and
+            fabric_node_state(node_id) == 'success'
+        end
+        if converged
+          notice("Node added to NSX-T fabric")
+          debug_session_stats
+          return true
         end
       end
     end
@@ -34,7 +45,7 @@ Puppet::Type.type(:nsxt_add_to_fabric).provide(:nsxt_add_to_fabric, :parent => P
     if connected_managers.include? "Connected"
       node_id = get_node_id
       if not node_id.empty?
-        @resource[:managers].each do |manager|
+        ordered_managers.each do |manager|
           if check_node_registered(manager, node_id)
             debug("Node '#{node_id}' connected and registered on '#{manager}'")
             return true
@@ -50,26 +61,34 @@ Puppet::Type.type(:nsxt_add_to_fabric).provide(:nsxt_add_to_fabric, :parent => P
     debug("Attempting to unregister a node")
     # need define for return error from cycle
     out_unreg = ''
-    @resource[:managers].each do |manager|
+    node_id = get_node_id
+    ordered_managers.each do |manager|
       thumbprint = get_manager_thumbprint(manager, ca_file = @resource[:ca_file])
       if not thumbprint.empty?
-        # 12 retry x 15 sleep time = 3 minutes timeout
-        retry_count = 12
-        while retry_count > 0
-          out_unreg = nsxtcli("detach management-plane #{manager} username #{@resource[:username]} thumbprint #{thumbprint} password #{@resource[:password]}")
-          if not exists?
-            notice("Node deleted from NSX-T fabric")
-            return true
-          else
-            retry_count -= 1
-            sleep 15
-          end
+        out_unreg = nsxtcli("detach management-plane #{manager} username #{@resource[:username]} thumbprint #{thumbprint} password #{@resource[:password]}")
+        forget_node_id
+        converged = wait_converged('unregistered_from_management_plane', node_id) do
+          state = fabric_node_state(node_id)
+          (not state.nil?) and state != 'success'
+        end
+        if converged
+          notice("Node deleted from NSX-T fabric")
+          return true
         end
       end
     end
     raise Puppet::Error,("\nNode not deleted from NSX-t fabric: \n #{out_unreg}\n")
   end
 
+  # registration state of node on manager, nil if no manager answered
+  def fabric_node_state(node_id)
+    response = get_nsxt_status("/api/v1/fabric/nodes/#{node_id}/state")
+    return nil if not response.is_a?(Hash)
+    return 'not_found' if response.empty?
+    debug("Node '#{node_id}' state '#{response['state']}', details:\n#{response['details']}") if response['state'] != 'success'
+    return response['state']
+  end
+
   def check_node_registered(manager, node_id)
     api_url = "https://#{manager}/api/v1/fabric/nodes/#{node_id}/state"
     response = get_nsxt_api(api_url, @resource[:username], @resource[:password], @resource[:ca_file])
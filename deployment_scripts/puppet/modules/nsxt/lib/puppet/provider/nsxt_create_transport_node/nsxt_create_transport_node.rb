@@ -12,7 +12,7 @@ Puppet::Type.type(:nsxt_create_transport_node).provide(:nsxt_create_transport_no
     node_id = get_node_id
     display_name = Socket.gethostname
     # the host switch name of the transport zone must match the host switch name to create transport nodes
-    host_switch_name = get_host_switch_name(@resource[:managers], @resource[:transport_zone_id])
+    host_switch_name = get_host_switch_name(ordered_managers, @resource[:transport_zone_id])
     request = {'display_name' => display_name,
                'node_id' => node_id,
                'host_switches' => [{'host_switch_name' => host_switch_name,
@@ -31,7 +31,8 @@ Puppet::Type.type(:nsxt_create_transport_node).provide(:nsxt_create_transport_no
       request['transport_zone_endpoints'].push(transport_zone_profile_ids)
     end
     debug("Attempting to create a transport node")
-    @resource[:managers].each do |manager|
+    stagger_start
+    ordered_managers.each do |manager|
       api_url = "https://#{manager}/api/v1/transport-nodes"
       begin
         response = post_nsxt_api(api_url, @resource[:username], @resource[:password], request.to_json, @resource[:ca_file])
@@ -39,16 +40,11 @@ Puppet::Type.type(:nsxt_create_transport_node).provide(:nsxt_create_transport_no
         raise Puppet::Error,("\nFailed to create the transport node: #{error.message}\n")
       end
       if not response.to_s.empty?
-        # 12 retry x 15 sleep time = 3 minutes timeout
-        retry_count = 12
-        while retry_count > 0
-          if exists?
-            notice("Node '#{node_id}' added to NSX-T as transport node")
-            return true
-          else
-            retry_count -= 1
-            sleep 15
-          end
+        PuppetX::Nsxt::TransportNodes.remember(node_id, response['id'])
+        if wait_converged('lcp_connectivity_up', node_id) { lcp_connectivity_status(node_id) == 'UP' }
+          notice("Node '#{node_id}' added to NSX-T as transport node")
+          debug_session_stats
+          return true
         end
       end
     end
@@ -60,7 +56,7 @@ Puppet::Type.type(:nsxt_create_transport_node).provide(:nsxt_create_transport_no
     if connected_managers.include? "connected"
       node_id = get_node_id
       if not node_id.empty?
-        @resource[:managers].each do |manager|
+        ordered_managers.each do |manager|
           if check_node_lcp_connected(manager, node_id)
             debug("Node '#{node_id}' connected to controllers and LCP connectivity status UP on '#{manager}'")
             return true
@@ -77,7 +73,7 @@ Puppet::Type.type(:nsxt_create_transport_node).provide(:nsxt_create_transport_no
   def destroy
     debug("Attempting to delete a transport node")
     node_id = get_node_id
-    @resource[:managers].each do |manager|
+    ordered_managers.each do |manager|
       transport_node_id = get_transport_node_id(manager, node_id, @resource[:ca_file])
       if not transport_node_id.empty?
         api_url = "https://#{manager}/api/v1/transport-nodes/#{transport_node_id}"
@@ -87,16 +83,14 @@ Puppet::Type.type(:nsxt_create_transport_node).provide(:nsxt_create_transport_no
           raise Puppet::Error,("\nFailed to delete the transport node: #{error.message}\n")
         end
         if response
-          # 12 retry x 15 sleep time = 3 minutes timeout
-          retry_count = 12
-            while retry_count > 0
-              if not exists?
-                notice("Transport node '#{node_id}' delete from NSX-T")
-                return true
-              else
-                retry_count -= 1
-                sleep 15
-              end
+          PuppetX::Nsxt::TransportNodes.forget(node_id)
+          converged = wait_converged('lcp_connectivity_down', node_id) do
+            status = lcp_connectivity_status(node_id)
+            (not status.nil?) and status != 'UP'
+          end
+          if converged
+            notice("Transport node '#{node_id}' delete from NSX-T")
+            return true
           end
         end
       end
@@ -125,7 +119,26 @@ Puppet::Type.type(:nsxt_create_transport_node).provide(:nsxt_create_transport_no
     return false
   end
 
+  # LCP connectivity status of node, nil if no manager answered
+  def lcp_connectivity_status(node_id)
+    response = get_nsxt_status("/api/v1/fabric/nodes/#{node_id}/status")
+    return nil if not response.is_a?(Hash)
+    return 'NOT_FOUND' if response.empty?
+    if response['lcp_connectivity_status'] != 'UP'
+      (response['lcp_connectivity_status_details'] || []).each do |details|
+        debug("On #{details['control_node_ip']} status: #{details['status']} failure_status: #{details['failure_status']}")
+      end
+    end
+    return response['lcp_connectivity_status']
+  end
+
   def get_host_switch_name(managers, transport_zone_id)
+    PuppetX::Nsxt::RunCache.fetch("host_switch_name:#{transport_zone_id}") do
+      fetch_host_switch_name(managers, transport_zone_id)
+    end
+  end
+
+  def fetch_host_switch_name(managers, transport_zone_id)
     managers.each do |manager|
       debug("Attempt to get host_switch_name for '#{transport_zone_id}' transport zone from '#{manager}' manager")
       api_url = "https://#{manager}/api/v1/transport-zones/#{transport_zone_id}"
@@ -0,0 +1,69 @@
+require 'json'
+require File.join(File.dirname(__FILE__), '..', '..', '..', 'puppet_x', 'nsxt', 'rolling_restart')
+
+Puppet::Type.type(:nsxt_rolling_restart).provide(:nsxt_rolling_restart) do
+
+  commands :service => 'service'
+  commands :pgrep => 'pgrep'
+  commands :ps => 'ps'
+
+  def status
+    pid = process_id
+    if pid.nil?
+      debug("Service #{@resource[:service]} is not running")
+      return :stopped
+    end
+    started = Time.now - ps('-o', 'etimes=', '-p', pid).strip.to_i
+    changed = changed_files.select { |file| File.mtime(file) > started }
+    if not changed.empty?
+      debug("Service #{@resource[:service]} started at #{started}, changed since then: #{changed.join(', ')}")
+      return :stale
+    end
+    :restarted
+  end
+
+  def restart
+    running = (not process_id.nil?)
+    report = PuppetX::Nsxt::RollingRestart.run(
+      'haproxy_socket' => @resource[:haproxy_socket],
+      'backend'        => @resource[:backend],
+      'server'         => @resource[:server],
+      'health_url'     => @resource[:health_url],
+      'vip_url'        => @resource[:vip_url],
+      'timeout'        => @resource[:timeout],
+      'drain_timeout'  => @resource[:drain_timeout]) do
+      service(@resource[:service], running ? 'restart' : 'start')
+    end
+    report['service'] = @resource[:service]
+    write_report(report)
+    if not report['drained'] and not @resource[:haproxy_socket].to_s.empty?
+      warning("Node was not taken out of haproxy backend #{@resource[:backend]}, stats socket #{@resource[:haproxy_socket]} is not on admin level")
+    end
+    if not report['healthy']
+      raise Puppet::Error, "Service #{@resource[:service]} did not answer on #{@resource[:health_url]} in #{@resource[:timeout]}s after restart"
+    end
+    notice("Service #{@resource[:service]} restarted: unavailable on node #{report['unavailable']}s, " +
+           "API on VIP unavailable #{report['vip_unavailable']}s (#{report['vip_failures']} of #{report['vip_probes']} probes failed)")
+  end
+
+  def process_id
+    pid = pgrep('-o', '-f', @resource[:process]).strip
+    pid.empty? ? nil : pid
+  rescue Puppet::ExecutionFailure
+    nil
+  end
+
+  # config files and package file lists, dpkg rewrites list of package on
+  # every install and upgrade
+  def changed_files
+    lists = @resource[:packages].map { |package| "/var/lib/dpkg/info/#{package}.list" }
+    (@resource[:config_files] + lists).select { |file| File.exist?(file) }
+  end
+
+  def write_report(report)
+    File.open(@resource[:report], 'a') { |file| file.puts(report.to_json) }
+  rescue SystemCallError => error
+    debug("Can not write #{@resource[:report]}: #{error.message}")
+  end
+
+end
@@ -0,0 +1,18 @@
+require File.join(File.dirname(__FILE__), '..', '..', '..', 'puppet_x', 'nsxt', 'fingerprint')
+
+Puppet::Type.type(:nsxt_task_stamp).provide(:nsxt_task_stamp) do
+
+  def create
+    PuppetX::Nsxt::Fingerprint.write(@resource[:task], @resource[:data], @resource[:files], @resource[:packages])
+    notice("Task #{@resource[:task]} converged")
+  end
+
+  def exists?
+    PuppetX::Nsxt::Fingerprint.converged?(@resource[:task], @resource[:data], @resource[:files], @resource[:packages])
+  end
+
+  def destroy
+    PuppetX::Nsxt::Fingerprint.remove(@resource[:task])
+  end
+
+end
@@ -0,0 +1,34 @@
+require File.join(File.dirname(__FILE__), '..', '..', '..', 'puppet_x', 'nsxt', 'interfaces')
+
+Puppet::Type.type(:nsxt_up_interfaces).provide(:nsxt_up_interfaces) do
+
+  def create
+    interfaces = @resource[:interfaces]
+    started = Time.now
+    written = PuppetX::Nsxt::Interfaces.write_stanzas(interfaces)
+    debug("Stanzas written for #{written.join(', ')}") if not written.empty?
+    failed = PuppetX::Nsxt::Interfaces.bring_up(interfaces).reject { |_name, result| result[0] == 0 }
+    if not failed.empty?
+      raise Puppet::Error, "\nInterfaces not brought up:\n" +
+        failed.map { |name, result| " #{name}: #{result[1]}" }.join("\n")
+    end
+    down = PuppetX::Nsxt::Interfaces.wait_link(interfaces, @resource[:link_timeout])
+    if not down.empty?
+      # transport node is created without carrier, LCP reports it down
+      warning("No link on #{down.join(', ')} in #{@resource[:link_timeout]}s")
+    end
+    notice("Interfaces #{interfaces.join(', ')} up in #{(Time.now - started).round(1)}s")
+  end
+
+  def exists?
+    @resource[:interfaces].all? do |name|
+      PuppetX::Nsxt::Interfaces.stanza_written?(name) and PuppetX::Nsxt::Interfaces.admin_up?(name)
+    end
+  end
+
+  def destroy
+    PuppetX::Nsxt::Interfaces.bring_down(@resource[:interfaces])
+    PuppetX::Nsxt::Interfaces.remove_stanzas(@resource[:interfaces])
+  end
+
+end
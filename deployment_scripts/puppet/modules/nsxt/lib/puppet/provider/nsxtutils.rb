@@ -1,35 +1,48 @@
-# require ruby-rest-client, ruby-json
+# require ruby-json
 
-require 'rest-client'
 require 'json'
 require 'socket'
 require 'openssl'
+require File.join(File.dirname(__FILE__), '..', '..', 'puppet_x', 'nsxt', 'session')
+require File.join(File.dirname(__FILE__), '..', '..', 'puppet_x', 'nsxt', 'manager_selector')
+require File.join(File.dirname(__FILE__), '..', '..', 'puppet_x', 'nsxt', 'admission')
+require File.join(File.dirname(__FILE__), '..', '..', 'puppet_x', 'nsxt', 'transport_nodes')
+require File.join(File.dirname(__FILE__), '..', '..', 'puppet_x', 'nsxt', 'waiter')
+require File.join(File.dirname(__FILE__), '..', '..', 'puppet_x', 'nsxt', 'run_cache')
 
 class Puppet::Provider::Nsxtutils < Puppet::Provider
 
+  # json lines with time to converge of every node status change
+  CONVERGENCE_LOG = '/var/log/nsx-t-convergence.log'
+
+  def initialize(resource=nil)
+    super(resource)
+    if @resource and @resource[:api_rate]
+      PuppetX::Nsxt::Admission.configure(@resource[:api_rate])
+    end
+  end
+
   def get_nsxt_api(api_url, username, password, ca_file, timeout=5)
     retry_count = 3
     begin
-      if ca_file.to_s.empty?
-        response = RestClient::Request.execute(method: :get, url: api_url, timeout: timeout, user: username, password: password, verify_ssl: OpenSSL::SSL::VERIFY_NONE)
-      else
-        response = RestClient::Request.execute(method: :get, url: api_url, timeout: timeout, user: username, password: password, verify_ssl: OpenSSL::SSL::VERIFY_PEER, ssl_ca_file: ca_file)
-      end
+      response = PuppetX::Nsxt::Admission.request(:get, api_url, username, password, ca_file, nil, timeout)
       response_hash = JSON.parse(response.body)
       return response_hash
     rescue Errno::ECONNREFUSED
+      PuppetX::Nsxt::ManagerSelector.mark_failed_url(api_url)
       notice("\nCan not get response from #{api_url} - 'Connection refused', try next if exist\n")
       return ""
     rescue Errno::EHOSTUNREACH
+      PuppetX::Nsxt::ManagerSelector.mark_failed_url(api_url)
       notice("\nCan not get response from #{api_url} - 'No route to host', try next if exist\n")
       return ""
     rescue => error
       retry_count -= 1
       if retry_count > 0
-        sleep 10
+        sleep PuppetX::Nsxt::Admission.backoff(3 - retry_count, 5)
         retry
       else
-        raise Puppet::Error,("\nCan not get response from #{api_url} :\n#{error.message}\n#{JSON.parse(error.response)['error_message']}\n")
+        raise Puppet::Error,("\nCan not get response from #{api_url} :\n#{error.message}\n#{api_error_message(error)}\n")
       end
     end
   end
@@ -37,26 +50,24 @@ class Puppet::Provider::Nsxtutils < Puppet::Provider
   def post_nsxt_api(api_url, username, password, request, ca_file, timeout=5)
     retry_count = 3
     begin
-      if ca_file.to_s.empty?
-        response = RestClient::Request.execute(method: :post, url: api_url, payload: request, timeout: timeout, user: username, password: password, verify_ssl: OpenSSL::SSL::VERIFY_NONE,headers: {'Content-Type' => 'application/json'})
-      else
-        response = RestClient::Request.execute(method: :post, url: api_url, payload: request, timeout: timeout, user: username, password: password, verify_ssl: OpenSSL::SSL::VERIFY_PEER, ssl_ca_file: ca_file, headers: {'Content-Type' => 'application/json'})
-      end
+      response = PuppetX::Nsxt::Admission.request(:post, api_url, username, password, ca_file, request, timeout)
       response_hash = JSON.parse(response.body)
       return response_hash
     rescue Errno::ECONNREFUSED
+      PuppetX::Nsxt::ManagerSelector.mark_failed_url(api_url)
       notice("\nCan not get response from #{api_url} - 'Connection refused', try next if exist\n")
       return ""
     rescue Errno::EHOSTUNREACH
+      PuppetX::Nsxt::ManagerSelector.mark_failed_url(api_url)
       notice("\nCan not get response from #{api_url} - 'No route to host', try next if exist\n")
       return ""
     rescue => error
       retry_count -= 1
       if retry_count > 0
-        sleep 10
+        sleep PuppetX::Nsxt::Admission.backoff(3 - retry_count, 5)
         retry
       else
-        raise Puppet::Error,("\nCan not get response from #{api_url} :\n#{error.message}\n#{JSON.parse(error.response)['error_message']}\n")
+        raise Puppet::Error,("\nCan not get response from #{api_url} :\n#{error.message}\n#{api_error_message(error)}\n")
       end
     end
   end
@@ -64,23 +75,21 @@ class Puppet::Provider::Nsxtutils < Puppet::Provider
   def delete_nsxt_api(api_url, username, password, ca_file, timeout=5)
     retry_count = 3
     begin
-      if ca_file.to_s.empty?
-        response = RestClient::Request.execute(method: :delete, url: api_url, timeout: timeout, user: username, password: password, verify_ssl: OpenSSL::SSL::VERIFY_NONE)
-      else
-        response = RestClient::Request.execute(method: :delete, url: api_url, timeout: timeout, user: username, password: password, verify_ssl: OpenSSL::SSL::VERIFY_PEER, ssl_ca_file: ca_file)
-      end
-      # if http code not 20x - rest client raise exception
+      PuppetX::Nsxt::Admission.request(:delete, api_url, username, password, ca_file, nil, timeout)
+      # if http code not 20x - session raise exception
       return true
     rescue Errno::ECONNREFUSED
+      PuppetX::Nsxt::ManagerSelector.mark_failed_url(api_url)
       notice("\nCan not get response from #{api_url} - 'Connection refused', try next if exist\n")
       return false
     rescue Errno::EHOSTUNREACH
+      PuppetX::Nsxt::ManagerSelector.mark_failed_url(api_url)
       notice("\nCan not get response from #{api_url} - 'No route to host', try next if exist\n")
       return false
     rescue => error
       retry_count -= 1
       if retry_count > 0
-        sleep 10
+        sleep PuppetX::Nsxt::Admission.backoff(3 - retry_count, 5)
         retry
       else
         raise Puppet::Error,("\nCan not get response from #{api_url} :\n#{error.message}\n")
@@ -88,23 +97,103 @@ class Puppet::Provider::Nsxtutils < Puppet::Provider
     end
   end
 
-  def get_node_id
-    uuid = nsxtcli("get node-uuid")
-    if uuid =~ /\A[\da-f]{32}\z/i or uuid =~ /\A(urn:uuid:)?[\da-f]{8}-([\da-f]{4}-){3}[\da-f]{12}\z/i
-      return uuid
+  # Single status request per call, the first manager which answers wins.
+  # Returns parsed response, {} if object not found, "" if no manager answered
+  def get_nsxt_status(path)
+    ordered_managers.each do |manager|
+      api_url = "https://#{manager}#{path}"
+      begin
+        response = PuppetX::Nsxt::Admission.request(:get, api_url, @resource[:username], @resource[:password], @resource[:ca_file])
+        return JSON.parse(response.body)
+      rescue PuppetX::Nsxt::HttpError => error
+        return {} if error.code == 404
+        debug("Can not get status from #{api_url}: #{error.message}")
+      rescue => error
+        PuppetX::Nsxt::ManagerSelector.mark_failed(manager)
+        debug("Can not get status from #{api_url}: #{error.message}")
+      end
     end
-    notice("Cannot get node uuid")
     return ""
   end
 
+  # Polls block with exponential backoff up to convergence_timeout seconds
+  def wait_converged(event, node_id)
+    waiter = PuppetX::Nsxt::Waiter.new(@resource[:convergence_timeout])
+    converged = waiter.wait { yield }
+    if converged
+      notice("Node '#{node_id}' #{event.tr('_', ' ')} after #{waiter.elapsed.round(1)}s, #{waiter.attempts} status checks")
+      record_convergence(event, node_id, waiter)
+    else
+      debug("Node '#{node_id}' not #{event.tr('_', ' ')} in #{waiter.deadline}s")
+    end
+    return converged
+  end
+
+  def record_convergence(event, node_id, waiter)
+    record = {'time' => Time.now.to_i, 'event' => event, 'node_id' => node_id,
+              'seconds' => waiter.elapsed.round(3), 'checks' => waiter.attempts}
+    File.open(CONVERGENCE_LOG, 'a') { |file| file.puts(record.to_json) }
+  rescue SystemCallError => error
+    debug("Can not write #{CONVERGENCE_LOG}: #{error.message}")
+  end
+
+  # nodes of scale-out register at the same moment, spread them over
+  # start_jitter seconds
+  def stagger_start
+    window = @resource[:start_jitter].to_f
+    return if window <= 0
+    delay = PuppetX::Nsxt::Admission.stagger(window)
+    notice("Start delayed by #{delay.round(1)}s of #{window.round}s window")
+  end
+
+  # managers from resource, fastest healthy first
+  def ordered_managers
+    PuppetX::Nsxt::ManagerSelector.ordered(@resource[:managers], @resource[:username], @resource[:password], @resource[:ca_file])
+  end
+
+  def api_error_message(error)
+    PuppetX::Nsxt::Session.error_message(error)
+  end
+
+  def debug_session_stats
+    PuppetX::Nsxt::Session.stats.each do |stats|
+      debug("NSX-T manager #{stats['manager']}: #{stats['requests']} requests over #{stats['handshakes']} TLS handshakes (#{stats['resumed_handshakes']} resumed)")
+    end
+  end
+
+  # node uuid is memoized for puppet run, call forget_node_id after
+  # join/detach management-plane
+  def get_node_id
+    PuppetX::Nsxt::RunCache.fetch('node_id') do
+      uuid = nsxtcli("get node-uuid")
+      if uuid =~ /\A[\da-f]{32}\z/i or uuid =~ /\A(urn:uuid:)?[\da-f]{8}-([\da-f]{4}-){3}[\da-f]{12}\z/i
+        uuid
+      else
+        notice("Cannot get node uuid")
+        ""
+      end
+    end
+  end
+
+  def forget_node_id
+    PuppetX::Nsxt::RunCache.invalidate('node_id')
+  end
+
   def get_transport_node_id(manager, node_id, ca_file)
-    api_url = "https://#{manager}/api/v1/transport-nodes"
-    response = get_nsxt_api(api_url, @resource[:username], @resource[:password], @resource[:ca_file])
-    if not response.to_s.empty?
-      response['results'].each do |node|
-        if node['node_id'] == node_id
-          return node['id']
-        end
+    retry_count = 3
+    begin
+      transport_node_id = PuppetX::Nsxt::TransportNodes.find_id(manager, node_id, @resource[:username], @resource[:password], ca_file)
+      return transport_node_id if transport_node_id
+    rescue Errno::ECONNREFUSED, Errno::EHOSTUNREACH => error
+      PuppetX::Nsxt::ManagerSelector.mark_failed(manager)
+      notice("\nCan not get transport nodes from #{manager} - '#{error.message}', try next if exist\n")
+    rescue => error
+      retry_count -= 1
+      if retry_count > 0
+        sleep PuppetX::Nsxt::Admission.backoff(3 - retry_count, 5)
+        retry
+      else
+        raise Puppet::Error,("\nCan not get transport nodes from #{manager} :\n#{error.message}\n#{api_error_message(error)}\n")
       end
     end
     notice("Cannot get transport node id")
@@ -130,8 +219,13 @@ class Puppet::Provider::Nsxtutils < Puppet::Provider
 
   def get_manager_thumbprint(manager, timeout=5, ca_file)
     manager_host_port = get_manager_host_port(manager)
-    host = manager_host_port['host']
-    port = manager_host_port['port']
+    key = "thumbprint:#{manager_host_port['host']}:#{manager_host_port['port']}:#{ca_file}"
+    PuppetX::Nsxt::RunCache.fetch(key) do
+      fetch_manager_thumbprint(manager_host_port['host'], manager_host_port['port'], timeout, ca_file)
+    end
+  end
+
+  def fetch_manager_thumbprint(host, port, timeout, ca_file)
     retry_count = 3
     begin
       tcp_client = TCPSocket.new(host, port, timeout)
@@ -150,9 +244,11 @@ class Puppet::Provider::Nsxtutils < Puppet::Provider
       tp = OpenSSL::Digest::SHA256.new(cert.to_der)
       return OpenSSL::Digest::SHA256.new(cert.to_der).to_s
     rescue Errno::ECONNREFUSED
+      PuppetX::Nsxt::ManagerSelector.mark_failed("#{host}:#{port}")
       notice("\nCan not get 'thumbprint' from #{host}:#{port} - 'Connection refused', try next if exist\n")
       return ""
     rescue Errno::EHOSTUNREACH
+      PuppetX::Nsxt::ManagerSelector.mark_failed("#{host}:#{port}")
       notice("\nCan not get 'thumbprint' from #{host}:#{port} - 'No route to host', try next if exist\n")
       return ""
     rescue => error
@@ -34,6 +34,30 @@ Puppet::Type.newtype(:nsxt_create_transport_node) do
     defaultto ''
   end
 
+  newparam(:convergence_timeout) do
+    desc 'Seconds to wait until node status converges on NSX-T manager.'
+    defaultto 180
+    munge do |value|
+      Integer(value)
+    end
+  end
+
+  newparam(:start_jitter) do
+    desc 'Seconds over which start of registration is randomly delayed.'
+    defaultto 0
+    munge do |value|
+      Float(value)
+    end
+  end
+
+  newparam(:api_rate) do
+    desc 'NSX-T manager API requests per second from node, 0 to not limit.'
+    defaultto 5
+    munge do |value|
+      Float(value)
+    end
+  end
+
   newparam(:uplink_profile_id) do
     desc 'Ids of Uplink HostSwitch profiles to be associated with this HostSwitch.'
   end
@@ -0,0 +1,91 @@
+Puppet::Type.newtype(:nsxt_rolling_restart) do
+
+  @doc = "Restarts service of one node behind haproxy VIP, gated by health probe."
+
+  newproperty(:ensure) do
+    desc 'restarted - service runs and was started after its config files and packages changed.'
+    newvalue(:restarted) do
+      provider.restart
+    end
+
+    def retrieve
+      provider.status
+    end
+  end
+
+  newparam(:service) do
+    isnamevar
+    desc 'Name of service.'
+  end
+
+  newparam(:process) do
+    desc 'Pattern of service process command line for pgrep.'
+    defaultto { @resource[:service] }
+  end
+
+  newparam(:config_files) do
+    desc 'Service is restarted if these files are newer than its process.'
+    defaultto []
+    munge do |value|
+      Array(value)
+    end
+  end
+
+  newparam(:packages) do
+    desc 'Service is restarted if these packages were installed after its process started.'
+    defaultto []
+    munge do |value|
+      Array(value)
+    end
+  end
+
+  newparam(:haproxy_socket) do
+    desc 'Haproxy stats socket, empty to not take node out of backend.'
+    defaultto '/var/lib/haproxy/stats'
+  end
+
+  newparam(:backend) do
+    desc 'Haproxy backend of service.'
+  end
+
+  newparam(:server) do
+    desc 'Name of node in haproxy backend.'
+    defaultto { Facter.value(:hostname) }
+  end
+
+  newparam(:health_url) do
+    desc 'URL of service on node, service is healthy when it answers 2xx or 3xx.'
+  end
+
+  newparam(:vip_url) do
+    desc 'URL of service on VIP, probed to measure API availability during restart.'
+    defaultto ''
+  end
+
+  newparam(:timeout) do
+    desc 'Seconds to wait until service is healthy after restart.'
+    defaultto 180
+    munge do |value|
+      Integer(value)
+    end
+  end
+
+  newparam(:drain_timeout) do
+    desc 'Seconds to wait until haproxy has no sessions to node.'
+    defaultto 30
+    munge do |value|
+      Integer(value)
+    end
+  end
+
+  newparam(:report) do
+    desc 'Restart reports are appended to this file as json lines.'
+    defaultto '/var/log/nsx-t-rolling-restart.log'
+  end
+
+  validate do
+    raise ArgumentError, 'health_url is required' if self[:health_url].to_s.empty?
+    raise ArgumentError, 'backend is required' if self[:backend].to_s.empty? and not self[:haproxy_socket].to_s.empty?
+  end
+
+end
@@ -0,0 +1,33 @@
+Puppet::Type.newtype(:nsxt_task_stamp) do
+
+  @doc = "Stamp of converged deployment task, see nsxt_task_converged."
+
+  ensurable
+
+  newparam(:task) do
+    isnamevar
+    desc 'Name of deployment task.'
+  end
+
+  newparam(:data) do
+    desc 'Input of task, only its digest is stored.'
+    defaultto({})
+  end
+
+  newparam(:files) do
+    desc 'Files managed by task, their digests are stored.'
+    defaultto []
+    munge do |value|
+      Array(value)
+    end
+  end
+
+  newparam(:packages) do
+    desc 'Packages installed by task, their versions are stored.'
+    defaultto []
+    munge do |value|
+      Array(value)
+    end
+  end
+
+end
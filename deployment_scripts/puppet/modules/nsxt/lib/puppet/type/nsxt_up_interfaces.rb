@@ -0,0 +1,28 @@
+Puppet::Type.newtype(:nsxt_up_interfaces) do
+
+  @doc = "Bring up VTEP interfaces of node at once and wait for their links."
+
+  ensurable
+
+  newparam(:name) do
+    isnamevar
+    desc 'Name of interface group.'
+  end
+
+  newparam(:interfaces) do
+    desc 'Names of interfaces.'
+    defaultto []
+    munge do |value|
+      Array(value)
+    end
+  end
+
+  newparam(:link_timeout) do
+    desc 'Seconds to wait until links of interfaces are up.'
+    defaultto 30
+    munge do |value|
+      Float(value)
+    end
+  end
+
+end
@@ -0,0 +1,141 @@
+require 'thread'
+require 'time'
+require 'uri'
+require File.join(File.dirname(__FILE__), 'session')
+require File.join(File.dirname(__FILE__), 'manager_selector')
+
+module PuppetX
+  module Nsxt
+    # Lets at most rate requests per second go out, bursts up to burst.
+    # Pause stops all requests until manager asked to come back.
+    class TokenBucket
+      attr_reader :rate, :burst
+
+      def initialize(rate, burst=nil)
+        @lock = Mutex.new
+        @paused_until = Time.at(0)
+        configure(rate, burst)
+        @tokens = @burst
+        @updated = Time.now
+      end
+
+      def configure(rate, burst=nil)
+        @lock.synchronize do
+          @rate = rate.to_f
+          @burst = (burst || [@rate, 1].max).to_f
+        end
+      end
+
+      # Blocks until request may be sent, returns seconds waited
+      def take
+        waited = 0.0
+        loop do
+          delay = @lock.synchronize do
+            now = Time.now
+            @tokens = [@tokens + (now - @updated) * @rate, @burst].min
+            @updated = now
+            if now < @paused_until
+              @paused_until - now
+            elsif @rate <= 0 or @tokens >= 1
+              @tokens -= 1 if @rate > 0
+              0
+            else
+              (1 - @tokens) / @rate
+            end
+          end
+          return waited if delay <= 0
+          sleep(delay)
+          waited += delay
+        end
+      end
+
+      def pause(seconds)
+        @lock.synchronize do
+          @paused_until = [@paused_until, Time.now + seconds].max
+        end
+      end
+    end
+
+    # Client side admission control for NSX-T manager API: token bucket per
+    # manager, jittered start of nodes that register at the same moment and
+    # backoff on 429/503 which honours Retry-After and holds off all
+    # requests of the process to that manager.
+    module Admission
+      # answers of overloaded manager
+      RETRY_CODES = [429, 503]
+
+      @buckets = {}
+      @lock = Mutex.new
+      @rate = 5
+      @burst = nil
+      @max_retries = 6
+      @base_delay = 1
+      @max_delay = 60
+
+      class << self
+        attr_accessor :max_retries, :base_delay, :max_delay
+        attr_reader :rate
+      end
+
+      # requests per second to each manager, 0 to not limit
+      def self.configure(rate, burst=nil)
+        @lock.synchronize do
+          @rate = rate
+          @burst = burst
+          @buckets.each_value { |bucket| bucket.configure(rate, burst) }
+        end
+      end
+
+      def self.bucket(manager)
+        key = PuppetX::Nsxt::ManagerSelector.key(manager)
+        @lock.synchronize { @buckets[key] ||= TokenBucket.new(@rate, @burst) }
+      end
+
+      # Sleeps random part of window, so that nodes started together reach
+      # manager spread over the window; returns seconds slept
+      def self.stagger(window)
+        delay = rand * window.to_f
+        sleep(delay) if delay > 0
+        delay
+      end
+
+      # Exponential backoff with full jitter
+      def self.backoff(attempt, base=@base_delay)
+        rand * [@max_delay, base * (2 ** attempt)].min
+      end
+
+      # Seconds from Retry-After header of HttpError, nil if there is none
+      def self.retry_after(error)
+        value = Array((error.headers || {})['retry-after']).first.to_s.strip
+        return nil if value.empty?
+        return value.to_i if value =~ /\A\d+\z/
+        [Time.httpdate(value) - Time.now, 0].max
+      rescue ArgumentError
+        nil
+      end
+
+      # Session.request admitted by manager bucket, retried on 429/503
+      def self.request(method, api_url, username, password, ca_file, payload=nil, timeout=5, headers={})
+        uri = URI.parse(api_url)
+        admit(bucket("#{uri.host}:#{uri.port}")) do
+          PuppetX::Nsxt::Session.request(method, api_url, username, password, ca_file, payload, timeout, headers)
+        end
+      end
+
+      # Runs block when bucket admits it, again after pause on 429/503
+      def self.admit(bucket)
+        attempt = 0
+        begin
+          bucket.take
+          yield
+        rescue PuppetX::Nsxt::HttpError => error
+          raise if not RETRY_CODES.include?(error.code) or attempt >= @max_retries
+          delay = retry_after(error) || backoff(attempt)
+          bucket.pause(delay)
+          attempt += 1
+          retry
+        end
+      end
+    end
+  end
+end
@@ -0,0 +1,148 @@
+require 'digest'
+require 'fileutils'
+require 'json'
+require 'net/http'
+require 'uri'
+require File.join(File.dirname(__FILE__), 'session')
+
+module PuppetX
+  module Nsxt
+    # Streams large files to disk in fixed-size chunks. Interrupted
+    # transfers leave '<path>.part' and '<path>.part.meta' with url, size
+    # and ETag (or Last-Modified) of resource. Part file is resumed with
+    # HTTP Range on the next attempt only if it was started from the same
+    # url, and If-Range makes server send whole resource if it changed
+    # since. Finished file is verified before it is renamed to final path.
+    module Downloader
+      CHUNK_SIZE = 1024 * 1024
+      ATTEMPTS = 3
+      DIGESTS = {
+        'md5'    => Digest::MD5,
+        'sha1'   => Digest::SHA1,
+        'sha256' => Digest::SHA256,
+      }
+
+      # checksum is {'algorithm' => 'sha256', 'value' => '<hex>'} or nil,
+      # returns {'size' => bytes, 'checksum' => checksum}
+      def self.fetch(url, path, checksum=nil, timeout=30)
+        FileUtils.mkdir_p(File.dirname(path))
+        part = "#{path}.part"
+        attempts = ATTEMPTS
+        begin
+          size = transfer(url, part, timeout)
+        rescue SystemCallError, IOError, Timeout::Error, PuppetX::Nsxt::HttpError
+          attempts -= 1
+          raise if attempts <= 0
+          sleep 5
+          retry
+        end
+        if not verify(part, checksum, size)
+          discard(part)
+          raise IOError, "Checksum mismatch for #{url}"
+        end
+        File.rename(part, path)
+        discard(part)
+        {'size' => size, 'checksum' => checksum}
+      end
+
+      # downloads url into part file resuming from its current size,
+      # returns full size of resource recorded when part file was started
+      def self.transfer(url, part, timeout)
+        uri = URI.parse(url)
+        meta = read_meta(part)
+        if meta.nil? or meta['url'] != url or meta['validator'].to_s.empty?
+          # part file of other or unknown resource can not be resumed
+          discard(part)
+        end
+        offset = File.exist?(part) ? File.size(part) : 0
+        http = Net::HTTP.new(uri.host, uri.port)
+        http.use_ssl = (uri.scheme == 'https')
+        http.verify_mode = OpenSSL::SSL::VERIFY_NONE if http.use_ssl?
+        http.open_timeout = timeout
+        http.read_timeout = timeout
+        http.start do
+          request = Net::HTTP::Get.new(uri.request_uri)
+          if offset > 0
+            request['Range'] = "bytes=#{offset}-"
+            request['If-Range'] = meta['validator']
+          end
+          http.request(request) do |response|
+            case response
+            when Net::HTTPPartialContent
+              if response['Content-Range'].to_s.split('/').last.to_i != meta['size']
+                discard(part)
+                raise IOError, "Size of #{url} changed, download it again"
+              end
+              mode = 'ab'
+            when Net::HTTPRequestedRangeNotSatisfiable
+              return offset if offset == meta['size']
+              discard(part)
+              raise IOError, "Partial download of #{url} does not match, download it again"
+            when Net::HTTPSuccess
+              # new download, resource changed since part file was
+              # started or server ignores Range
+              meta = {'url' => url, 'size' => response.content_length, 'validator' => validator(response)}
+              write_meta(part, meta)
+              mode = 'wb'
+            else
+              raise PuppetX::Nsxt::HttpError.new(response.code, response.body.to_s)
+            end
+            File.open(part, mode) do |file|
+              buffer = ''
+              response.read_body do |data|
+                buffer << data
+                if buffer.bytesize >= CHUNK_SIZE
+                  file.write(buffer)
+                  buffer = ''
+                end
+              end
+              file.write(buffer)
+            end
+          end
+        end
+        meta['size'] || File.size(part)
+      end
+
+      # strong ETag or Last-Modified of response for If-Range, nil if
+      # there is none
+      def self.validator(response)
+        etag = response['ETag'].to_s
+        return etag if not etag.empty? and not etag.start_with?('W/')
+        response['Last-Modified']
+      end
+
+      def self.discard(part)
+        [part, "#{part}.meta"].each { |file| File.delete(file) if File.exist?(file) }
+      end
+
+      def self.digest(path, algorithm)
+        digest = DIGESTS.fetch(algorithm.to_s.downcase).new
+        File.open(path, 'rb') do |file|
+          while data = file.read(CHUNK_SIZE)
+            digest.update(data)
+          end
+        end
+        digest.hexdigest
+      end
+
+      # checks checksum if known, otherwise size
+      def self.verify(path, checksum, size=nil)
+        return false if not File.file?(path)
+        if checksum
+          return digest(path, checksum['algorithm']) == checksum['value'].to_s.downcase
+        end
+        size.nil? or File.size(path) == size.to_i
+      end
+
+      def self.read_meta(path)
+        JSON.parse(File.read("#{path}.meta"))
+      rescue SystemCallError, JSON::ParserError
+        nil
+      end
+
+      def self.write_meta(path, meta)
+        File.open("#{path}.meta", 'w') { |file| file.write(meta.to_json) }
+      end
+    end
+  end
+end
@@ -0,0 +1,94 @@
+require 'digest'
+require 'fileutils'
+require 'json'
+
+module PuppetX
+  module Nsxt
+    # Stamps of converged deployment tasks. Stamp records digest of task
+    # input (settings) and state the task left on node: digests of files
+    # and versions of packages. Task is converged when its input and the
+    # state on node did not change since the stamp was written, e.g. on
+    # existing nodes when only new nodes are added to cluster.
+    module Fingerprint
+      @stamp_dir = '/var/lib/nsx-t'
+
+      class << self
+        attr_accessor :stamp_dir
+      end
+
+      # sha256 of data with keys of hashes sorted, so the same settings
+      # give the same digest regardless of order
+      def self.digest(data)
+        Digest::SHA256.hexdigest(canonical(data).to_json)
+      end
+
+      def self.canonical(data)
+        case data
+        when Hash
+          data.map { |key, value| [key.to_s, canonical(value)] }.sort_by(&:first)
+        when Array
+          data.map { |value| canonical(value) }
+        else
+          data
+        end
+      end
+
+      def self.path(task)
+        File.join(@stamp_dir, "#{task}.stamp")
+      end
+
+      def self.read(task)
+        JSON.parse(File.read(path(task)))
+      rescue SystemCallError, JSON::ParserError
+        nil
+      end
+
+      # file => sha256, nil for missing file
+      def self.file_digests(files)
+        Hash[Array(files).map do |file|
+          [file, File.file?(file) ? Digest::SHA256.file(file).hexdigest : nil]
+        end]
+      end
+
+      # package => installed version, nil for not installed package; all
+      # packages are queried with single dpkg-query
+      def self.package_versions(packages)
+        packages = Array(packages)
+        versions = Hash[packages.map { |package| [package, nil] }]
+        return versions if packages.empty?
+        begin
+          out = IO.popen(['dpkg-query', '-W', '-f', '${Package} ${Status} ${Version}\n', *packages], :err => File::NULL) { |io| io.read }
+        rescue SystemCallError
+          return versions
+        end
+        out.each_line do |line|
+          package, _want, _error, status, version = line.split
+          versions[package] = version if versions.has_key?(package) and status == 'installed'
+        end
+        versions
+      end
+
+      def self.state(files, packages)
+        {'files' => file_digests(files), 'packages' => package_versions(packages)}
+      end
+
+      def self.converged?(task, data, files=[], packages=[])
+        stamp = read(task)
+        return false if stamp.nil? or stamp['fingerprint'] != digest(data)
+        stamp['state'] == state(files, packages)
+      end
+
+      def self.write(task, data, files=[], packages=[])
+        FileUtils.mkdir_p(@stamp_dir)
+        stamp = {'fingerprint' => digest(data), 'state' => state(files, packages), 'time' => Time.now.to_i}
+        part = "#{path(task)}.part"
+        File.open(part, 'w') { |file| file.write(stamp.to_json) }
+        File.rename(part, path(task))
+      end
+
+      def self.remove(task)
+        File.delete(path(task)) if File.exist?(path(task))
+      end
+    end
+  end
+end
@@ -0,0 +1,50 @@
+require 'digest'
+require File.join(File.dirname(__FILE__), 'fingerprint')
+
+module PuppetX
+  module Nsxt
+    # Offline bundle of ruby gem packages, built by pre_build_hook from
+    # gem-bundle.lock. bundle.lock of bundle lists packages in install
+    # order, one per line: sha256 package version file.
+    module GemBundle
+      class ChecksumError < StandardError; end
+
+      LOCK = 'bundle.lock'
+
+      def self.present?(dir)
+        File.file?(File.join(dir, LOCK))
+      end
+
+      def self.lock(dir)
+        File.readlines(File.join(dir, LOCK)).map(&:strip).reject { |line| line.empty? or line.start_with?('#') }.map do |line|
+          sha256, package, version, file = line.split
+          {'sha256' => sha256, 'package' => package, 'version' => version, 'file' => File.join(dir, file)}
+        end
+      end
+
+      # Entries of lock, raises ChecksumError if any file is missing or
+      # does not match its checksum
+      def self.verify(dir)
+        entries = lock(dir)
+        bad = entries.reject do |entry|
+          File.file?(entry['file']) and Digest::SHA256.file(entry['file']).hexdigest == entry['sha256']
+        end
+        if not bad.empty?
+          raise ChecksumError, "Checksum mismatch in gem bundle #{dir}: #{bad.map { |entry| File.basename(entry['file']) }.join(', ')}"
+        end
+        entries
+      end
+
+      # Verified entries of packages which are not installed or installed
+      # in older version than in bundle
+      def self.pending(dir)
+        entries = verify(dir)
+        installed = Fingerprint.package_versions(entries.map { |entry| entry['package'] })
+        entries.select do |entry|
+          version = installed[entry['package']]
+          version.nil? or system('dpkg', '--compare-versions', entry['version'], 'gt', version)
+        end
+      end
+    end
+  end
+end
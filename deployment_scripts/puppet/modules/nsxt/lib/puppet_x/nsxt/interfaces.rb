@@ -0,0 +1,87 @@
+require 'thread'
+require File.join(File.dirname(__FILE__), 'waiter')
+
+module PuppetX
+  module Nsxt
+    # Network interfaces of VTEPs: ifupdown stanza of every interface, all
+    # interfaces are brought up at once and link state is read from sysfs.
+    module Interfaces
+      @config_dir = '/etc/network/interfaces.d'
+      @sysfs = '/sys/class/net'
+      @ifup = 'ifup'
+      @ifdown = 'ifdown'
+
+      class << self
+        attr_accessor :config_dir, :sysfs, :ifup, :ifdown
+      end
+
+      def self.stanza(name)
+        "auto #{name}\niface #{name} inet manual"
+      end
+
+      def self.config_path(name)
+        File.join(@config_dir, "ifcfg-#{name}")
+      end
+
+      def self.stanza_written?(name)
+        File.file?(config_path(name)) and File.read(config_path(name)) == stanza(name)
+      end
+
+      # Writes stanzas which differ, returns names of written ones
+      def self.write_stanzas(names)
+        names.reject { |name| stanza_written?(name) }.each do |name|
+          File.open(config_path(name), 'w', 0644) { |file| file.write(stanza(name)) }
+        end
+      end
+
+      def self.remove_stanzas(names)
+        names.each { |name| File.delete(config_path(name)) if File.exist?(config_path(name)) }
+      end
+
+      # operstate of interface, 'absent' if there is no such interface
+      def self.operstate(name)
+        File.read(File.join(@sysfs, name, 'operstate')).strip
+      rescue SystemCallError
+        'absent'
+      end
+
+      # interface is administratively up (IFF_UP)
+      def self.admin_up?(name)
+        File.read(File.join(@sysfs, name, 'flags')).strip.hex & 1 == 1
+      rescue SystemCallError
+        false
+      end
+
+      def self.link_up?(name)
+        operstate(name) == 'up'
+      end
+
+      # Runs command for every interface in parallel, returns
+      # name => [exit status, output]
+      def self.run_all(command, names)
+        threads = names.map do |name|
+          Thread.new do
+            output = IO.popen([command, name, :err => [:child, :out]]) { |io| io.read }
+            [name, [$?.exitstatus, output]]
+          end
+        end
+        Hash[threads.map(&:value)]
+      end
+
+      def self.bring_up(names)
+        run_all(@ifup, names)
+      end
+
+      def self.bring_down(names)
+        run_all(@ifdown, names)
+      end
+
+      # Waits until link of every interface is up, returns names of those
+      # which are still down at deadline
+      def self.wait_link(names, deadline)
+        Waiter.new(deadline, 0.1, 1).wait { names.all? { |name| link_up?(name) } }
+        names.reject { |name| link_up?(name) }
+      end
+    end
+  end
+end
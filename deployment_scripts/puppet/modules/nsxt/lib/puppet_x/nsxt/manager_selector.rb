@@ -0,0 +1,92 @@
+require 'thread'
+require 'uri'
+require File.join(File.dirname(__FILE__), 'session')
+
+module PuppetX
+  module Nsxt
+    # Probes all configured NSX-T managers at once and returns them fastest
+    # healthy first, so that a dead manager does not cost connect timeouts
+    # and retries before the next one is tried.
+    module ManagerSelector
+      # seconds while probe result is considered fresh
+      TTL = 30
+      PROBE_PATH = '/api/v1/node'
+
+      @health = {}
+      @lock = Mutex.new
+
+      # 'https://host:port', 'host:port' or 'host' => 'host:port'
+      def self.key(manager)
+        manager.to_s.strip =~ /(https?:\/\/)?(?<host>[^:\/]+):?(?<port>\d+)?/
+        port = Regexp.last_match[:port]
+        port = 443 if port.to_s.empty?
+        "#{Regexp.last_match[:host]}:#{port}"
+      end
+
+      # Returns healthy managers ordered by probe latency; when no manager
+      # answered, returns all managers in configured order
+      def self.ordered(managers, username, password, ca_file, timeout=3)
+        managers = Array(managers)
+        stale = managers.select { |manager| stale?(manager) }
+        probe(stale, username, password, ca_file, timeout) unless stale.empty?
+        healthy = managers.select { |manager| healthy?(manager) }
+        return managers if healthy.empty?
+        healthy.sort_by { |manager| [status(manager)['latency'], managers.index(manager)] }
+      end
+
+      def self.probe(managers, username, password, ca_file, timeout=3)
+        threads = managers.map do |manager|
+          Thread.new do
+            started = Time.now
+            begin
+              PuppetX::Nsxt::Session.request(:get, "https://#{key(manager)}#{PROBE_PATH}", username, password, ca_file, nil, timeout)
+              healthy = true
+            rescue PuppetX::Nsxt::HttpError => error
+              # manager answers, but request is not allowed (e.g. bad credentials)
+              healthy = error.code < 500
+            rescue StandardError, Timeout::Error
+              healthy = false
+            end
+            update(manager, healthy, Time.now - started)
+          end
+        end
+        threads.each { |thread| thread.join(timeout * 2) }
+      end
+
+      def self.mark_failed(manager)
+        update(manager, false, nil)
+      end
+
+      def self.mark_failed_url(api_url)
+        uri = URI.parse(api_url)
+        mark_failed("#{uri.host}:#{uri.port}")
+      rescue URI::InvalidURIError
+        nil
+      end
+
+      def self.status(manager)
+        @lock.synchronize { @health[key(manager)] }
+      end
+
+      def self.healthy?(manager)
+        state = status(manager)
+        (not state.nil?) and state['healthy']
+      end
+
+      def self.stale?(manager)
+        state = status(manager)
+        state.nil? or (Time.now - state['checked_at']) > TTL
+      end
+
+      def self.update(manager, healthy, latency)
+        @lock.synchronize do
+          @health[key(manager)] = {'healthy' => healthy, 'latency' => latency.to_f, 'checked_at' => Time.now}
+        end
+      end
+
+      def self.reset
+        @lock.synchronize { @health.clear }
+      end
+    end
+  end
+end
@@ -0,0 +1,173 @@
+require 'net/http'
+require 'net/https'
+require 'openssl'
+require 'socket'
+require 'thread'
+require 'uri'
+require File.join(File.dirname(__FILE__), 'waiter')
+
+module PuppetX
+  module Nsxt
+    # Stats socket of haproxy. Disable/enable server need admin level of
+    # socket, show stat works on any level.
+    class HaproxySocket
+      def initialize(path)
+        @path = path
+      end
+
+      def command(line)
+        UNIXSocket.open(@path) do |socket|
+          socket.write("#{line}\n")
+          socket.read.to_s
+        end
+      end
+
+      # Puts server to maintenance, false if socket does not allow it
+      def disable(backend, server)
+        admin("disable server #{backend}/#{server}")
+      end
+
+      def enable(backend, server)
+        admin("enable server #{backend}/#{server}")
+      end
+
+      # Row of 'show stat' for server, nil if there is none
+      def stat(backend, server)
+        lines = command('show stat').lines.map(&:strip).reject(&:empty?)
+        header = lines.shift.to_s.sub(/\A#\s*/, '').split(',')
+        lines.each do |line|
+          row = Hash[header.zip(line.split(',', -1))]
+          return row if row['pxname'] == backend and row['svname'] == server
+        end
+        nil
+      rescue SystemCallError
+        nil
+      end
+
+      private
+
+      def admin(line)
+        command(line).strip.empty?
+      rescue SystemCallError
+        false
+      end
+    end
+
+    # Samples url in background thread and measures time it did not answer:
+    # every failed sample counts from itself to the next answered one
+    class AvailabilityProbe
+      attr_reader :samples, :failures, :unavailable
+
+      def initialize(url, interval=0.5, timeout=2)
+        @url = url
+        @interval = interval.to_f
+        @timeout = timeout
+        @samples = 0
+        @failures = 0
+        @unavailable = 0.0
+        @stop = false
+      end
+
+      def start
+        @thread = Thread.new do
+          failed_at = nil
+          until @stop
+            sampled_at = Time.now
+            if RollingRestart.healthy?(@url, @timeout)
+              @unavailable += sampled_at - failed_at if failed_at
+              failed_at = nil
+            else
+              @failures += 1
+              failed_at ||= sampled_at
+            end
+            @samples += 1
+            sleep([@interval - (Time.now - sampled_at), 0].max)
+          end
+          @unavailable += Time.now - failed_at if failed_at
+        end
+        self
+      end
+
+      def stop
+        @stop = true
+        @thread.join if @thread
+        self
+      end
+    end
+
+    # Restart of service on one node behind haproxy VIP: node is put to
+    # maintenance in haproxy backend and drained, service is restarted,
+    # node comes back to backend only when health url answers and haproxy
+    # sees it up. Time service did not answer on node and time API did not
+    # answer on VIP are measured.
+    module RollingRestart
+      # true if url answers 2xx or 3xx within timeout
+      def self.healthy?(url, timeout=2)
+        uri = URI.parse(url)
+        http = Net::HTTP.new(uri.host, uri.port)
+        http.open_timeout = timeout
+        http.read_timeout = timeout
+        if uri.scheme == 'https'
+          http.use_ssl = true
+          # only availability is probed
+          http.verify_mode = OpenSSL::SSL::VERIFY_NONE
+        end
+        code = http.start { |connection| connection.request(Net::HTTP::Get.new(uri.request_uri)).code.to_i }
+        code >= 200 and code < 400
+      rescue StandardError, Timeout::Error
+        false
+      end
+
+      # Yields to restart service, returns report:
+      #   drained         - node was put to maintenance before restart
+      #   healthy         - health url answered before timeout
+      #   unavailable     - seconds from restart until health url answered
+      #   vip_unavailable - seconds vip url did not answer during restart
+      def self.run(options)
+        options = {'interval' => 0.5, 'timeout' => 300, 'drain_timeout' => 30}.merge(options)
+        backend, server = options['backend'], options['server']
+        haproxy = HaproxySocket.new(options['haproxy_socket']) if not options['haproxy_socket'].to_s.empty?
+        report = {'server' => server, 'drained' => false, 'drain' => 0.0, 'vip_probes' => 0, 'vip_failures' => 0,
+                  'vip_unavailable' => 0.0, 'time' => Time.now.to_i}
+
+        if haproxy and haproxy.disable(backend, server)
+          report['drained'] = true
+          waiter = Waiter.new(options['drain_timeout'], 0.2, 1)
+          waiter.wait do
+            stat = haproxy.stat(backend, server)
+            stat.nil? or stat['scur'].to_i == 0
+          end
+          report['drain'] = waiter.elapsed.round(3)
+        end
+
+        probe = AvailabilityProbe.new(options['vip_url'], options['interval']).start if not options['vip_url'].to_s.empty?
+        begin
+          begin
+            started = Time.now
+            yield
+            waiter = Waiter.new(options['timeout'], options['interval'], options['interval'])
+            report['healthy'] = waiter.wait { healthy?(options['health_url']) }
+            report['unavailable'] = (Time.now - started).round(3)
+          ensure
+            haproxy.enable(backend, server) if report['drained']
+          end
+          if haproxy and report['healthy']
+            # next node may go down only when haproxy sends requests here
+            Waiter.new(options['timeout'], options['interval'], options['interval']).wait do
+              stat = haproxy.stat(backend, server)
+              stat.nil? or stat['status'].to_s.start_with?('UP')
+            end
+          end
+        ensure
+          probe.stop if probe
+        end
+        if probe
+          report['vip_probes'] = probe.samples
+          report['vip_failures'] = probe.failures
+          report['vip_unavailable'] = probe.unavailable.round(3)
+        end
+        report
+      end
+    end
+  end
+end
@@ -0,0 +1,32 @@
+require 'thread'
+
+module PuppetX
+  module Nsxt
+    # Memoization for the life of puppet run (one process per deployment
+    # task) of values which are expensive to get: nsxcli spawns, TLS
+    # handshakes. Empty values are not cached.
+    module RunCache
+      @values = {}
+      @lock = Mutex.new
+
+      def self.fetch(key)
+        @lock.synchronize do
+          return @values[key] if @values.has_key?(key)
+        end
+        value = yield
+        if not value.to_s.empty?
+          @lock.synchronize { @values[key] = value }
+        end
+        value
+      end
+
+      def self.invalidate(key)
+        @lock.synchronize { @values.delete(key) }
+      end
+
+      def self.clear
+        @lock.synchronize { @values.clear }
+      end
+    end
+  end
+end
@@ -0,0 +1,223 @@
+require 'json'
+require 'net/http'
+require 'net/https'
+require 'openssl'
+require 'thread'
+require 'uri'
+
+module PuppetX
+  module Nsxt
+    # Raised for non 2xx answers, mimics RestClient exception interface
+    # (error.response returns body) used by callers for error_message parsing
+    class HttpError < StandardError
+      attr_reader :code, :response, :headers
+
+      def initialize(code, response, headers={})
+        @code = code.to_i
+        @response = response.to_s
+        @headers = headers
+        super("#{@code} #{response_status}")
+      end
+
+      def response_status
+        Net::HTTPResponse::CODE_TO_OBJ.fetch(@code.to_s, Net::HTTPResponse).name.split('::').last
+      end
+    end
+
+    # Net::HTTP connection that reports every TCP+TLS handshake to its pool
+    # and resumes TLS session obtained by any other connection of the pool
+    class Connection < Net::HTTP
+      attr_accessor :pool
+
+      private
+
+      def connect
+        @ssl_session ||= pool.ssl_session if use_ssl? and pool
+        super
+        if pool
+          pool.ssl_session = @ssl_session if use_ssl?
+          resumed = (use_ssl? and @socket.io.respond_to?(:session_reused?) and @socket.io.session_reused?)
+          pool.handshake(resumed)
+        end
+      end
+    end
+
+    # Bounded set of keep-alive connections to single NSX-T manager
+    class SessionPool
+      attr_reader :host, :port, :max_connections, :handshakes, :resumed_handshakes, :requests
+      attr_accessor :ssl_session
+
+      def initialize(host, port, ca_file, max_connections=4, keep_alive_timeout=30)
+        @host = host
+        @port = port.to_i
+        @ca_file = ca_file.to_s
+        @max_connections = max_connections
+        @keep_alive_timeout = keep_alive_timeout
+        @idle = []
+        @created = 0
+        @handshakes = 0
+        @resumed_handshakes = 0
+        @requests = 0
+        @ssl_session = nil
+        @lock = Mutex.new
+        @released = ConditionVariable.new
+      end
+
+      def handshake(resumed)
+        @lock.synchronize do
+          @handshakes += 1
+          @resumed_handshakes += 1 if resumed
+        end
+      end
+
+      def with_connection(timeout)
+        http = checkout
+        begin
+          http.open_timeout = timeout
+          http.read_timeout = timeout
+          http.start unless http.started?
+          result = yield http
+        rescue Exception
+          # connection state is unknown, do not return it to the pool
+          discard(http)
+          raise
+        end
+        checkin(http)
+        result
+      end
+
+      def close
+        @lock.synchronize do
+          @idle.each { |http| http.finish rescue nil }
+          @idle.clear
+        end
+      end
+
+      private
+
+      def checkout
+        @lock.synchronize do
+          @requests += 1
+          loop do
+            return @idle.pop unless @idle.empty?
+            if @created < @max_connections
+              @created += 1
+              return new_connection
+            end
+            @released.wait(@lock)
+          end
+        end
+      end
+
+      def checkin(http)
+        @lock.synchronize do
+          @idle.push(http)
+          @released.signal
+        end
+      end
+
+      # closes connection and frees its slot for a new one
+      def discard(http)
+        http.finish rescue nil
+        @lock.synchronize do
+          @created -= 1
+          @released.signal
+        end
+      end
+
+      def new_connection
+        http = Connection.new(@host, @port)
+        http.pool = self
+        http.use_ssl = true
+        http.keep_alive_timeout = @keep_alive_timeout
+        if @ca_file.empty?
+          http.verify_mode = OpenSSL::SSL::VERIFY_NONE
+        else
+          http.verify_mode = OpenSSL::SSL::VERIFY_PEER
+          http.ca_file = @ca_file
+        end
+        http
+      end
+    end
+
+    # Per process registry of manager sessions shared by providers and parser
+    # functions, so that all API calls of puppet run reuse same connections
+    module Session
+      METHODS = {
+        :get    => Net::HTTP::Get,
+        :post   => Net::HTTP::Post,
+        :put    => Net::HTTP::Put,
+        :delete => Net::HTTP::Delete,
+      }
+
+      @pools = {}
+      @lock = Mutex.new
+      @max_connections = 4
+
+      class << self
+        attr_accessor :max_connections
+      end
+
+      def self.pool(host, port, ca_file)
+        key = "#{host}:#{port}:#{ca_file}"
+        @lock.synchronize do
+          @pools[key] ||= SessionPool.new(host, port, ca_file, @max_connections)
+        end
+      end
+
+      def self.pools
+        @lock.synchronize { @pools.values }
+      end
+
+      # Executes request on persistent connection, returns Net::HTTPResponse,
+      # raises HttpError if response code is not 2xx
+      def self.request(method, api_url, username, password, ca_file, payload=nil, timeout=5, headers={})
+        uri = URI.parse(api_url)
+        request = METHODS.fetch(method.to_s.downcase.to_sym).new(uri.request_uri)
+        request.basic_auth(username, password) if username
+        request['Accept'] = 'application/json'
+        headers.each { |name, value| request[name] = value }
+        if payload
+          request['Content-Type'] ||= 'application/json'
+          request.body = payload
+        end
+        response = pool(uri.host, uri.port, ca_file).with_connection(timeout) do |http|
+          http.request(request)
+        end
+        if not response.is_a?(Net::HTTPSuccess)
+          raise HttpError.new(response.code, response.body, response.to_hash)
+        end
+        response
+      end
+
+      # error_message of NSX-T API error body, the body itself if it is
+      # not JSON, empty string for errors without response
+      def self.error_message(error)
+        return '' if not error.respond_to?(:response)
+        JSON.parse(error.response.to_s)['error_message']
+      rescue JSON::ParserError
+        error.response.to_s
+      end
+
+      def self.handshakes
+        pools.inject(0) { |sum, pool| sum + pool.handshakes }
+      end
+
+      def self.stats
+        pools.map do |pool|
+          {'manager' => "#{pool.host}:#{pool.port}",
+           'requests' => pool.requests,
+           'handshakes' => pool.handshakes,
+           'resumed_handshakes' => pool.resumed_handshakes}
+        end
+      end
+
+      def self.close_all
+        @lock.synchronize do
+          @pools.each_value { |pool| pool.close }
+          @pools.clear
+        end
+      end
+    end
+  end
+end
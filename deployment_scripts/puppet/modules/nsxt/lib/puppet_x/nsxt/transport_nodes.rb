@@ -0,0 +1,59 @@
+require 'json'
+require 'thread'
+require 'uri'
+require File.join(File.dirname(__FILE__), 'admission')
+
+module PuppetX
+  module Nsxt
+    # Lookup of transport nodes by fabric node id. Asks manager to filter
+    # by node_id and follows pagination cursor page by page, so only one
+    # page is held in memory and nodes beyond the first page are found
+    # also on managers that ignore the filter.
+    module TransportNodes
+      PAGE_SIZE = 1000
+
+      # node_id => transport node id, kept for the life of puppet run
+      @ids = {}
+      @lock = Mutex.new
+
+      # Yields every page ('results' array) of transport nodes collection
+      def self.each_page(manager, username, password, ca_file, query={}, timeout=5)
+        cursor = nil
+        loop do
+          params = query.merge('page_size' => PAGE_SIZE)
+          params['cursor'] = cursor if cursor
+          api_url = "https://#{manager}/api/v1/transport-nodes?#{URI.encode_www_form(params)}"
+          response = PuppetX::Nsxt::Admission.request(:get, api_url, username, password, ca_file, nil, timeout)
+          page = JSON.parse(response.body)
+          yield page['results'] || []
+          cursor = page['cursor']
+          break if cursor.to_s.empty?
+        end
+      end
+
+      # Returns transport node id for fabric node or nil if node not found
+      def self.find_id(manager, node_id, username, password, ca_file, timeout=5)
+        cached = @lock.synchronize { @ids[node_id] }
+        return cached if cached
+        each_page(manager, username, password, ca_file, {'node_id' => node_id}, timeout) do |nodes|
+          nodes.each do |node|
+            # filter may be ignored by manager, so compare anyway
+            if node['node_id'] == node_id
+              remember(node_id, node['id'])
+              return node['id']
+            end
+          end
+        end
+        nil
+      end
+
+      def self.remember(node_id, transport_node_id)
+        @lock.synchronize { @ids[node_id] = transport_node_id }
+      end
+
+      def self.forget(node_id)
+        @lock.synchronize { @ids.delete(node_id) }
+      end
+    end
+  end
+end
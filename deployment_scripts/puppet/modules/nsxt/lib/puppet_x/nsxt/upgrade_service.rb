@@ -0,0 +1,99 @@
+require 'json'
+require 'thread'
+require File.join(File.dirname(__FILE__), 'session')
+require File.join(File.dirname(__FILE__), 'manager_selector')
+
+module PuppetX
+  module Nsxt
+    # Reference counted access to install-upgrade service of NSX-T manager,
+    # which serves host components. The first holder enables the service,
+    # other holders share it, the last holder disables it.
+    #
+    # Deployment tasks run on many nodes at once, so the node-wide counter
+    # is complemented by deployment graph: nodes acquire the service and
+    # release it with disable=false, nsx-t-disable-upgrade-service task runs
+    # after nsx-t-create-repo finished on all nodes and disables it.
+    module UpgradeService
+      SERVICE_PATH = '/api/v1/node/services/install-upgrade'
+
+      @holders = Hash.new(0)
+      @enabled_on = {}
+      @lock = Mutex.new
+
+      # Returns address of manager on which service is running, block
+      # form releases service when block returns
+      def self.acquire(manager, username, password, disable=true)
+        key = PuppetX::Nsxt::ManagerSelector.key(manager)
+        @lock.synchronize do
+          if @holders[key] == 0
+            @enabled_on[key] = start(manager, username, password)
+          end
+          @holders[key] += 1
+        end
+        return @enabled_on[key] if not block_given?
+        begin
+          yield @enabled_on[key]
+        ensure
+          release(manager, username, password, disable)
+        end
+      end
+
+      def self.release(manager, username, password, disable=true)
+        key = PuppetX::Nsxt::ManagerSelector.key(manager)
+        @lock.synchronize do
+          return if @holders[key] == 0
+          @holders[key] -= 1
+          return if @holders[key] > 0
+          @enabled_on.delete(key)
+          disable(manager, username, password) if disable
+        end
+      end
+
+      def self.holders(manager)
+        @lock.synchronize { @holders[PuppetX::Nsxt::ManagerSelector.key(manager)] }
+      end
+
+      # enable service if it is disabled or not running, concurrent enable
+      # from other nodes is harmless
+      def self.start(manager, username, password)
+        enabled_on = enabled_on(manager, username, password)
+        enabled_on = enable(manager, username, password) if enabled_on.nil?
+        return enabled_on if running?(enabled_on, username, password)
+        enabled_on = enable(enabled_on, username, password)
+        return enabled_on if running?(enabled_on, username, password)
+        raise PuppetX::Nsxt::HttpError.new(503, "install-upgrade service is not running on #{enabled_on}")
+      end
+
+      # manager on which service is enabled, nil if disabled
+      def self.enabled_on(manager, username, password)
+        properties = api(:get, manager, SERVICE_PATH, username, password)['service_properties']
+        properties['enabled'] == true ? properties['enabled_on'] : nil
+      end
+
+      def self.running?(manager, username, password)
+        api(:get, manager, "#{SERVICE_PATH}/status", username, password)['runtime_state'] == 'running'
+      end
+
+      def self.enable(manager, username, password)
+        request = {'service_name' => 'install-upgrade', 'service_properties' => {'enabled' => true}}
+        properties = api(:put, manager, SERVICE_PATH, username, password, request)['service_properties']
+        return properties['enabled_on'] if properties['enabled'] == true
+        raise PuppetX::Nsxt::HttpError.new(500, "Cannot enable install-upgrade service on #{manager}")
+      end
+
+      def self.disable(manager, username, password)
+        request = {'service_name' => 'install-upgrade', 'service_properties' => {'enabled' => false}}
+        properties = api(:put, manager, SERVICE_PATH, username, password, request)['service_properties']
+        return true if properties['enabled'] == false
+        raise PuppetX::Nsxt::HttpError.new(500, "Cannot disable install-upgrade service on #{manager}")
+      end
+
+      def self.api(method, manager, path, username, password, request=nil, timeout=5)
+        api_url = "https://#{PuppetX::Nsxt::ManagerSelector.key(manager)}#{path}"
+        payload = request.nil? ? nil : request.to_json
+        response = PuppetX::Nsxt::Session.request(method, api_url, username, password, '', payload, timeout)
+        JSON.parse(response.body)
+      end
+    end
+  end
+end
@@ -0,0 +1,150 @@
+require 'json'
+require 'thread'
+require File.join(File.dirname(__FILE__), 'session')
+require File.join(File.dirname(__FILE__), 'manager_selector')
+
+module PuppetX
+  module Nsxt
+    # Checks NSX-T objects referenced by plugin settings before deployment.
+    # All objects are read in one concurrent pass, so bad settings fail in
+    # seconds instead of when nodes are registered as transport nodes.
+    module Validator
+      # setting => [collection path, object description]
+      OBJECTS = {
+        'default_overlay_tz_uuid'   => ['/api/v1/transport-zones', 'overlay transport zone'],
+        'default_vlan_tz_uuid'      => ['/api/v1/transport-zones', 'VLAN transport zone'],
+        'default_tier0_router_uuid' => ['/api/v1/logical-routers', 'tier-0 router'],
+        'default_edge_cluster_uuid' => ['/api/v1/edge-clusters', 'edge cluster'],
+        'uplink_profile_uuid'       => ['/api/v1/host-switch-profiles', 'uplink profile'],
+        'controller_ip_pool_uuid'   => ['/api/v1/pools/ip-pools', 'controller IP pool'],
+        'compute_ip_pool_uuid'      => ['/api/v1/pools/ip-pools', 'compute IP pool'],
+      }
+
+      # setting => [field, expected value]
+      TYPES = {
+        'default_overlay_tz_uuid'   => ['transport_type', 'OVERLAY'],
+        'default_vlan_tz_uuid'      => ['transport_type', 'VLAN'],
+        'default_tier0_router_uuid' => ['router_type', 'TIER0'],
+        'default_edge_cluster_uuid' => ['resource_type', 'EdgeCluster'],
+        'uplink_profile_uuid'       => ['resource_type', 'UplinkHostSwitchProfile'],
+        'controller_ip_pool_uuid'   => ['resource_type', 'IpPool'],
+        'compute_ip_pool_uuid'      => ['resource_type', 'IpPool'],
+      }
+
+      # role => [IP pool setting, pnics pairs setting]
+      ROLES = {
+        'controller' => ['controller_ip_pool_uuid', 'controller_pnics_pairs'],
+        'compute'    => ['compute_ip_pool_uuid', 'compute_pnics_pairs'],
+      }
+
+      # Returns list of errors, empty when settings are valid
+      #   settings - hash of plugin settings
+      #   node_counts - role => number of nodes registered as transport nodes
+      def self.validate(settings, node_counts, managers, username, password, ca_file='', timeout=5)
+        # one connection per object, pools are created by the first request
+        if PuppetX::Nsxt::Session.max_connections < OBJECTS.size
+          PuppetX::Nsxt::Session.max_connections = OBJECTS.size
+        end
+        managers = PuppetX::Nsxt::ManagerSelector.ordered(managers, username, password, ca_file, timeout)
+        objects = fetch(settings, managers, username, password, ca_file, timeout)
+        errors = []
+        OBJECTS.keys.sort.each do |setting|
+          errors.push(*check_object(setting, settings[setting], objects[setting]))
+        end
+        ROLES.keys.sort.each do |role|
+          pool_setting, pnics_setting = ROLES[role]
+          count = node_counts[role].to_i
+          next if count == 0
+          errors.push(*check_pool(pool_setting, objects[pool_setting], count))
+          errors.push(*check_pnics(pnics_setting, settings[pnics_setting], objects['uplink_profile_uuid']))
+        end
+        errors
+      end
+
+      # Reads all referenced objects at once, returns setting => object,
+      # or error message if object cannot be read
+      def self.fetch(settings, managers, username, password, ca_file, timeout)
+        objects = {}
+        lock = Mutex.new
+        threads = OBJECTS.map do |setting, (path, _)|
+          Thread.new do
+            result = get_object("#{path}/#{settings[setting].to_s.strip}", managers, username, password, ca_file, timeout)
+            lock.synchronize { objects[setting] = result }
+          end
+        end
+        threads.each(&:join)
+        objects
+      end
+
+      def self.get_object(path, managers, username, password, ca_file, timeout)
+        error = 'no nsx-t manager answered'
+        managers.each do |manager|
+          api_url = "https://#{PuppetX::Nsxt::ManagerSelector.key(manager)}#{path}"
+          begin
+            response = PuppetX::Nsxt::Session.request(:get, api_url, username, password, ca_file, nil, timeout)
+            return JSON.parse(response.body)
+          rescue PuppetX::Nsxt::HttpError => http_error
+            return 'does not exist' if http_error.code == 404
+            return "cannot be read: #{http_error.message} #{http_error.response}" if http_error.code < 500
+            error = "cannot be read: #{http_error.message}"
+          rescue StandardError, Timeout::Error => connection_error
+            PuppetX::Nsxt::ManagerSelector.mark_failed(manager)
+            error = "cannot be read from #{manager}: #{connection_error.message}"
+          end
+        end
+        error
+      end
+
+      def self.check_object(setting, id, object)
+        name = OBJECTS[setting][1]
+        return ["#{setting}: #{name} '#{id}' #{object}"] if object.is_a?(String)
+        field, expected = TYPES[setting]
+        if object[field] != expected
+          return ["#{setting}: '#{id}' is not #{name}, #{field} is '#{object[field]}'"]
+        end
+        if setting =~ /_tz_uuid$/ and object['host_switch_name'].to_s.empty?
+          return ["#{setting}: #{name} '#{id}' has no host_switch_name"]
+        end
+        []
+      end
+
+      def self.check_pool(setting, pool, count)
+        return [] if not pool.is_a?(Hash) or pool['resource_type'] != 'IpPool'
+        usage = pool['pool_usage'] || {}
+        total = usage['total_ids'].to_i
+        return [] if total >= count
+        ["#{setting}: IP pool '#{pool['id']}' has #{total} addresses for #{count} nodes"]
+      end
+
+      # Returns [pnic, uplink] pairs of 'pnic:uplink' lines
+      def self.pnics_pairs(pnics)
+        pnics.to_s.each_line.map { |line| line.strip }.reject(&:empty?).map do |line|
+          line.split(':', 2).map(&:strip)
+        end
+      end
+
+      def self.check_pnics(setting, pnics, profile)
+        errors = []
+        pairs = pnics_pairs(pnics)
+        return ["#{setting}: no pnic pairs"] if pairs.empty?
+        pairs.each do |pnic, uplink|
+          errors << "#{setting}: '#{pnic}' is not 'pnic:uplink' pair" if uplink.to_s.empty? or pnic.empty?
+        end
+        [0, 1].each do |column|
+          names = pairs.map { |pair| pair[column] }.compact
+          names.select { |name| names.count(name) > 1 }.uniq.each do |name|
+            errors << "#{setting}: '#{name}' is used more than once"
+          end
+        end
+        return errors if not profile.is_a?(Hash) or profile['resource_type'] != 'UplinkHostSwitchProfile'
+        teaming = profile['teaming'] || {}
+        uplinks = (Array(teaming['active_list']) + Array(teaming['standby_list'])).map { |uplink| uplink['uplink_name'] }
+        pairs.each do |pnic, uplink|
+          next if uplink.to_s.empty? or uplinks.include?(uplink)
+          errors << "#{setting}: uplink '#{uplink}' of '#{pnic}' is not in uplink profile '#{profile['id']}' (#{uplinks.join(', ')})"
+        end
+        errors
+      end
+    end
+  end
+end
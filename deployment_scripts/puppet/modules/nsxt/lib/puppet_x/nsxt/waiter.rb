@@ -0,0 +1,37 @@
+module PuppetX
+  module Nsxt
+    # Polls condition with fast first, exponentially growing delay until it
+    # is true or deadline expires. Converged objects are noticed within a
+    # second, slow ones are polled at most every max_delay seconds.
+    class Waiter
+      attr_reader :deadline, :attempts, :elapsed
+
+      def initialize(deadline=180, initial_delay=1, max_delay=15, factor=2)
+        @deadline = deadline.to_f
+        @initial_delay = initial_delay.to_f
+        @max_delay = max_delay.to_f
+        @factor = factor.to_f
+        @attempts = 0
+        @elapsed = 0.0
+      end
+
+      # Yields until block returns true, returns true if condition was met
+      # before deadline, false otherwise
+      def wait
+        started = Time.now
+        delay = @initial_delay
+        @attempts = 0
+        loop do
+          @attempts += 1
+          converged = yield
+          @elapsed = Time.now - started
+          return true if converged
+          remaining = @deadline - @elapsed
+          return false if remaining <= 0
+          sleep([delay, remaining].min)
+          delay = [delay * @factor, @max_delay].min
+        end
+      end
+    end
+  end
+end
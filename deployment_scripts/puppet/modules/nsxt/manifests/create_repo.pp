@@ -5,8 +5,9 @@ class nsxt::create_repo (
   $repo_dir       = '/opt/nsx-t-repo',
   $repo_file      = '/etc/apt/sources.list.d/nsx-t-local.list',
   $repo_pref_file = '/etc/apt/preferences.d/nsx-t-local.pref',
+  $cache_dir      = '/tmp',
 ) {
-  $component_archive = get_nsxt_components($managers, $username, $password)
+  $component_archive = get_nsxt_components($managers, $username, $password, $cache_dir)
 
   file { '/tmp/create_repo.sh':
     ensure  => file,
@@ -26,10 +27,15 @@ class nsxt::create_repo (
     source  => "puppet:///modules/${module_name}/pinning",
     replace => true,
   }
+  # apt-ftparchive caches package index, pigz compresses on all cores
+  package { ['apt-utils', 'pigz']:
+    ensure => present,
+  }
   exec { 'Create repo':
     path     => '/usr/sbin:/usr/bin:/sbin:/bin',
-    command  => "/tmp/create_repo.sh ${repo_dir} ${component_archive}",
+    command  => "/tmp/create_repo.sh ${repo_dir} ${component_archive} ${repo_file}",
     provider => 'shell',
-    require  => File['/tmp/create_repo.sh'],
+    unless   => "test -f ${repo_dir}/Packages.gz && test \"\$(sha256sum ${component_archive} | cut -d' ' -f1)\" = \"\$(cat ${repo_dir}/.archive.sha256 2>/dev/null)\"",
+    require  => [File['/tmp/create_repo.sh'], File[$repo_file], File[$repo_pref_file], Package['apt-utils', 'pigz']],
   }
 }
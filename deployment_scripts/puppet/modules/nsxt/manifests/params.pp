@@ -5,4 +5,6 @@ class nsxt::params {
   $core_plugin        = 'vmware_nsx.plugin.NsxV3Plugin'
   $nsx_plugin_dir     = '/etc/neutron/plugins/vmware'
   $nsx_plugin_config  = '/etc/neutron/plugins/vmware/nsx.ini'
+  $repo_port          = '8091'
+  $haproxy_socket     = '/var/lib/haproxy/stats'
 }
@@ -0,0 +1,26 @@
+class nsxt::remote_repo (
+  $repo_url,
+  $repo_file      = '/etc/apt/sources.list.d/nsx-t-local.list',
+  $repo_pref_file = '/etc/apt/preferences.d/nsx-t-local.pref',
+) {
+  file { $repo_file:
+    ensure  => file,
+    mode    => '0644',
+    content => "deb ${repo_url} /",
+    replace => true,
+  }
+  file { $repo_pref_file:
+    ensure  => file,
+    mode    => '0644',
+    source  => "puppet:///modules/${module_name}/pinning",
+    replace => true,
+  }
+  # refresh only nsx-t source, other sources are updated by fuel
+  exec { 'Update nsx-t repo':
+    path      => '/usr/sbin:/usr/bin:/sbin:/bin',
+    command   => "apt-get update -o Dir::Etc::sourcelist=${repo_file} -o Dir::Etc::sourceparts=- -o APT::Get::List-Cleanup=0",
+    tries     => 3,
+    try_sleep => 10,
+    require   => [File[$repo_file], File[$repo_pref_file]],
+  }
+}
@@ -0,0 +1,29 @@
+class nsxt::serve_repo (
+  $listen_address,
+  $allowed_network,
+  $port     = '8091',
+  $repo_dir = '/opt/nsx-t-repo',
+) {
+  file { '/usr/local/bin/nsx-t-repo-server':
+    ensure => file,
+    mode   => '0755',
+    source => "puppet:///modules/${module_name}/serve_repo.py",
+  }
+  file { '/etc/init/nsx-t-repo.conf':
+    ensure  => file,
+    mode    => '0644',
+    content => "description \"NSX-T local repository\"\nstart on runlevel [2345]\nstop on runlevel [!2345]\nrespawn\nexec /usr/local/bin/nsx-t-repo-server ${listen_address} ${port} ${repo_dir}\n",
+  }
+  firewall { '0001 Accept nsx-t repository requests':
+    proto  => 'tcp',
+    dport  => [$port],
+    source => $allowed_network,
+    action => 'accept',
+  }
+  service { 'nsx-t-repo':
+    ensure    => running,
+    enable    => true,
+    provider  => 'upstart',
+    subscribe => [File['/usr/local/bin/nsx-t-repo-server'], File['/etc/init/nsx-t-repo.conf']],
+  }
+}
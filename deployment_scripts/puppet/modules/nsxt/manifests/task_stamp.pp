@@ -0,0 +1,17 @@
+# Stamp of converged task, declare it in stage after main, so it is
+# written only when all resources of the task are applied:
+#   stage { 'nsxt-stamp': require => Stage['main'] }
+#   class { '::nsxt::task_stamp': stage => 'nsxt-stamp', task => ... }
+class nsxt::task_stamp (
+  $task,
+  $data     = {},
+  $files    = [],
+  $packages = [],
+) {
+  nsxt_task_stamp { $task:
+    ensure   => present,
+    data     => $data,
+    files    => $files,
+    packages => $packages,
+  }
+}
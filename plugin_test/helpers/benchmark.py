@@ -0,0 +1,374 @@
+"""Copyright 2016 Mirantis, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may
+not use this file except in compliance with the License. You may obtain
+copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+License for the specific language governing permissions and limitations
+under the License.
+"""
+
+import base64
+import itertools
+import json
+import math
+import ssl
+import threading
+import time
+from multiprocessing.pool import ThreadPool
+
+try:
+    from httplib import HTTPSConnection
+    from Queue import Queue
+except ImportError:
+    from http.client import HTTPSConnection
+    from queue import Queue
+
+
+# nsx.ini client settings swept by benchmark
+CLIENT_PARAMS = ('concurrent_connections', 'conn_idle_timeout',
+                 'http_timeout')
+
+# every workload iteration creates and deletes one object of each kind
+WORKLOAD = ('network', 'port', 'router')
+
+
+def parameter_grid(**axes):
+    """Return list of dicts for every combination of axes values.
+
+    parameter_grid(a=[1, 2], b=[3]) -> [{'a': 1, 'b': 3}, {'a': 2, 'b': 3}]
+    """
+    names = sorted(axes)
+    return [dict(zip(names, values))
+            for values in itertools.product(*[axes[n] for n in names])]
+
+
+def parse_axis(value, default):
+    """'5,10,20' -> [5, 10, 20]."""
+    value = value or default
+    return [int(v) for v in str(value).split(',') if v.strip()]
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = int(math.ceil(p / 100.0 * len(ordered)))
+    return ordered[max(rank, 1) - 1]
+
+
+def summarize(samples, elapsed):
+    """Return throughput and latency percentiles of samples.
+
+    :param samples: list of (operation, seconds, ok) tuples
+    :param elapsed: wall time of workload in seconds
+    """
+    def stats(latencies, errors):
+        return {
+            'count': len(latencies) + errors,
+            'errors': errors,
+            'throughput': round(len(latencies) / elapsed, 3)
+            if elapsed else None,
+            'p50': percentile(latencies, 50),
+            'p95': percentile(latencies, 95),
+            'p99': percentile(latencies, 99)}
+
+    summary = {'elapsed': round(elapsed, 3), 'operations': {}}
+    for operation in sorted(set(s[0] for s in samples)):
+        summary['operations'][operation] = stats(
+            [s[1] for s in samples if s[0] == operation and s[2]],
+            len([s for s in samples if s[0] == operation and not s[2]]))
+    summary['total'] = stats([s[1] for s in samples if s[2]],
+                             len([s for s in samples if not s[2]]))
+    return summary
+
+
+def run_workload(driver, iterations, concurrency):
+    """Run fixed workload and return summary of its samples.
+
+    Every iteration creates and deletes network, port and router, up to
+    concurrency iterations run at once.
+    """
+    samples = []
+    lock = threading.Lock()
+    operations = driver.operations()
+
+    def timed(operation, func, *args):
+        started = time.time()
+        try:
+            result = func(*args)
+            ok = True
+        except Exception:
+            result = None
+            ok = False
+        with lock:
+            samples.append((operation, time.time() - started, ok))
+        return result
+
+    def iteration(index):
+        for kind in WORKLOAD:
+            create, delete = operations[kind]
+            obj_id = timed('{0}_create'.format(kind), create, index)
+            if obj_id is not None:
+                timed('{0}_delete'.format(kind), delete, obj_id)
+
+    pool = ThreadPool(concurrency)
+    started = time.time()
+    try:
+        pool.map(iteration, range(iterations))
+    finally:
+        pool.close()
+        pool.join()
+    return summarize(samples, time.time() - started)
+
+
+def sweep(driver, grid, iterations, concurrency, results_path=None,
+          target='fake'):
+    """Run workload for every point of parameter grid.
+
+    Every result is appended as JSON line to results_path with the
+    workload definition, so results of different runs can be compared.
+    """
+    run_id = time.strftime('%Y%m%dT%H%M%S')
+    records = []
+    driver.setup()
+    try:
+        for params in grid:
+            driver.configure(params)
+            record = {
+                'run_id': run_id,
+                'target': target,
+                'workload': {'operations': list(WORKLOAD),
+                             'iterations': iterations,
+                             'concurrency': concurrency},
+                'params': params,
+                'results': run_workload(driver, iterations, concurrency)}
+            record['results'].update(driver.stats())
+            records.append(record)
+            if results_path:
+                with open(results_path, 'a') as results:
+                    results.write(json.dumps(record, sort_keys=True) + '\n')
+    finally:
+        driver.teardown()
+    return records
+
+
+class NsxtApiError(Exception):
+    def __init__(self, status, body):
+        super(NsxtApiError, self).__init__('{0}: {1}'.format(status, body))
+        self.status = status
+
+
+class ClientPool(object):
+    """HTTPS connections to NSX-T managers handled like neutron NSX client.
+
+    Every manager has at most concurrent_connections keep-alive
+    connections, requests queue when all are busy, connection idle longer
+    than conn_idle_timeout is reconnected, http_timeout is socket timeout.
+    Requests go to managers round robin.
+    """
+
+    def __init__(self, managers, username, password,
+                 concurrent_connections=10, conn_idle_timeout=10,
+                 http_timeout=10):
+        self.managers = list(managers)
+        self.conn_idle_timeout = conn_idle_timeout
+        self.http_timeout = http_timeout
+        self.handshakes = 0
+        self._auth = 'Basic ' + base64.b64encode(
+            '{0}:{1}'.format(username, password).encode('utf-8')
+        ).decode('ascii')
+        self._context = ssl._create_unverified_context()
+        self._slots = {}
+        for manager in self.managers:
+            self._slots[manager] = Queue()
+            for _ in range(concurrent_connections):
+                self._slots[manager].put((None, 0))
+        self._next = itertools.cycle(self.managers)
+        self._lock = threading.Lock()
+
+    def _connect(self, manager):
+        host, _, port = manager.partition(':')
+        with self._lock:
+            self.handshakes += 1
+        return HTTPSConnection(host, int(port or 443),
+                               timeout=self.http_timeout,
+                               context=self._context)
+
+    def request(self, method, path, body=None):
+        """Send request, return parsed response, raise NsxtApiError."""
+        with self._lock:
+            manager = next(self._next)
+        conn, last_used = self._slots[manager].get()
+        try:
+            if conn is None or time.time() - last_used > \
+                    self.conn_idle_timeout:
+                if conn is not None:
+                    conn.close()
+                conn = self._connect(manager)
+            headers = {'Authorization': self._auth,
+                       'Accept': 'application/json',
+                       'Content-Type': 'application/json'}
+            conn.request(method, path,
+                         json.dumps(body) if body is not None else None,
+                         headers)
+            response = conn.getresponse()
+            data = response.read()
+        except Exception:
+            if conn is not None:
+                conn.close()
+            conn = None
+            raise
+        finally:
+            self._slots[manager].put((conn, time.time()))
+        if response.status >= 400:
+            raise NsxtApiError(response.status, data)
+        return json.loads(data.decode('utf-8')) if data else {}
+
+    def close(self):
+        for slots in self._slots.values():
+            while not slots.empty():
+                conn, _ = slots.get()
+                if conn is not None:
+                    conn.close()
+
+
+class NsxtApiDriver(object):
+    """Workload against NSX-T API with calls neutron plugin does.
+
+    Used with local fake manager, measures client settings without
+    neutron in the way.
+    """
+
+    def __init__(self, managers, username, password):
+        self.managers = managers
+        self.username = username
+        self.password = password
+        self.client = None
+        self.switch_id = None
+
+    def setup(self):
+        self.configure({})
+        self.switch_id = self.client.request(
+            'POST', '/api/v1/logical-switches',
+            {'display_name': 'benchmark', 'admin_state': 'UP'})['id']
+
+    def configure(self, params):
+        if self.client:
+            self.client.close()
+        self.client = ClientPool(self.managers, self.username,
+                                 self.password, **params)
+
+    def stats(self):
+        return {'handshakes': self.client.handshakes}
+
+    def teardown(self):
+        if self.switch_id:
+            self.client.request(
+                'DELETE', '/api/v1/logical-switches/' + self.switch_id)
+        self.client.close()
+
+    def _create(self, collection, body):
+        return self.client.request('POST', collection, body)['id']
+
+    def _delete(self, collection, obj_id):
+        self.client.request('DELETE', '{0}/{1}'.format(collection, obj_id))
+
+    def operations(self):
+        switches = '/api/v1/logical-switches'
+        ports = '/api/v1/logical-ports'
+        routers = '/api/v1/logical-routers'
+        return {
+            'network': (
+                lambda i: self._create(switches, {
+                    'display_name': 'bench-net-{0}'.format(i),
+                    'admin_state': 'UP'}),
+                lambda obj_id: self._delete(switches, obj_id)),
+            'port': (
+                lambda i: self._create(ports, {
+                    'display_name': 'bench-port-{0}'.format(i),
+                    'logical_switch_id': self.switch_id,
+                    'admin_state': 'UP'}),
+                lambda obj_id: self._delete(ports, obj_id)),
+            'router': (
+                lambda i: self._create(routers, {
+                    'display_name': 'bench-router-{0}'.format(i),
+                    'router_type': 'TIER1'}),
+                lambda obj_id: self._delete(routers, obj_id)),
+        }
+
+
+class NeutronDriver(object):
+    """Workload against neutron of deployed cluster.
+
+    Every parameter set is written to nsx.ini on all controllers, which
+    restart neutron-server and wait for it to answer.
+    """
+
+    NSX_INI = '/etc/neutron/plugins/vmware/nsx.ini'
+
+    def __init__(self, os_conn, ssh_manager, controller_ips,
+                 restart_timeout=300):
+        self.neutron = os_conn.neutron
+        self.ssh_manager = ssh_manager
+        self.controller_ips = controller_ips
+        self.restart_timeout = restart_timeout
+        self.net_id = None
+
+    def setup(self):
+        self.net_id = self.neutron.create_network(
+            {'network': {'name': 'benchmark'}})['network']['id']
+
+    def configure(self, params):
+        expressions = ' '.join(
+            "-e 's/^\\s*{0}\\s*=.*/{0} = {1}/'".format(name, value)
+            for name, value in sorted(params.items()))
+        for ip in self.controller_ips:
+            self.ssh_manager.check_call(
+                ip=ip,
+                command='sed -ri {0} {1} && service neutron-server '
+                        'restart'.format(expressions, self.NSX_INI))
+        self._wait_neutron()
+
+    def _wait_neutron(self):
+        deadline = time.time() + self.restart_timeout
+        while True:
+            try:
+                self.neutron.list_extensions()
+                return
+            except Exception:
+                if time.time() > deadline:
+                    raise
+                time.sleep(5)
+
+    def stats(self):
+        return {}
+
+    def teardown(self):
+        if self.net_id:
+            self.neutron.delete_network(self.net_id)
+
+    def operations(self):
+        return {
+            'network': (
+                lambda i: self.neutron.create_network(
+                    {'network': {'name': 'bench-net-{0}'.format(i)}}
+                )['network']['id'],
+                self.neutron.delete_network),
+            'port': (
+                lambda i: self.neutron.create_port(
+                    {'port': {'name': 'bench-port-{0}'.format(i),
+                              'network_id': self.net_id}})['port']['id'],
+                self.neutron.delete_port),
+            'router': (
+                lambda i: self.neutron.create_router(
+                    {'router': {'name': 'bench-router-{0}'.format(i)}}
+                )['router']['id'],
+                self.neutron.delete_router),
+        }
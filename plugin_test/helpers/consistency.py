@@ -0,0 +1,177 @@
+"""Copyright 2016 Mirantis, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may
+not use this file except in compliance with the License. You may obtain
+copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+License for the specific language governing permissions and limitations
+under the License.
+"""
+
+from fuelweb_test import logger
+from helpers.nsxt_client import NEUTRON_OBJECTS
+
+
+# neutron resource => (NSX-T collection, scope of tag with neutron id)
+RESOURCES = (
+    ('networks', 'logical_switches', 'os-neutron-net-id'),
+    ('ports', 'logical_ports', 'os-neutron-port-id'),
+    ('routers', 'logical_routers', 'os-neutron-router-id'),
+)
+
+# problems kept per resource and kind, the rest is only counted
+SAMPLES = 20
+
+
+def iter_neutron(neutron, resource, page_size=1000):
+    """Yield neutron objects of resource page by page.
+
+    Neutron without pagination enabled returns all objects in one page.
+    """
+    lister = getattr(neutron, 'list_{0}'.format(resource))
+    for page in lister(retrieve_all=False, limit=page_size):
+        for obj in page[resource]:
+            yield obj
+
+
+def neutron_id(obj, scope):
+    for tag in obj.get('tags') or []:
+        if tag.get('scope') == scope:
+            return tag.get('tag')
+
+
+def admin_state(obj):
+    return obj.get('admin_state') != 'DOWN'
+
+
+def index_backend(client, resource, collection, scope):
+    """Return dict neutron id => NSX-T object fields compared with neutron.
+
+    Only short tuples are kept, not whole objects, NSX-T objects without
+    tag of neutron are skipped. Ids of all NSX-T objects which share tag
+    with other object are returned as duplicates.
+    """
+    index = {}
+    duplicates = []
+    duplicated = set()
+    for obj in client.iter_objects(NEUTRON_OBJECTS[collection]):
+        key = neutron_id(obj, scope)
+        if key is None:
+            continue
+        if key in index:
+            if key not in duplicated:
+                duplicated.add(key)
+                duplicates.append(index[key][0])
+            duplicates.append(obj['id'])
+        if resource == 'ports':
+            index[key] = (obj['id'], admin_state(obj),
+                          obj.get('logical_switch_id'))
+        elif resource == 'networks':
+            index[key] = (obj['id'], admin_state(obj))
+        else:
+            index[key] = (obj['id'],)
+    return index, duplicates
+
+
+class Report(object):
+    """Missing, orphaned and drifted objects of one neutron resource."""
+
+    def __init__(self, resource, samples=SAMPLES):
+        self.resource = resource
+        self.samples = samples
+        self.checked = 0
+        self.counts = {'missing': 0, 'orphaned': 0, 'drifted': 0}
+        self.problems = {'missing': [], 'orphaned': [], 'drifted': []}
+
+    def add(self, kind, item):
+        self.counts[kind] += 1
+        if len(self.problems[kind]) < self.samples:
+            self.problems[kind].append(item)
+
+    @property
+    def consistent(self):
+        return not any(self.counts.values())
+
+    def to_dict(self):
+        return {'checked': self.checked, 'counts': dict(self.counts),
+                'problems': dict(self.problems)}
+
+    def __str__(self):
+        return '{0}: {1} checked, {2} missing, {3} orphaned, ' \
+               '{4} drifted'.format(self.resource, self.checked,
+                                    self.counts['missing'],
+                                    self.counts['orphaned'],
+                                    self.counts['drifted'])
+
+
+def check(neutron, client, page_size=1000, samples=SAMPLES):
+    """Compare neutron networks, ports and routers with NSX-T objects.
+
+    Every NSX-T collection is streamed into hash index by neutron id tag,
+    then neutron objects are streamed and looked up in it:
+      missing - neutron object without NSX-T object
+      orphaned - NSX-T object tagged with id of deleted neutron object
+      drifted - admin state or network of port differs
+    External networks and their ports have no NSX-T objects and are
+    skipped.
+
+    :return: list of Report, one per neutron resource
+    """
+    reports = []
+    # neutron network id => logical switch id, for network of ports
+    switches = {}
+    external = set()
+    for resource, collection, scope in RESOURCES:
+        report = Report(resource, samples)
+        index, duplicates = index_backend(client, resource, collection,
+                                          scope)
+        for nsx_id in duplicates:
+            report.add('orphaned', {'nsx_id': nsx_id})
+
+        for obj in iter_neutron(neutron, resource, page_size):
+            if resource == 'networks' and obj.get('router:external'):
+                external.add(obj['id'])
+                continue
+            if resource == 'ports' and obj['network_id'] in external:
+                continue
+            report.checked += 1
+            backend = index.pop(obj['id'], None)
+            if backend is None:
+                report.add('missing', {'id': obj['id'],
+                                       'name': obj.get('name')})
+                continue
+            drift = {}
+            if resource != 'routers' and \
+                    backend[1] != obj.get('admin_state_up', True):
+                drift['admin_state_up'] = (obj.get('admin_state_up'),
+                                           backend[1])
+            if resource == 'networks':
+                switches[obj['id']] = backend[0]
+            elif resource == 'ports' and obj['network_id'] in switches and \
+                    switches[obj['network_id']] != backend[2]:
+                drift['logical_switch_id'] = (switches[obj['network_id']],
+                                              backend[2])
+            if drift:
+                report.add('drifted', {'id': obj['id'],
+                                       'nsx_id': backend[0],
+                                       'fields': drift})
+
+        for key, backend in index.items():
+            report.add('orphaned', {'id': key, 'nsx_id': backend[0]})
+        reports.append(report)
+    return reports
+
+
+def log_reports(reports):
+    """Log counts and sampled problems of reports."""
+    for report in reports:
+        logger.info(str(report))
+        for kind, problems in sorted(report.problems.items()):
+            for problem in problems:
+                logger.info('{0} {1}: {2}'.format(report.resource, kind,
+                                                  problem))
@@ -0,0 +1,200 @@
+"""Copyright 2016 Mirantis, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may
+not use this file except in compliance with the License. You may obtain
+copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+License for the specific language governing permissions and limitations
+under the License.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+try:
+    from BaseHTTPServer import BaseHTTPRequestHandler
+    from BaseHTTPServer import HTTPServer
+    from SocketServer import StreamRequestHandler
+    from SocketServer import ThreadingMixIn
+    from SocketServer import UnixStreamServer
+    from urlparse import parse_qs
+    from urlparse import urlparse
+except ImportError:
+    from http.server import BaseHTTPRequestHandler
+    from http.server import HTTPServer
+    from socketserver import StreamRequestHandler
+    from socketserver import ThreadingMixIn
+    from socketserver import UnixStreamServer
+    from urllib.parse import parse_qs
+    from urllib.parse import urlparse
+
+
+STAT_FIELDS = ('pxname', 'svname', 'qcur', 'qmax', 'scur', 'smax', 'slim',
+               'stot', 'bin', 'bout', 'dreq', 'dresp', 'ereq', 'econ',
+               'eresp', 'wretr', 'wredis', 'status')
+
+
+class _Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class _StatsServer(ThreadingMixIn, UnixStreamServer):
+    daemon_threads = True
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = dict((k, v[-1]) for k, v in parse_qs(url.query).items())
+        code, payload = self.server.haproxy.handle(self.server.node, url.path,
+                                                   query)
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class _StatsHandler(StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline().decode('utf-8').strip()
+        self.wfile.write(self.server.haproxy.command(line).encode('utf-8'))
+
+
+class FakeHaproxy(object):
+    """Local stand-in of haproxy in front of neutron servers for tests.
+
+    Serves over HTTP neutron server of every node and VIP that balances
+    requests round robin over nodes not in maintenance, without redispatch
+    and health checks, so request sent to restarting node fails. Node is
+    restarted with GET /restart?down=<seconds> on its address and answers
+    503 until it is up. Stats socket answers show stat, and disables and
+    enables servers on admin level only.
+    """
+
+    def __init__(self, nodes=('node-1', 'node-2', 'node-3'),
+                 backend='neutron', admin=True, host='127.0.0.1'):
+        self.backend = backend
+        self.admin = admin
+        self.vip_requests = 0
+        self.vip_failures = 0
+        self._lock = threading.Lock()
+        self._tmp_dir = tempfile.mkdtemp(prefix='fake-haproxy-')
+        self._nodes = list(nodes)
+        self._down_until = dict((node, 0) for node in nodes)
+        self._maintenance = set()
+        self._next = 0
+        self._servers = {}
+        for node in [None] + self._nodes:
+            server = _Server((host, 0), _Handler)
+            server.haproxy = self
+            server.node = node
+            self._servers[node] = server
+        self._stats = _StatsServer(self.socket_path, _StatsHandler)
+        self._stats.haproxy = self
+        self._threads = []
+
+    @property
+    def socket_path(self):
+        return os.path.join(self._tmp_dir, 'stats')
+
+    @property
+    def vip_address(self):
+        return self.address(None)
+
+    def address(self, node):
+        """'host:port' of node, of VIP for None."""
+        return '{0}:{1}'.format(*self._servers[node].server_address[:2])
+
+    def start(self):
+        for server in list(self._servers.values()) + [self._stats]:
+            thread = threading.Thread(target=server.serve_forever)
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self):
+        for server in list(self._servers.values()) + [self._stats]:
+            if self._threads:
+                server.shutdown()
+            server.server_close()
+        self._threads = []
+        shutil.rmtree(self._tmp_dir, ignore_errors=True)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def _up(self, node):
+        return time.time() >= self._down_until[node]
+
+    def handle(self, node, path, query):
+        with self._lock:
+            if node is None:
+                self.vip_requests += 1
+                enabled = [n for n in self._nodes
+                           if n not in self._maintenance]
+                if not enabled:
+                    self.vip_failures += 1
+                    return 503, {'error': 'no server available'}
+                node = enabled[self._next % len(enabled)]
+                self._next += 1
+                if not self._up(node):
+                    self.vip_failures += 1
+                    return 503, {'error': '{0} is down'.format(node)}
+            elif path == '/restart':
+                self._down_until[node] = (time.time() +
+                                          float(query.get('down', 1)))
+                return 200, {}
+            if not self._up(node):
+                return 503, {'error': 'starting'}
+            return 200, {'versions': [{'id': 'v2.0', 'status': 'CURRENT'}]}
+
+    def command(self, line):
+        words = line.split()
+        if line == 'show stat':
+            rows = ['# ' + ','.join(STAT_FIELDS)]
+            with self._lock:
+                for node in self._nodes:
+                    if node in self._maintenance:
+                        status = 'MAINT'
+                    else:
+                        status = 'UP' if self._up(node) else 'DOWN'
+                    row = dict((field, '') for field in STAT_FIELDS)
+                    row.update(pxname=self.backend, svname=node, scur='0',
+                               status=status)
+                    rows.append(','.join(row[f] for f in STAT_FIELDS))
+            return '\n'.join(rows) + '\n\n'
+        if len(words) == 3 and words[1] == 'server' and \
+                words[0] in ('disable', 'enable'):
+            if not self.admin:
+                return 'Permission denied.\n\n'
+            backend, _, node = words[2].partition('/')
+            if backend != self.backend or node not in self._nodes:
+                return 'No such server.\n\n'
+            with self._lock:
+                if words[0] == 'disable':
+                    self._maintenance.add(node)
+                else:
+                    self._maintenance.discard(node)
+            return '\n'
+        return 'Unknown command.\n\n'
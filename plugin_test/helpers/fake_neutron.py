@@ -0,0 +1,35 @@
+"""Copyright 2016 Mirantis, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may
+not use this file except in compliance with the License. You may obtain
+copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+License for the specific language governing permissions and limitations
+under the License.
+"""
+
+
+class FakeNeutron(object):
+    """Neutron client listing generated objects page by page."""
+
+    def __init__(self):
+        self.objects = {'networks': [], 'ports': [], 'routers': []}
+
+    def _pages(self, resource, limit):
+        objects = self.objects[resource]
+        for start in range(0, len(objects), limit):
+            yield {resource: objects[start:start + limit]}
+
+    def list_networks(self, retrieve_all=True, limit=1000):
+        return self._pages('networks', limit)
+
+    def list_ports(self, retrieve_all=True, limit=1000):
+        return self._pages('ports', limit)
+
+    def list_routers(self, retrieve_all=True, limit=1000):
+        return self._pages('routers', limit)
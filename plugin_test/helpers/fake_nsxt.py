@@ -0,0 +1,655 @@
+"""Copyright 2016 Mirantis, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may
+not use this file except in compliance with the License. You may obtain
+copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+License for the specific language governing permissions and limitations
+under the License.
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import shutil
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+try:
+    from BaseHTTPServer import BaseHTTPRequestHandler
+    from BaseHTTPServer import HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urlparse import parse_qs
+    from urlparse import urlparse
+except ImportError:
+    from http.server import BaseHTTPRequestHandler
+    from http.server import HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import parse_qs
+    from urllib.parse import urlparse
+
+
+def fake_uuid(kind, index):
+    """Deterministic uuid for generated objects."""
+    return '{0:08x}-0000-4000-8000-{1:012x}'.format(kind, index)
+
+
+def not_found(what):
+    return 404, {'error_code': 404,
+                 'error_message': 'Not found: {0}'.format(what)}
+
+
+class _Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def _dispatch(self, method):
+        manager = self.server.manager
+        url = urlparse(self.path)
+        query = dict((k, v[-1]) for k, v in parse_qs(url.query).items())
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        if self.server.repository:
+            result = manager.handle_repository(method, url.path,
+                                               self.headers.get('Range'),
+                                               self.headers.get('If-Range'))
+        else:
+            result = manager.handle(method, url.path, query, body)
+        code, payload = result[:2]
+        headers = result[2] if len(result) > 2 else {}
+        if isinstance(payload, bytes):
+            data = payload
+            content_type = 'application/octet-stream'
+        else:
+            data = json.dumps(payload, sort_keys=True).encode('utf-8')
+            content_type = 'application/json'
+            if method == 'GET' and code == 200:
+                etag = '"{0}"'.format(hashlib.sha1(data).hexdigest())
+                headers = dict(headers, ETag=etag)
+                if self.headers.get('If-None-Match') == etag:
+                    code, data = 304, b''
+                    with manager._lock:
+                        manager.not_modified += 1
+        self.send_response(code)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        if method != 'HEAD':
+            self.wfile.write(data)
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_HEAD(self):
+        self._dispatch('HEAD')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def do_PUT(self):
+        self._dispatch('PUT')
+
+    def do_DELETE(self):
+        self._dispatch('DELETE')
+
+
+class FakeNsxtManager(object):
+    """Local stand-in of NSX-T manager API for provider tests.
+
+    Serves over HTTPS the endpoints used by puppet providers and
+    get_nsxt_components: transport nodes with server side node_id filter
+    and cursor pagination, fabric node state and status, transport zones,
+    node version and install-upgrade service, and over plain HTTP the
+    repository with host components manifest and archive. Keeps logical
+    switches, ports, routers, router ports, DHCP servers, firewall
+    sections, edge clusters, host switch profiles and IP pools created by
+    clients, refuses to delete objects in use like NSX-T does.
+    Every request is counted per path, can be delayed, throttled and can
+    fail, GETs are revalidated with ETag.
+    """
+
+    # collections with create/read/delete by clients
+    OBJECTS = ('logical-switches', 'logical-ports', 'logical-routers',
+               'logical-router-ports', 'dhcp/servers', 'firewall/sections',
+               'edge-clusters', 'host-switch-profiles', 'pools/ip-pools')
+    NODE_VERSION = '1.1.0.0.0.4788147'
+
+    def __init__(self, transport_nodes=0, page_size=1000, filters=True,
+                 latency=0, host='127.0.0.1', port=0, transport_zones=1,
+                 failure_rate=0, converge_after=0, component=None,
+                 node_version=NODE_VERSION, repository_port=None,
+                 rate_limit=0):
+        """Create fake manager.
+
+        :param transport_nodes: number of generated transport nodes, their
+                                fabric nodes are registered and LCP is UP
+        :param page_size: maximum number of objects in one page
+        :param filters: if False, manager ignores query filters like
+                        NSX-T 1.0 does for some collections
+        :param latency: seconds to spend on every request
+        :param host: address to listen on
+        :param port: port to listen on, 0 for random free port
+        :param transport_zones: number of generated transport zones
+        :param failure_rate: part of API requests answered with 503
+        :param converge_after: seconds after which registered fabric node
+                               gets 'success' state and created transport
+                               node gets LCP connectivity UP
+        :param component: content of host components archive
+        :param node_version: NSX-T version returned by /api/v1/node
+        :param repository_port: port of plain HTTP repository with host
+                                components, None to not serve it
+        :param rate_limit: API requests per second, others are answered
+                           with 429 and Retry-After, 0 to not limit
+        """
+        self.page_size = page_size
+        self.filters = filters
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.converge_after = converge_after
+        self.node_version = node_version
+        self.component = component if component is not None else \
+            os.urandom(64 * 1024)
+        self.requests = defaultdict(int)
+        self.not_modified = 0
+        self.rate_limit = rate_limit
+        self.throttled = 0
+        self.failed = 0
+        self._tokens = rate_limit
+        self._tokens_at = time.time()
+        self.objects = dict((kind, {}) for kind in self.OBJECTS)
+        self.transport_nodes = [
+            {'id': fake_uuid(1, i),
+             'node_id': fake_uuid(2, i),
+             'display_name': 'node-{0}'.format(i)}
+            for i in range(transport_nodes)]
+        # node_id => time of registration on management plane
+        self.fabric_nodes = dict((n['node_id'], 0)
+                                 for n in self.transport_nodes)
+        # node_id => time of transport node creation
+        self.lcp_up = dict((n['node_id'], 0) for n in self.transport_nodes)
+        self.transport_zones = dict(
+            (fake_uuid(3, i), {'id': fake_uuid(3, i),
+                               'display_name': 'tz-{0}'.format(i),
+                               'host_switch_name': 'nsxvswitch',
+                               'transport_type': 'OVERLAY'})
+            for i in range(transport_zones))
+        self.upgrade_service = {'enabled': False, 'toggles': 0}
+        self._failures = []
+        self._routes = [
+            ('GET', r'^/api/v1/transport-nodes$', self.list_transport_nodes),
+            ('POST', r'^/api/v1/transport-nodes$',
+             self.create_transport_node),
+            ('GET', r'^/api/v1/transport-nodes/([^/]+)$',
+             self.get_transport_node),
+            ('DELETE', r'^/api/v1/transport-nodes/([^/]+)$',
+             self.delete_transport_node),
+            ('GET', r'^/api/v1/fabric/nodes/([^/]+)/state$',
+             self.get_fabric_node_state),
+            ('GET', r'^/api/v1/fabric/nodes/([^/]+)/status$',
+             self.get_fabric_node_status),
+            ('GET', r'^/api/v1/transport-zones$', self.list_transport_zones),
+            ('GET', r'^/api/v1/transport-zones/([^/]+)$',
+             self.get_transport_zone),
+            ('GET', r'^/api/v1/node$', self.get_node),
+            ('GET', r'^/api/v1/node/services/install-upgrade$',
+             self.get_upgrade_service),
+            ('PUT', r'^/api/v1/node/services/install-upgrade$',
+             self.update_upgrade_service),
+            ('GET', r'^/api/v1/node/services/install-upgrade/status$',
+             self.get_upgrade_service_status),
+            ('GET', r'^/api/v1/({0})$'.format('|'.join(self.OBJECTS)),
+             self.list_objects),
+            ('POST', r'^/api/v1/({0})$'.format('|'.join(self.OBJECTS)),
+             self.create_object),
+            ('GET', r'^/api/v1/({0})/([^/]+)$'.format('|'.join(self.OBJECTS)),
+             self.get_object),
+            ('DELETE',
+             r'^/api/v1/({0})/([^/]+)$'.format('|'.join(self.OBJECTS)),
+             self.delete_object),
+        ]
+        self._lock = threading.Lock()
+        self._tmp_dir = tempfile.mkdtemp(prefix='fake-nsxt-')
+        self._server = _Server((host, port), _Handler)
+        self._server.manager = self
+        self._server.repository = False
+        self._repository = None
+        if repository_port is not None:
+            self._repository = _Server((host, repository_port), _Handler)
+            self._repository.manager = self
+            self._repository.repository = True
+        self._threads = []
+
+    @property
+    def address(self):
+        """'host:port' of manager as used in plugin settings."""
+        return '{0}:{1}'.format(*self._server.server_address[:2])
+
+    @property
+    def repository_address(self):
+        """'host:port' of repository, None if it is not served."""
+        if self._repository is None:
+            return None
+        return '{0}:{1}'.format(*self._repository.server_address[:2])
+
+    @property
+    def component_url(self):
+        return 'http://{0}/repository/{1}'.format(
+            self.repository_address, self.component_path())
+
+    def component_etag(self):
+        return '"{0}"'.format(hashlib.sha1(self.component).hexdigest())
+
+    def component_path(self):
+        return '{0}/host/nsx-host-components-ubuntu-1404.tar.gz'.format(
+            self.node_version)
+
+    def start(self):
+        """Wrap listen socket into TLS and serve in background threads."""
+        cert = os.path.join(self._tmp_dir, 'cert.pem')
+        key = os.path.join(self._tmp_dir, 'key.pem')
+        subprocess.check_call(
+            ['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes',
+             '-days', '1', '-subj', '/CN=fake-nsxt', '-keyout', key,
+             '-out', cert], stdout=open(os.devnull, 'w'),
+            stderr=subprocess.STDOUT)
+        protocol = getattr(ssl, 'PROTOCOL_TLS_SERVER', ssl.PROTOCOL_SSLv23)
+        context = ssl.SSLContext(protocol)
+        context.load_cert_chain(cert, key)
+        self._server.socket = context.wrap_socket(self._server.socket,
+                                                  server_side=True)
+        for server in (self._server, self._repository):
+            if server is None:
+                continue
+            thread = threading.Thread(target=server.serve_forever)
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self):
+        for server in (self._server, self._repository):
+            if server is None:
+                continue
+            # shutdown waits for serve_forever, which runs after start only
+            if self._threads:
+                server.shutdown()
+            server.server_close()
+        self._threads = []
+        shutil.rmtree(self._tmp_dir, ignore_errors=True)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def fail_next(self, count, code=503, pattern=''):
+        """Answer next count API requests matching pattern with code."""
+        with self._lock:
+            self._failures.append([re.compile(pattern), count, code])
+
+    def _throttle(self):
+        """Take token of rate limit, return Retry-After if there is none."""
+        if not self.rate_limit:
+            return None
+        with self._lock:
+            now = time.time()
+            self._tokens = min(self._tokens + (now - self._tokens_at) *
+                               self.rate_limit, self.rate_limit)
+            self._tokens_at = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return None
+            self.throttled += 1
+            return int(math.ceil((1 - self._tokens) / self.rate_limit))
+
+    def _failure(self, path):
+        with self._lock:
+            for failure in self._failures:
+                if failure[0].search(path):
+                    failure[1] -= 1
+                    if failure[1] <= 0:
+                        self._failures.remove(failure)
+                    self.failed += 1
+                    return failure[2]
+            if self.failure_rate and random.random() < self.failure_rate:
+                self.failed += 1
+                return 503
+        return None
+
+    def handle(self, method, path, query, body):
+        """Route request to handler, return (code, payload)."""
+        with self._lock:
+            self.requests[path] += 1
+        retry_after = self._throttle()
+        if retry_after:
+            return 429, {'error_code': 429,
+                         'error_message': 'Too many requests'}, \
+                {'Retry-After': str(retry_after)}
+        if self.latency:
+            time.sleep(self.latency)
+        code = self._failure(path)
+        if code:
+            return code, {'error_code': code,
+                          'error_message': 'Injected failure'}
+        for route_method, pattern, handler in self._routes:
+            match = re.match(pattern, path)
+            if route_method == method and match:
+                return handler(query, body, *match.groups())
+        return not_found(path)
+
+    def handle_repository(self, method, path, byte_range, if_range=None):
+        """Serve host components manifest and archive with Range.
+
+        Archive has ETag, Range is ignored if If-Range does not match it.
+        """
+        with self._lock:
+            self.requests[path] += 1
+        if self.latency:
+            time.sleep(self.latency)
+        manifest = '/repository/{0}/metadata/manifest'.format(
+            self.node_version)
+        if path == manifest:
+            return 200, self.manifest().encode('utf-8')
+        if path != '/repository/' + self.component_path():
+            return not_found(path)
+        data = self.component
+        etag = {'ETag': self.component_etag()}
+        match = re.match(r'bytes=(\d+)-$', byte_range or '')
+        if not match or if_range not in (None, etag['ETag']):
+            return 200, data, etag
+        start = int(match.group(1))
+        if start >= len(data):
+            return 416, b'', {'Content-Range': 'bytes */{0}'.format(len(data))}
+        return 206, data[start:], dict(etag, **{
+            'Content-Range': 'bytes {0}-{1}/{2}'.format(
+                start, len(data) - 1, len(data))})
+
+    def manifest(self):
+        return ('NSX_HOST_COMPONENT_UBUNTU_1404_TAR={0}\n'
+                'NSX_HOST_COMPONENT_UBUNTU_1404_TAR_SHA256={1}\n').format(
+            self.component_path(),
+            hashlib.sha256(self.component).hexdigest())
+
+    def paginate(self, objects, query):
+        """Return one page of objects with cursor of next page."""
+        start = int(query.get('cursor') or 0)
+        size = min(int(query.get('page_size') or self.page_size),
+                   self.page_size)
+        page = {'results': objects[start:start + size],
+                'result_count': len(objects)}
+        if start + size < len(objects):
+            page['cursor'] = str(start + size)
+        return 200, page
+
+    def _converged(self, since):
+        return since is not None and \
+            time.time() - since >= self.converge_after
+
+    def register_node(self, node_id):
+        """Node joins management plane, as nsxcli 'join' does."""
+        with self._lock:
+            self.fabric_nodes[node_id] = time.time()
+
+    def unregister_node(self, node_id):
+        """Node detaches from management plane."""
+        with self._lock:
+            self.fabric_nodes.pop(node_id, None)
+            self.lcp_up.pop(node_id, None)
+
+    def list_transport_nodes(self, query, body):
+        with self._lock:
+            nodes = list(self.transport_nodes)
+        if self.filters and query.get('node_id'):
+            nodes = [n for n in nodes if n['node_id'] == query['node_id']]
+        return self.paginate(nodes, query)
+
+    def create_transport_node(self, query, body):
+        node = json.loads(body.decode('utf-8') or '{}')
+        with self._lock:
+            if node.get('node_id') not in self.fabric_nodes:
+                return 400, {'error_code': 600,
+                             'error_message': 'Node is not registered'}
+            node['id'] = str(uuid.uuid4())
+            self.transport_nodes.append(node)
+            self.lcp_up[node['node_id']] = time.time()
+        return 201, node
+
+    def get_transport_node(self, query, body, node_id):
+        with self._lock:
+            for node in self.transport_nodes:
+                if node['id'] == node_id:
+                    return 200, node
+        return not_found(node_id)
+
+    def delete_transport_node(self, query, body, node_id):
+        with self._lock:
+            for node in self.transport_nodes:
+                if node['id'] == node_id:
+                    self.transport_nodes.remove(node)
+                    self.lcp_up.pop(node.get('node_id'), None)
+                    return 200, {}
+        return not_found(node_id)
+
+    def get_fabric_node_state(self, query, body, node_id):
+        with self._lock:
+            registered = self.fabric_nodes.get(node_id)
+        if registered is None:
+            return not_found(node_id)
+        if self._converged(registered):
+            return 200, {'state': 'success', 'details': []}
+        return 200, {'state': 'in_progress',
+                     'details': [{'state': 'in_progress',
+                                  'sub_system_type': 'HostNode'}]}
+
+    def get_fabric_node_status(self, query, body, node_id):
+        with self._lock:
+            if node_id not in self.fabric_nodes:
+                return not_found(node_id)
+            up = self._converged(self.lcp_up.get(node_id))
+        status = 'UP' if up else 'DOWN'
+        return 200, {'lcp_connectivity_status': status,
+                     'mpa_connectivity_status': 'UP',
+                     'lcp_connectivity_status_details': [
+                         {'control_node_ip': '127.0.0.1', 'status': status,
+                          'failure_status': None if up else 'NOT_READY'}]}
+
+    def list_transport_zones(self, query, body):
+        with self._lock:
+            zones = list(self.transport_zones.values())
+        return self.paginate(zones, query)
+
+    def get_transport_zone(self, query, body, zone_id):
+        with self._lock:
+            zone = self.transport_zones.get(zone_id)
+        if zone is None:
+            return not_found(zone_id)
+        return 200, zone
+
+    def get_node(self, query, body):
+        return 200, {'node_version': self.node_version,
+                     'product_version': self.node_version,
+                     'hostname': 'fake-nsxt',
+                     'resource_type': 'NodeProperties'}
+
+    def _upgrade_service(self):
+        # real manager returns its ip, port keeps clients on fake manager
+        return {'service_name': 'install-upgrade',
+                'service_properties': {
+                    'enabled': self.upgrade_service['enabled'],
+                    'enabled_on': self.address}}
+
+    def get_upgrade_service(self, query, body):
+        with self._lock:
+            return 200, self._upgrade_service()
+
+    def update_upgrade_service(self, query, body):
+        request = json.loads(body.decode('utf-8') or '{}')
+        enabled = request.get('service_properties', {}).get('enabled')
+        with self._lock:
+            if enabled is not None and \
+                    enabled != self.upgrade_service['enabled']:
+                self.upgrade_service['enabled'] = enabled
+                self.upgrade_service['toggles'] += 1
+            return 200, self._upgrade_service()
+
+    def get_upgrade_service_status(self, query, body):
+        with self._lock:
+            enabled = self.upgrade_service['enabled']
+        return 200, {'runtime_state': 'running' if enabled else 'stopped'}
+
+    def add_objects(self, kind, count, tags=None, fields=None):
+        """Generate count objects of kind, return their ids.
+
+        tags and fields are functions of object index returning its tags
+        and dict of other fields.
+        """
+        ids = []
+        with self._lock:
+            for i in range(count):
+                obj_id = str(uuid.uuid4())
+                self.objects[kind][obj_id] = {
+                    'id': obj_id, 'display_name': '{0}-{1}'.format(kind, i),
+                    'resource_type': kind, '_revision': 0,
+                    'tags': tags(i) if tags else []}
+                if fields:
+                    self.objects[kind][obj_id].update(fields(i))
+                ids.append(obj_id)
+        return ids
+
+    def list_objects(self, query, body, kind):
+        with self._lock:
+            objects = list(self.objects[kind].values())
+        return self.paginate(objects, query)
+
+    def create_object(self, query, body, kind):
+        try:
+            obj = json.loads(body.decode('utf-8') or '{}')
+        except ValueError:
+            return 400, {'error_code': 400, 'error_message': 'Invalid JSON'}
+        obj['id'] = str(uuid.uuid4())
+        obj['resource_type'] = obj.get('resource_type', kind)
+        obj['_revision'] = 0
+        with self._lock:
+            self.objects[kind][obj['id']] = obj
+        return 201, obj
+
+    def get_object(self, query, body, kind, obj_id):
+        with self._lock:
+            obj = self.objects[kind].get(obj_id)
+        if obj is None:
+            return not_found(obj_id)
+        return 200, obj
+
+    def _in_use(self, kind, obj, query):
+        """Return description of object which uses obj, or None."""
+        if kind == 'logical-ports':
+            if obj.get('attachment') and query.get('detach') != 'true':
+                return 'attachment {0}'.format(obj['attachment']['id'])
+            return None
+        # kind of object in use => (kind of user, field with reference,
+        # resource type of user or None for any)
+        users = {
+            'logical-switches': ('logical-ports', 'logical_switch_id', None),
+            'logical-routers': ('logical-router-ports', 'logical_router_id',
+                                None),
+            # tier0 side of router link is deleted after tier1 side
+            'logical-router-ports': ('logical-router-ports',
+                                     'linked_logical_router_port_id',
+                                     'RouterLinkPortOnTIER1'),
+            'dhcp/servers': ('logical-ports', 'attachment', None),
+        }
+        if kind not in users:
+            return None
+        user_kind, field, user_type = users[kind]
+        for user in self.objects[user_kind].values():
+            if user_type is None or user.get('resource_type') == user_type:
+                ref = user.get(field)
+                if isinstance(ref, dict):
+                    ref = ref.get('id') or ref.get('target_id')
+                if ref == obj['id']:
+                    return '{0} {1}'.format(user_kind, user['id'])
+        return None
+
+    def delete_object(self, query, body, kind, obj_id):
+        with self._lock:
+            obj = self.objects[kind].get(obj_id)
+            if obj is None:
+                return not_found(obj_id)
+            user = self._in_use(kind, obj, query)
+            if user is None:
+                del self.objects[kind][obj_id]
+        if user is not None:
+            return 400, {'error_code': 400,
+                         'error_message': '{0} is in use by {1}'.format(
+                             obj_id, user)}
+        return 200, {}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Run fake NSX-T manager until interrupted.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=4443)
+    parser.add_argument('--repository-port', type=int, default=None,
+                        help='serve host components repository over HTTP')
+    parser.add_argument('--transport-nodes', type=int, default=0)
+    parser.add_argument('--transport-zones', type=int, default=1)
+    parser.add_argument('--page-size', type=int, default=1000)
+    parser.add_argument('--no-filters', action='store_true',
+                        help='ignore query filters like NSX-T 1.0')
+    parser.add_argument('--latency', type=float, default=0,
+                        help='seconds to spend on every request')
+    parser.add_argument('--failure-rate', type=float, default=0,
+                        help='part of requests answered with 503')
+    parser.add_argument('--converge-after', type=float, default=0,
+                        help='seconds before node registration converges')
+    parser.add_argument('--rate-limit', type=float, default=0,
+                        help='API requests per second, others get 429')
+    args = parser.parse_args()
+
+    manager = FakeNsxtManager(
+        transport_nodes=args.transport_nodes, page_size=args.page_size,
+        filters=not args.no_filters, latency=args.latency, host=args.host,
+        port=args.port, transport_zones=args.transport_zones,
+        failure_rate=args.failure_rate, converge_after=args.converge_after,
+        repository_port=args.repository_port, rate_limit=args.rate_limit)
+    with manager:
+        print('Fake NSX-T manager on https://{0}'.format(manager.address))
+        if manager.repository_address:
+            print('Repository on http://{0}/repository/'.format(
+                manager.repository_address))
+        print('Transport zones: {0}'.format(
+            ', '.join(sorted(manager.transport_zones))))
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,206 @@
+"""Copyright 2016 Mirantis, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may
+not use this file except in compliance with the License. You may obtain
+copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+License for the specific language governing permissions and limitations
+under the License.
+"""
+
+import threading
+import time
+from multiprocessing.pool import ThreadPool
+
+from helpers.consistency import iter_neutron
+from helpers.nsxt_client import NEUTRON_OBJECTS
+
+
+# scope of tag with neutron id => neutron resource of that id; router
+# downlink ports and native DHCP ports are tagged with neutron port id
+NEUTRON_SCOPES = {
+    'os-neutron-net-id': 'networks',
+    'os-neutron-dport-id': 'ports',
+    'os-neutron-port-id': 'ports',
+    'os-neutron-router-id': 'routers',
+    'os-neutron-rport-id': 'ports',
+}
+
+# deletion order, collections of one stage are deleted concurrently;
+# tier0 side of router link can be deleted only after tier1 side
+STAGES = (
+    ('logical_ports',),
+    ('logical_router_ports',),
+    ('tier0_router_link_ports',),
+    ('logical_routers', 'logical_switches', 'dhcp_servers'),
+)
+
+# stage collection => collection of NEUTRON_OBJECTS, if they differ
+COLLECTIONS = {
+    'tier0_router_link_ports': 'logical_router_ports',
+}
+
+# query of DELETE request per collection
+DELETE_PARAMS = {
+    'logical_ports': {'detach': 'true'},
+}
+
+
+class RateLimiter(object):
+    """Let at most rate calls of wait() return per second."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0
+        self._next = time.time()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.time()
+            slot = max(self._next, now)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def neutron_ids(neutron, page_size=1000):
+    """Return dict neutron resource => set of ids of existing objects."""
+    return dict((resource, set(obj['id'] for obj in
+                               iter_neutron(neutron, resource, page_size)))
+                for resource in set(NEUTRON_SCOPES.values()))
+
+
+def garbage_reason(obj, tenants, existing):
+    """Return why NSX-T object is garbage by its tags, or None."""
+    for tag in obj.get('tags') or []:
+        scope, value = tag.get('scope'), tag.get('tag')
+        if scope == 'os-project-name' and value in tenants:
+            return 'test tenant {0}'.format(value)
+        if existing is not None and scope in NEUTRON_SCOPES and \
+                value not in existing[NEUTRON_SCOPES[scope]]:
+            return 'deleted {0} {1}'.format(NEUTRON_SCOPES[scope], value)
+    return None
+
+
+class Plan(object):
+    """NSX-T objects to delete grouped by collection."""
+
+    def __init__(self):
+        # collection => list of (id, display_name, reason)
+        self.objects = dict((c, []) for stage in STAGES for c in stage)
+
+    def add(self, collection, obj, reason):
+        self.objects[collection].append(
+            (obj['id'], obj.get('display_name'), reason))
+
+    def __len__(self):
+        return sum(len(objects) for objects in self.objects.values())
+
+    def report(self):
+        """Return lines of dry-run report in deletion order."""
+        lines = ['{0} NSX-T objects to delete'.format(len(self))]
+        for number, stage in enumerate(STAGES, 1):
+            for collection in stage:
+                for obj_id, name, reason in self.objects[collection]:
+                    lines.append('{0}. {1} {2} ({3}): {4}'.format(
+                        number, collection, obj_id, name, reason))
+        return lines
+
+
+def collect(client, neutron=None, tenants=()):
+    """Find NSX-T objects left by tests.
+
+    Object is garbage if it is tagged with one of test tenants, or, when
+    neutron client is given, with id of neutron object which does not
+    exist. Ports and router ports of garbage switches and routers, and
+    router ports linked to garbage ones, are garbage as well.
+
+    Use neutron only when NSX-T manager is not shared with other clouds,
+    their objects would be garbage for this neutron.
+
+    :return: Plan
+    """
+    existing = neutron_ids(neutron) if neutron is not None else None
+    objects = client.fetch_all(dict(
+        (c, NEUTRON_OBJECTS[c]) for stage in STAGES for c in stage
+        if c not in COLLECTIONS))
+    plan = Plan()
+    garbage = set()
+
+    def mark(collection, obj, reason):
+        garbage.add(obj['id'])
+        plan.add(collection, obj, reason)
+
+    for collection in ('logical_switches', 'logical_routers',
+                       'dhcp_servers'):
+        for obj in objects[collection]:
+            reason = garbage_reason(obj, tenants, existing)
+            if reason:
+                mark(collection, obj, reason)
+
+    for obj in objects['logical_ports']:
+        reason = garbage_reason(obj, tenants, existing)
+        if reason is None and obj.get('logical_switch_id') in garbage:
+            reason = 'on logical switch {0}'.format(obj['logical_switch_id'])
+        if reason:
+            mark('logical_ports', obj, reason)
+
+    # router link on tier0 is linked to port of garbage tier1 router, so
+    # repeat until no more ports are found
+    ports = objects['logical_router_ports']
+    found = True
+    while found:
+        found = False
+        for obj in ports:
+            if obj['id'] in garbage:
+                continue
+            reason = garbage_reason(obj, tenants, existing)
+            for field in ('logical_router_id', 'linked_logical_switch_port_id',
+                          'linked_logical_router_port_id'):
+                if reason is None and obj.get(field) in garbage:
+                    reason = '{0} {1}'.format(field, obj[field])
+            if reason:
+                mark('tier0_router_link_ports'
+                     if obj.get('resource_type') == 'RouterLinkPortOnTIER0'
+                     else 'logical_router_ports', obj, reason)
+                found = True
+    return plan
+
+
+def delete(client, plan, rate=10, workers=4):
+    """Delete objects of plan stage by stage.
+
+    Deletes of one stage run concurrently, at most rate per second.
+
+    :return: list of (collection, id, error) which failed
+    """
+    limiter = RateLimiter(rate)
+    errors = []
+    lock = threading.Lock()
+
+    def delete_one(item):
+        collection, obj_id = item
+        limiter.wait()
+        try:
+            client.delete('{0}/{1}'.format(
+                NEUTRON_OBJECTS[COLLECTIONS.get(collection, collection)],
+                obj_id), DELETE_PARAMS.get(collection))
+        except Exception as e:
+            with lock:
+                errors.append((collection, obj_id, str(e)))
+
+    pool = ThreadPool(workers)
+    try:
+        for stage in STAGES:
+            pool.map(delete_one, [(collection, obj[0])
+                                  for collection in stage
+                                  for obj in plan.objects[collection]])
+    finally:
+        pool.close()
+        pool.join()
+    return errors
@@ -0,0 +1,196 @@
+"""Copyright 2016 Mirantis, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may
+not use this file except in compliance with the License. You may obtain
+copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+License for the specific language governing permissions and limitations
+under the License.
+"""
+
+import threading
+from multiprocessing.pool import ThreadPool
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    from requests.packages.urllib3 import disable_warnings
+except ImportError:
+    from urllib3 import disable_warnings
+
+
+# neutron objects on NSX-T backend, name => collection path
+NEUTRON_OBJECTS = {
+    'logical_switches': '/api/v1/logical-switches',
+    'logical_ports': '/api/v1/logical-ports',
+    'logical_routers': '/api/v1/logical-routers',
+    'logical_router_ports': '/api/v1/logical-router-ports',
+    'dhcp_servers': '/api/v1/dhcp/servers',
+    'firewall_sections': '/api/v1/firewall/sections',
+}
+
+
+class NSXtClient(object):
+    """NSX-T manager API client for checks of backend state.
+
+    Keeps pool of keep-alive HTTPS connections to every manager, goes to
+    the next manager when one does not answer, streams collections page
+    by page and revalidates repeated GETs with ETag.
+    """
+
+    def __init__(self, managers, username, password, verify=False,
+                 pool_size=10, timeout=30, page_size=1000):
+        """Create client.
+
+        :param managers: list or comma separated string of 'host[:port]'
+        :param username: NSX-T manager user
+        :param password: NSX-T manager password
+        :param verify: verify manager certificate, path to CA bundle or
+                       False
+        :param pool_size: connections to each manager, at least number
+                          of threads which use client
+        :param timeout: seconds to wait for connect and response
+        :param page_size: objects in one page of collection
+        :raises ValueError: if there is no manager
+        """
+        if not isinstance(managers, (list, tuple)):
+            managers = (managers or '').split(',')
+        self.managers = [m.strip().split('://')[-1] for m in managers
+                         if m.strip()]
+        if not self.managers:
+            raise ValueError('No NSX-T manager is given')
+        self.timeout = timeout
+        self.page_size = page_size
+        self.verify = verify
+        self.session = requests.Session()
+        self.session.auth = (username, password)
+        self.session.headers.update({'Accept': 'application/json',
+                                     'Content-Type': 'application/json'})
+        adapter = HTTPAdapter(pool_connections=len(self.managers),
+                              pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        if not verify:
+            disable_warnings()
+        # (path, params) => (etag, parsed body)
+        self._etags = {}
+        self._lock = threading.Lock()
+
+    def request(self, method, path, **kwargs):
+        """Send request to the first manager which answers.
+
+        :return: requests.Response, raises HTTPError for 4xx/5xx
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        # session.verify is overridden by REQUESTS_CA_BUNDLE from environment
+        kwargs.setdefault('verify', self.verify)
+        error = None
+        for manager in list(self.managers):
+            url = 'https://{0}{1}'.format(manager, path)
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except requests.ConnectionError as e:
+                error = e
+                # try this manager last next time
+                with self._lock:
+                    if manager in self.managers:
+                        self.managers.remove(manager)
+                        self.managers.append(manager)
+                continue
+            if response.status_code != 304:
+                response.raise_for_status()
+            return response
+        raise error
+
+    def get(self, path, params=None):
+        """GET with conditional request if response was seen before."""
+        key = (path, tuple(sorted((params or {}).items())))
+        with self._lock:
+            cached = self._etags.get(key)
+        headers = {'If-None-Match': cached[0]} if cached else {}
+        response = self.request('GET', path, params=params, headers=headers)
+        if response.status_code == 304:
+            return cached[1]
+        body = response.json()
+        etag = response.headers.get('ETag')
+        if etag:
+            with self._lock:
+                self._etags[key] = (etag, body)
+        return body
+
+    def post(self, path, body):
+        return self.request('POST', path, json=body).json()
+
+    def delete(self, path, params=None):
+        self.request('DELETE', path, params=params)
+
+    def iter_objects(self, path, **params):
+        """Yield objects of collection following pagination cursor.
+
+        Only one page is kept in memory.
+        """
+        params = dict(params)
+        params.setdefault('page_size', self.page_size)
+        while True:
+            page = self.request('GET', path, params=params).json()
+            for obj in page.get('results', []):
+                yield obj
+            cursor = page.get('cursor')
+            if not cursor:
+                return
+            params['cursor'] = cursor
+
+    def count(self, path, **params):
+        """Number of objects in collection by the first page."""
+        params['page_size'] = 1
+        return self.get(path, params)['result_count']
+
+    def find_by_tag(self, path, scope, tag=None, **params):
+        """Yield objects of collection with tag of scope (and value)."""
+        for obj in self.iter_objects(path, **params):
+            for obj_tag in obj.get('tags') or []:
+                if obj_tag.get('scope') == scope and \
+                        (tag is None or obj_tag.get('tag') == tag):
+                    yield obj
+                    break
+
+    def fetch_all(self, collections=None, workers=4):
+        """Read several collections at once.
+
+        :param collections: dict name => path, NEUTRON_OBJECTS by default
+        :return: dict name => list of objects
+        """
+        collections = collections or NEUTRON_OBJECTS
+        names = sorted(collections)
+        pool = ThreadPool(min(workers, len(names)))
+        try:
+            results = pool.map(
+                lambda name: list(self.iter_objects(collections[name])),
+                names)
+        finally:
+            pool.close()
+            pool.join()
+        return dict(zip(names, results))
+
+    def logical_switches(self, **params):
+        return self.iter_objects(NEUTRON_OBJECTS['logical_switches'],
+                                 **params)
+
+    def logical_ports(self, **params):
+        return self.iter_objects(NEUTRON_OBJECTS['logical_ports'], **params)
+
+    def logical_routers(self, **params):
+        return self.iter_objects(NEUTRON_OBJECTS['logical_routers'],
+                                 **params)
+
+    def firewall_sections(self, **params):
+        return self.iter_objects(NEUTRON_OBJECTS['firewall_sections'],
+                                 **params)
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,34 @@
+"""Copyright 2016 Mirantis, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may
+not use this file except in compliance with the License. You may obtain
+copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+License for the specific language governing permissions and limitations
+under the License.
+"""
+
+import json
+import os
+import subprocess
+
+
+NSXT_MODULE_LIB = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    '..', '..', 'deployment_scripts', 'puppet', 'modules', 'nsxt', 'lib')
+
+
+def run_ruby(script, *args):
+    """Run ruby script with nsxt module lib in load path, parse JSON out.
+
+    Provider helpers of puppet_x do not need puppet, so tests drive them
+    with plain ruby against local fakes.
+    """
+    out = subprocess.check_output(
+        ['ruby', '-I', NSXT_MODULE_LIB, '-e', script] + list(args))
+    return json.loads(out.decode('utf-8'))
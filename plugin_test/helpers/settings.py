@@ -40,6 +40,24 @@ NSXT_PLUGIN_PATH = os.environ.get('NSXT_PLUGIN_PATH')
 NSXT_PLUGIN_VERSION = os.environ.get('NSXT_PLUGIN_VERSION', '1.0.0')
 NSXT_MANAGERS_IP = os.environ.get('NSXT_MANAGERS_IP')
 NSXT_USER = os.environ.get('NSXT_USER')
+NSXT_PASSWORD = os.environ.get('NSXT_PASSWORD')
+
+# nsx.ini client settings grid and workload of nsxt_benchmark tests
+BENCHMARK_CONCURRENT_CONNECTIONS = os.environ.get(
+    'NSXT_BENCHMARK_CONCURRENT_CONNECTIONS', '5,10,20,40')
+BENCHMARK_CONN_IDLE_TIMEOUT = os.environ.get(
+    'NSXT_BENCHMARK_CONN_IDLE_TIMEOUT', '10,30')
+BENCHMARK_HTTP_TIMEOUT = os.environ.get('NSXT_BENCHMARK_HTTP_TIMEOUT', '10')
+BENCHMARK_ITERATIONS = int(os.environ.get('NSXT_BENCHMARK_ITERATIONS', 100))
+BENCHMARK_CONCURRENCY = int(os.environ.get('NSXT_BENCHMARK_CONCURRENCY', 20))
+BENCHMARK_RESULTS = os.environ.get('NSXT_BENCHMARK_RESULTS',
+                                   'nsxt-benchmark.jsonl')
+
+# NSX-T objects of these tenants are removed by nsxt_garbage_collect
+GC_TENANTS = os.environ.get('NSXT_GC_TENANTS',
+                            'test_tenant,test_1,test_2').split(',')
+GC_DRY_RUN = get_var_as_bool(os.environ.get('NSXT_GC_DRY_RUN'), True)
+GC_RATE = float(os.environ.get('NSXT_GC_RATE', 10))
 
 
 assigned_networks = {
@@ -58,8 +76,10 @@ cluster_settings = {
 plugin_configuration = {
     'insecure/value': get_var_as_bool(os.environ.get('NSXT_INSECURE'), True),
     'nsx_api_managers/value': NSXT_MANAGERS_IP,
+    'repo_distribution/value': os.environ.get('NSXT_REPO_DISTRIBUTION',
+                                              'primary-controller'),
     'nsx_api_user/value': NSXT_USER,
-    'nsx_api_password/value': os.environ.get('NSXT_PASSWORD'),
+    'nsx_api_password/value': NSXT_PASSWORD,
     'default_overlay_tz_uuid/value': os.environ.get('NSXT_OVERLAY_TZ_UUID'),
     'default_vlan_tz_uuid/value': os.environ.get('NSXT_VLAN_TZ_UUID'),
     'default_tier0_router_uuid/value': os.environ.get(
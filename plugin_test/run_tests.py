@@ -47,6 +47,13 @@ def import_tests():
     from tests import test_plugin_integration  # noqa
     from tests import test_plugin_scale  # noqa
     from tests import test_plugin_failover  # noqa
+    from tests import test_plugin_registration  # noqa
+    from tests import test_plugin_packages  # noqa
+    from tests import test_plugin_tasks  # noqa
+    from tests import test_plugin_client  # noqa
+    from tests import test_plugin_benchmark  # noqa
+    from tests import test_plugin_consistency  # noqa
+    from tests import test_plugin_garbage  # noqa
 
 
 def run_tests():
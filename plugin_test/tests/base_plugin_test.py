@@ -13,17 +13,24 @@ License for the specific language governing permissions and limitations
 under the License.
 """
 
+import json
 import os
 
 from devops.helpers.ssh_client import SSHAuth
 from proboscis.asserts import assert_true
 
 from fuelweb_test import logger
+from fuelweb_test.helpers import os_actions
 from fuelweb_test.helpers import utils
 from fuelweb_test.helpers.utils import pretty_log
 from fuelweb_test.tests.base_test_case import TestBasic
+from fuelweb_test.settings import SERVTEST_PASSWORD
+from fuelweb_test.settings import SERVTEST_TENANT
+from fuelweb_test.settings import SERVTEST_USERNAME
 from fuelweb_test.settings import SSH_IMAGE_CREDENTIALS
+from helpers import consistency
 from helpers import settings
+from helpers.nsxt_client import NSXtClient
 
 cirros_auth = SSHAuth(**SSH_IMAGE_CREDENTIALS)
 
@@ -36,6 +43,32 @@ class TestNSXtBase(TestBasic):
         self.vcenter_az = 'vcenter'
         self.vmware_image = 'TestVM-VMDK'
 
+    def get_nsxt_client(self):
+        """Return client of NSX-T managers from plugin settings."""
+        return NSXtClient(self.default.NSXT_MANAGERS_IP,
+                          self.default.NSXT_USER,
+                          self.default.NSXT_PASSWORD)
+
+    def check_backend_consistency(self, cluster_id):
+        """Check that neutron objects of cluster match NSX-T backend.
+
+        :param cluster_id: type int, id of cluster
+        """
+        os_conn = os_actions.OpenStackActions(
+            self.fuel_web.get_public_vip(cluster_id),
+            SERVTEST_USERNAME,
+            SERVTEST_PASSWORD,
+            SERVTEST_TENANT)
+        client = self.get_nsxt_client()
+        try:
+            reports = consistency.check(os_conn.neutron, client)
+        finally:
+            client.close()
+        consistency.log_reports(reports)
+        inconsistent = [str(r) for r in reports if not r.consistent]
+        assert_true(not inconsistent,
+                    'Backend is not consistent: {0}'.format(inconsistent))
+
     def get_configured_clusters(self, node_ip):
         """Get configured vcenter clusters moref id on controller.
 
@@ -48,6 +81,45 @@ class TestNSXtBase(TestBasic):
                                                   cmd=cmd).stdout
         return (clusters_id[-1]).rstrip().split(',')
 
+    def get_nsx_config(self, node_ip, section='nsx_v3'):
+        """Return dict of settings of section of nsx.ini on node.
+
+        :param node_ip: type string, ip of node
+        :param section: type string, name of ini section
+        """
+        cmd = r"sed -n '/^\[{0}\]/,/^\[/p' " \
+              "/etc/neutron/plugins/vmware/nsx.ini".format(section)
+        lines = self.ssh_manager.check_call(ip=node_ip, command=cmd).stdout
+        config = {}
+        for line in lines:
+            name, sep, value = line.partition('=')
+            if sep and not name.strip().startswith('#'):
+                config[name.strip()] = value.strip()
+        return config
+
+    def get_neutron_server_pids(self, cluster_id):
+        """Return dict controller ip => pid of neutron server main process.
+
+        :param cluster_id: type int, id of cluster
+        """
+        controllers = self.fuel_web.get_nailgun_cluster_nodes_by_roles(
+            cluster_id, ['controller'])
+        pids = {}
+        for node in controllers:
+            pids[node['ip']] = ''.join(self.ssh_manager.check_call(
+                ip=node['ip'],
+                command='pgrep -o -f /usr/bin/neutron-server').stdout).strip()
+        return pids
+
+    def get_package_install_records(self, ip):
+        """Return records of /var/log/nsx-t-package-install.log of node.
+
+        :param ip: type str, ip of node
+        """
+        cmd = 'cat /var/log/nsx-t-package-install.log 2>/dev/null || true'
+        out = self.ssh_manager.check_call(ip=ip, command=cmd).stdout
+        return [json.loads(line) for line in out if line.strip()]
+
     def install_nsxt_plugin(self):
         """Download and install NSX-T plugin on master node.
 
@@ -0,0 +1,156 @@
+"""Copyright 2016 Mirantis, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may
+not use this file except in compliance with the License. You may obtain
+copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+License for the specific language governing permissions and limitations
+under the License.
+"""
+
+from proboscis import test
+from proboscis.asserts import assert_equal
+
+from fuelweb_test import logger
+from fuelweb_test.helpers import os_actions
+from fuelweb_test.helpers.decorators import log_snapshot_after_test
+from fuelweb_test.settings import DEPLOYMENT_MODE
+from fuelweb_test.settings import SERVTEST_PASSWORD
+from fuelweb_test.settings import SERVTEST_TENANT
+from fuelweb_test.settings import SERVTEST_USERNAME
+from helpers import benchmark
+from helpers import settings
+from helpers.fake_nsxt import FakeNsxtManager
+from tests.base_plugin_test import TestNSXtBase
+from tests.test_plugin_nsxt import TestNSXtSmoke
+
+
+def benchmark_grid():
+    """nsx.ini client settings grid from NSXT_BENCHMARK_* variables."""
+    return benchmark.parameter_grid(
+        concurrent_connections=benchmark.parse_axis(
+            settings.BENCHMARK_CONCURRENT_CONNECTIONS, '10'),
+        conn_idle_timeout=benchmark.parse_axis(
+            settings.BENCHMARK_CONN_IDLE_TIMEOUT, '10'),
+        http_timeout=benchmark.parse_axis(
+            settings.BENCHMARK_HTTP_TIMEOUT, '10'))
+
+
+def log_records(records):
+    for record in records:
+        total = record['results']['total']
+        logger.info(
+            '{params}: {throughput} ops/s, p50 {p50:.3f}s, p95 {p95:.3f}s, '
+            'p99 {p99:.3f}s, {errors} errors'.format(
+                params=record['params'], **total))
+
+
+@test(groups=['nsxt_benchmark'])
+class TestNSXtBenchmark(TestNSXtBase):
+    """Sweep of nsx.ini client settings under fixed workload."""
+
+    @test(groups=['nsxt_benchmark_fake'])
+    def nsxt_benchmark_fake(self):
+        """Benchmark NSX client settings against local fake NSX-T manager.
+
+        Scenario:
+            1. Start fake NSX-T manager with 10 ms latency per request.
+            2. For every point of concurrent_connections,
+               conn_idle_timeout and http_timeout grid create and delete
+               logical switch, port and router in every iteration of
+               workload at set concurrency.
+            3. Record throughput and p50/p95/p99 latency of every point.
+            4. Check that workload completed without errors.
+
+        Duration: 5 min
+        """
+        self.show_step(1)
+        with FakeNsxtManager(latency=0.01) as manager:
+            self.show_step(2)
+            driver = benchmark.NsxtApiDriver([manager.address],
+                                             'admin', 'admin')
+            records = benchmark.sweep(driver, benchmark_grid(),
+                                      settings.BENCHMARK_ITERATIONS,
+                                      settings.BENCHMARK_CONCURRENCY,
+                                      settings.BENCHMARK_RESULTS)
+
+        self.show_step(3)
+        log_records(records)
+
+        self.show_step(4)
+        for record in records:
+            assert_equal(record['results']['total']['errors'], 0,
+                         'Workload failed with {0}'.format(record['params']))
+
+    @test(depends_on=[TestNSXtSmoke.nsxt_install],
+          groups=['nsxt_benchmark_lab'])
+    @log_snapshot_after_test
+    def nsxt_benchmark_lab(self):
+        """Benchmark NSX client settings of neutron against NSX-T manager.
+
+        Scenario:
+            1. Upload the plugin to master node.
+            2. Create cluster.
+            3. Add nodes with the following roles:
+                * controller
+                * compute
+            4. Configure NSX-T for that cluster.
+            5. Deploy cluster with plugin.
+            6. For every point of concurrent_connections,
+               conn_idle_timeout and http_timeout grid set values in
+               nsx.ini, restart neutron-server and create and delete
+               network, port and router in every iteration of workload
+               at set concurrency.
+            7. Record throughput and p50/p95/p99 latency of every point.
+
+        Duration: 120 min
+        """
+        self.show_step(1)
+        self.env.revert_snapshot('nsxt_install')
+
+        self.show_step(2)
+        cluster_id = self.fuel_web.create_cluster(
+            name=self.__class__.__name__,
+            mode=DEPLOYMENT_MODE,
+            settings=self.default.cluster_settings,
+            configure_ssl=False)
+
+        self.show_step(3)
+        self.fuel_web.update_nodes(
+            cluster_id,
+            {'slave-01': ['controller'],
+             'slave-02': ['compute']}
+        )
+
+        self.reconfigure_cluster_interfaces(cluster_id)
+
+        self.show_step(4)
+        self.enable_plugin(cluster_id)
+
+        self.show_step(5)
+        self.fuel_web.deploy_cluster_wait(cluster_id)
+
+        self.show_step(6)
+        os_conn = os_actions.OpenStackActions(
+            self.fuel_web.get_public_vip(cluster_id),
+            SERVTEST_USERNAME,
+            SERVTEST_PASSWORD,
+            SERVTEST_TENANT)
+        controllers = self.fuel_web.get_nailgun_cluster_nodes_by_roles(
+            cluster_id, ['controller'])
+        driver = benchmark.NeutronDriver(os_conn, self.ssh_manager,
+                                         [node['ip'] for node in controllers])
+        grid = benchmark_grid()
+        records = benchmark.sweep(driver, grid,
+                                  settings.BENCHMARK_ITERATIONS,
+                                  settings.BENCHMARK_CONCURRENCY,
+                                  settings.BENCHMARK_RESULTS, target='lab')
+
+        self.show_step(7)
+        log_records(records)
+        assert_equal(len(records), len(grid))
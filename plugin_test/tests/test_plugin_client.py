@@ -0,0 +1,80 @@
+"""Copyright 2016 Mirantis, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may
+not use this file except in compliance with the License. You may obtain
+copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+License for the specific language governing permissions and limitations
+under the License.
+"""
+
+from proboscis import test
+from proboscis.asserts import assert_equal
+from proboscis.asserts import assert_raises
+
+from helpers.fake_nsxt import FakeNsxtManager
+from helpers.nsxt_client import NEUTRON_OBJECTS
+from helpers.nsxt_client import NSXtClient
+
+
+@test(groups=['nsxt_providers', 'nsxt_client'])
+class TestNSXtClient(object):
+    """NSX-T API client of backend state checks against local fake."""
+
+    @test(groups=['nsxt_client_backend_state'])
+    def nsxt_client_backend_state(self):
+        """Check NSX-T client used for backend state checks.
+
+        Scenario:
+            1. Start fake NSX-T manager with pages of 1000 objects,
+               2500 logical switches, every 10th tagged with neutron
+               network id, 10 logical routers and 3 logical ports.
+            2. Stream logical switches and check that all of them are
+               read with 3 page requests.
+            3. Check that tagged logical switches are found by tag.
+            4. Read all neutron object collections at once.
+            5. Count logical switches twice and check that the second
+               count is revalidated with ETag.
+            6. Check that client without managers is not created.
+
+        Duration: 1 min
+        """
+        def neutron_tag(i):
+            if i % 10:
+                return []
+            return [{'scope': 'os-neutron-net-id',
+                     'tag': 'net-{0}'.format(i)}]
+
+        with FakeNsxtManager() as manager:
+            manager.add_objects('logical-switches', 2500, neutron_tag)
+            manager.add_objects('logical-routers', 10)
+            manager.add_objects('logical-ports', 3)
+            client = NSXtClient(manager.address, 'admin', 'admin')
+            switches = NEUTRON_OBJECTS['logical_switches']
+
+            assert_equal(sum(1 for _ in client.logical_switches()), 2500)
+            assert_equal(manager.requests[switches], 3)
+
+            tagged = list(client.find_by_tag(switches, 'os-neutron-net-id'))
+            assert_equal(len(tagged), 250)
+            assert_equal(len(list(client.find_by_tag(
+                switches, 'os-neutron-net-id', 'net-10'))), 1)
+
+            objects = client.fetch_all()
+            assert_equal(len(objects['logical_switches']), 2500)
+            assert_equal(len(objects['logical_routers']), 10)
+            assert_equal(len(objects['logical_ports']), 3)
+            assert_equal(len(objects['firewall_sections']), 0)
+
+            assert_equal(client.count(switches), 2500)
+            assert_equal(client.count(switches), 2500)
+            assert_equal(manager.not_modified, 1)
+            client.close()
+
+        assert_raises(ValueError, NSXtClient, '', 'admin', 'admin')
+        assert_raises(ValueError, NSXtClient, None, 'admin', 'admin')
@@ -0,0 +1,144 @@
+"""Copyright 2016 Mirantis, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may
+not use this file except in compliance with the License. You may obtain
+copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+License for the specific language governing permissions and limitations
+under the License.
+"""
+
+import uuid
+
+from proboscis import SkipTest
+from proboscis import test
+from proboscis.asserts import assert_equal
+from proboscis.asserts import assert_true
+
+from helpers import consistency
+from helpers.fake_neutron import FakeNeutron
+from helpers.fake_nsxt import FakeNsxtManager
+from helpers.nsxt_client import NSXtClient
+from tests.base_plugin_test import TestNSXtBase
+
+
+@test(groups=['nsxt_consistency'])
+class TestNSXtConsistency(TestNSXtBase):
+    """Consistency of neutron objects with NSX-T backend."""
+
+    @test(groups=['nsxt_consistency_fake'])
+    def nsxt_consistency_fake(self):
+        """Check consistency checker against fake NSX-T manager.
+
+        Scenario:
+            1. Generate 100 neutron networks, 100000 ports and 100
+               routers, external network with 10 ports.
+            2. Create tagged NSX-T objects for them on fake NSX-T
+               manager, skip one port, add one logical port tagged with
+               unknown port id, set admin state of one port to DOWN and
+               attach another port to wrong logical switch, create
+               second logical router of the first router.
+            3. Run consistency check.
+            4. Check that two ports are missing, one orphaned and two
+               drifted, both logical routers of the first router are
+               orphaned, networks are consistent.
+
+        Duration: 5 min
+        """
+        self.show_step(1)
+        neutron = FakeNeutron()
+        networks = neutron.objects['networks']
+        ports = neutron.objects['ports']
+        for i in range(100):
+            networks.append({'id': str(uuid.uuid4()),
+                             'name': 'net-{0}'.format(i),
+                             'admin_state_up': True})
+        for i in range(100000):
+            ports.append({'id': str(uuid.uuid4()), 'admin_state_up': True,
+                          'network_id': networks[i % 100]['id']})
+        neutron.objects['routers'] = [{'id': str(uuid.uuid4())}
+                                      for _ in range(100)]
+        external = {'id': str(uuid.uuid4()), 'router:external': True}
+        networks.append(external)
+        ports.extend({'id': str(uuid.uuid4()), 'admin_state_up': True,
+                      'network_id': external['id']} for _ in range(10))
+
+        self.show_step(2)
+        with FakeNsxtManager() as manager:
+            switches = manager.add_objects(
+                'logical-switches', 100,
+                tags=lambda i: [{'scope': 'os-neutron-net-id',
+                                 'tag': networks[i]['id']}],
+                fields=lambda i: {'admin_state': 'UP'})
+
+            def port_fields(i):
+                return {'admin_state': 'DOWN' if i == 1 else 'UP',
+                        'logical_switch_id': switches[(i + (i == 2)) % 100]}
+
+            manager.add_objects(
+                'logical-ports', 100000,
+                tags=lambda i: [{'scope': 'os-neutron-port-id',
+                                 'tag': ports[i]['id'] if i else
+                                 str(uuid.uuid4())}],
+                fields=port_fields)
+            ports.append({'id': str(uuid.uuid4()), 'admin_state_up': True,
+                          'network_id': networks[0]['id']})
+            router_ids = [r['id'] for r in neutron.objects['routers']]
+            routers = manager.add_objects(
+                'logical-routers', 101,
+                tags=lambda i: [{'scope': 'os-neutron-router-id',
+                                 'tag': router_ids[i % 100]}])
+
+            self.show_step(3)
+            client = NSXtClient(manager.address, 'admin', 'admin')
+            reports = dict((report.resource, report) for report in
+                           consistency.check(neutron, client))
+            client.close()
+
+        self.show_step(4)
+        consistency.log_reports(reports.values())
+        assert_true(reports['networks'].consistent,
+                    'Networks are not consistent')
+        assert_equal(reports['routers'].counts,
+                     {'missing': 0, 'orphaned': 2, 'drifted': 0})
+        assert_equal(sorted(p['nsx_id'] for p in
+                            reports['routers'].problems['orphaned']),
+                     sorted([routers[0], routers[100]]))
+        assert_equal(reports['networks'].checked, 100)
+        assert_equal(reports['ports'].checked, 100001)
+        # port 0 is tagged with unknown id: port 0 is missing as well as
+        # the port without logical port
+        assert_equal(reports['ports'].counts,
+                     {'missing': 2, 'orphaned': 1, 'drifted': 2})
+        drifted = dict((p['id'], p['fields'])
+                       for p in reports['ports'].problems['drifted'])
+        assert_equal(sorted(drifted[ports[1]['id']]), ['admin_state_up'])
+        assert_equal(sorted(drifted[ports[2]['id']]), ['logical_switch_id'])
+
+    @test(groups=['nsxt_consistency_lab'])
+    def nsxt_consistency_lab(self):
+        """Check that neutron objects of last cluster match NSX-T backend.
+
+        Tests of nsxt_scale and nsxt_failover groups run the same check
+        at their end on the cluster they leave.
+
+        Scenario:
+            1. Get last created cluster.
+            2. Stream neutron networks, ports and routers and NSX-T
+               logical switches, ports and routers, check that no object
+               is missing, orphaned or drifted.
+
+        Duration: 10 min
+        """
+        self.show_step(1)
+        cluster_id = self.fuel_web.get_last_created_cluster()
+        if cluster_id is None:
+            raise SkipTest('There is no cluster to check')
+
+        self.show_step(2)
+        self.check_backend_consistency(cluster_id)
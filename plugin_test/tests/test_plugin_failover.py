@@ -82,6 +82,7 @@ class TestNSXtFailover(TestNSXtBase):
             6. Create new network and attach it to default router.
             7. Create VMs with new network and check network
                connectivity via ICMP.
+            8. Check that neutron objects match NSX-T backend.
 
         Duration: 180 min
         """
@@ -191,3 +192,6 @@ class TestNSXtFailover(TestNSXtBase):
                                                 '8.8.8.8',
                                                 vip_contr_new),
                         'Ping failed')
+
+        self.show_step(8)  # Check neutron objects match NSX-T backend
+        self.check_backend_consistency(cluster_id)
@@ -0,0 +1,195 @@
+"""Copyright 2016 Mirantis, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may
+not use this file except in compliance with the License. You may obtain
+copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+License for the specific language governing permissions and limitations
+under the License.
+"""
+
+import time
+import uuid
+
+from proboscis import test
+from proboscis.asserts import assert_equal
+from proboscis.asserts import assert_true
+
+from fuelweb_test import logger
+from fuelweb_test.helpers import os_actions
+from fuelweb_test.settings import SERVTEST_PASSWORD
+from fuelweb_test.settings import SERVTEST_TENANT
+from fuelweb_test.settings import SERVTEST_USERNAME
+from helpers import garbage
+from helpers import settings
+from helpers.fake_neutron import FakeNeutron
+from helpers.fake_nsxt import FakeNsxtManager
+from helpers.nsxt_client import NSXtClient
+from tests.base_plugin_test import TestNSXtBase
+
+
+def tag(scope, value):
+    return [{'scope': scope, 'tag': value}]
+
+
+def add_topology(manager, tags, tier0):
+    """Add switch with 2 ports, DHCP server and router linked to tier0.
+
+    :return: dict kind => list of ids of created objects
+    """
+    ids = {}
+    ids['logical-switches'] = manager.add_objects(
+        'logical-switches', 1, tags=lambda i: tags)
+    ids['dhcp/servers'] = manager.add_objects(
+        'dhcp/servers', 1, tags=lambda i: tags)
+    ids['logical-routers'] = manager.add_objects(
+        'logical-routers', 1, tags=lambda i: tags,
+        fields=lambda i: {'router_type': 'TIER1'})
+    ids['logical-ports'] = manager.add_objects(
+        'logical-ports', 2, tags=lambda i: tags,
+        fields=lambda i: {
+            'logical_switch_id': ids['logical-switches'][0],
+            'attachment': {'attachment_type': 'DHCP_SERVICE',
+                           'id': ids['dhcp/servers'][0]} if i == 0 else
+            None})
+    downlink, link = manager.add_objects(
+        'logical-router-ports', 2, tags=lambda i: tags,
+        fields=lambda i: {
+            'resource_type': ('LogicalRouterDownLinkPort',
+                              'RouterLinkPortOnTIER1')[i],
+            'logical_router_id': ids['logical-routers'][0],
+            'linked_logical_switch_port_id': ids['logical-ports'][1]
+            if i == 0 else None})
+    # tier0 side of router link has no tags of neutron
+    tier0_link = manager.add_objects(
+        'logical-router-ports', 1,
+        fields=lambda i: {'resource_type': 'RouterLinkPortOnTIER0',
+                          'logical_router_id': tier0,
+                          'linked_logical_router_port_id': link})
+    manager.objects['logical-router-ports'][link][
+        'linked_logical_router_port_id'] = tier0_link[0]
+    ids['logical-router-ports'] = [downlink, link] + tier0_link
+    return ids
+
+
+@test(groups=['nsxt_garbage'])
+class TestNSXtGarbage(TestNSXtBase):
+    """Removal of NSX-T objects left by tests."""
+
+    @test(groups=['nsxt_garbage_collect_fake'])
+    def nsxt_garbage_collect_fake(self):
+        """Check garbage collector against fake NSX-T manager.
+
+        Scenario:
+            1. Start fake NSX-T manager with tier0 router and three
+               topologies of logical switch with 2 ports, DHCP server and
+               tier1 router linked to tier0: of existing neutron objects,
+               of test tenant and of deleted neutron objects. Tag DHCP
+               port and router downlink port of the first topology with
+               ids of existing neutron ports, as vmware-nsx does.
+            2. Collect garbage in dry-run mode and check that 16 objects
+               of two last topologies are found and nothing is deleted.
+            3. Delete garbage at 20 deletes per second.
+            4. Check that all garbage is deleted without errors, not
+               faster than rate limit, and objects of existing neutron
+               objects and tier0 router are kept.
+
+        Duration: 1 min
+        """
+        self.show_step(1)
+        neutron = FakeNeutron()
+        net_id, port_id, dport_id, rport_id, router_id = [
+            str(uuid.uuid4()) for _ in range(5)]
+        neutron.objects['networks'].append({'id': net_id})
+        neutron.objects['ports'].extend(
+            {'id': obj_id} for obj_id in (port_id, dport_id, rport_id))
+        neutron.objects['routers'].append({'id': router_id})
+
+        with FakeNsxtManager() as manager:
+            tier0 = manager.add_objects(
+                'logical-routers', 1,
+                fields=lambda i: {'router_type': 'TIER0'})[0]
+            kept = add_topology(
+                manager, tag('os-neutron-net-id', net_id) +
+                tag('os-neutron-port-id', port_id) +
+                tag('os-neutron-router-id', router_id) +
+                tag('os-project-name', 'admin'), tier0)
+            manager.objects['logical-ports'][kept['logical-ports'][0]][
+                'tags'] = tag('os-neutron-dport-id', dport_id)
+            manager.objects['logical-router-ports'][
+                kept['logical-router-ports'][0]]['tags'] = (
+                tag('os-neutron-router-id', router_id) +
+                tag('os-neutron-rport-id', rport_id))
+            add_topology(manager, tag('os-project-name', 'test_1'), tier0)
+            add_topology(manager, tag('os-neutron-net-id',
+                                      str(uuid.uuid4())), tier0)
+            client = NSXtClient(manager.address, 'admin', 'admin')
+
+            self.show_step(2)
+            plan = garbage.collect(client, neutron, ['test_1'])
+            for line in plan.report():
+                logger.info(line)
+            assert_equal(len(plan), 16)
+            assert_equal(sum(len(objects) for objects in
+                             manager.objects.values()), 25)
+
+            self.show_step(3)
+            started = time.time()
+            errors = garbage.delete(client, plan, rate=20)
+            elapsed = time.time() - started
+            client.close()
+
+            self.show_step(4)
+            assert_equal(errors, [])
+            assert_true(elapsed >= 15 / 20.0,
+                        'Deleted faster than rate limit: {0}s'.format(
+                            elapsed))
+            left = dict((kind, sorted(objects))
+                        for kind, objects in manager.objects.items()
+                        if objects)
+            kept['logical-routers'].append(tier0)
+            assert_equal(left, dict((kind, sorted(ids))
+                                    for kind, ids in kept.items()))
+
+    @test(groups=['nsxt_garbage_collect'])
+    def nsxt_garbage_collect(self):
+        """Remove NSX-T objects left by tests on NSX-T managers.
+
+        Scenario:
+            1. Collect NSX-T objects tagged with test tenants, and with
+               ids of deleted neutron objects if there is cluster.
+            2. Log report of objects to delete.
+            3. Delete them unless NSXT_GC_DRY_RUN is true.
+
+        Duration: 10 min
+        """
+        self.show_step(1)
+        neutron = None
+        cluster_id = self.fuel_web.get_last_created_cluster()
+        if cluster_id is not None:
+            neutron = os_actions.OpenStackActions(
+                self.fuel_web.get_public_vip(cluster_id),
+                SERVTEST_USERNAME,
+                SERVTEST_PASSWORD,
+                SERVTEST_TENANT).neutron
+        client = self.get_nsxt_client()
+        try:
+            plan = garbage.collect(client, neutron, settings.GC_TENANTS)
+
+            self.show_step(2)
+            for line in plan.report():
+                logger.info(line)
+
+            self.show_step(3)
+            if settings.GC_DRY_RUN:
+                logger.info('Dry run, nothing is deleted')
+                return
+            errors = garbage.delete(client, plan, settings.GC_RATE)
+        finally:
+            client.close()
+        assert_equal(errors, [], 'Failed to delete: {0}'.format(errors))
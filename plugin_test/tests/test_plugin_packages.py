@@ -0,0 +1,182 @@
+"""Copyright 2016 Mirantis, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may
+not use this file except in compliance with the License. You may obtain
+copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+License for the specific language governing permissions and limitations
+under the License.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+
+from proboscis import test
+from proboscis.asserts import assert_equal
+from proboscis.asserts import assert_true
+
+from helpers.fake_nsxt import FakeNsxtManager
+from helpers.ruby import run_ruby
+
+
+FETCH_COMPONENTS = """
+require 'json'
+require 'puppet_x/nsxt/upgrade_service'
+require 'puppet_x/nsxt/downloader'
+manager, url, path, sha256 = ARGV
+service = PuppetX::Nsxt::UpgradeService
+threads = (1..4).map do
+  Thread.new do
+    service.acquire(manager, 'admin', 'admin') do |enabled_on|
+      sleep 0.2
+      service.holders(manager)
+    end
+  end
+end
+holders = threads.map(&:value).max
+checksum = {'algorithm' => 'sha256', 'value' => sha256}
+meta = PuppetX::Nsxt::Downloader.fetch(url, path, checksum)
+enabled = (not service.enabled_on(manager, 'admin', 'admin').nil?)
+puts({'holders' => holders, 'size' => meta['size'],
+      'enabled' => enabled}.to_json)
+"""
+
+GEM_BUNDLE = """
+require 'json'
+require 'puppet_x/nsxt/gem_bundle'
+bundle = ARGV[0]
+result = {'present' => PuppetX::Nsxt::GemBundle.present?(bundle)}
+pending = PuppetX::Nsxt::GemBundle.pending(bundle)
+result['pending'] = pending.map { |entry| entry['package'] }
+File.open(File.join(bundle, 'tar.deb'), 'a') { |file| file.write('x') }
+begin
+  PuppetX::Nsxt::GemBundle.pending(bundle)
+rescue PuppetX::Nsxt::GemBundle::ChecksumError => error
+  result['error'] = error.message
+end
+puts result.to_json
+"""
+
+
+@test(groups=['nsxt_providers', 'nsxt_packages'])
+class TestNSXtPackages(object):
+    """Host components and gem packages installed by plugin on nodes."""
+
+    @test(groups=['nsxt_host_components_download'])
+    def nsxt_host_components_download(self):
+        """Check shared install-upgrade service and resumed download.
+
+        Scenario:
+            1. Start fake NSX-T manager with host components repository.
+            2. Leave first kilobyte of archive as partial download with
+               ETag of archive.
+            3. Acquire install-upgrade service from 4 threads at once
+               and download host components archive.
+            4. Check that service was enabled once, shared by all
+               threads and disabled by the last one.
+            5. Check that download is resumed with single request and
+               archive matches checksum from manifest.
+            6. Leave first kilobyte of other archive as partial download
+               with its ETag and download archive again.
+            7. Check that partial download is discarded and archive
+               matches checksum from manifest.
+
+        Duration: 1 min
+        """
+        def leave_part(path, url, data, etag, size):
+            with open(path + '.part', 'wb') as part:
+                part.write(data[:1024])
+            with open(path + '.part.meta', 'w') as meta:
+                json.dump({'url': url, 'validator': etag, 'size': size},
+                          meta)
+
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            with FakeNsxtManager(repository_port=0) as manager:
+                url = manager.component_url
+                sha256 = hashlib.sha256(manager.component).hexdigest()
+                requests = '/repository/' + manager.component_path()
+                path = os.path.join(tmp_dir, 'nsxt-components.tgz')
+                leave_part(path, url, manager.component,
+                           manager.component_etag(), len(manager.component))
+                result = run_ruby(FETCH_COMPONENTS, manager.address, url,
+                                  path, sha256)
+
+                assert_equal(result['holders'], 4)
+                assert_equal(manager.upgrade_service['toggles'], 2)
+                assert_true(not result['enabled'],
+                            'install-upgrade service must be disabled')
+
+                assert_equal(result['size'], len(manager.component))
+                assert_equal(manager.requests[requests], 1)
+                with open(path, 'rb') as archive:
+                    assert_true(archive.read() == manager.component,
+                                'Archive differs from served one')
+
+                path = os.path.join(tmp_dir, 'stale-components.tgz')
+                stale = os.urandom(len(manager.component))
+                leave_part(path, url, stale, '"stale"', len(stale))
+                result = run_ruby(FETCH_COMPONENTS, manager.address, url,
+                                  path, sha256)
+
+                assert_equal(result['size'], len(manager.component))
+                assert_equal(manager.requests[requests], 2)
+                with open(path, 'rb') as archive:
+                    assert_true(archive.read() == manager.component,
+                                'Stale partial download was resumed')
+                assert_true(not os.path.exists(path + '.part.meta'),
+                            'Meta of partial download was left')
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    @test(groups=['nsxt_gem_bundle'])
+    def nsxt_gem_bundle(self):
+        """Check install plan of offline gem bundle.
+
+        Scenario:
+            1. Create bundle with package installed in the same version,
+               package installed in older version and not installed
+               package.
+            2. Check that only older and not installed packages are to be
+               installed.
+            3. Change file of bundle and check that checksum mismatch is
+               reported.
+
+        Duration: 1 min
+        """
+        def installed(package):
+            return subprocess.check_output(
+                ['dpkg-query', '-W', '-f', '${Version}',
+                 package]).decode('utf-8')
+
+        bundle = tempfile.mkdtemp()
+        try:
+            lock = []
+            for package, version in (('dpkg', installed('dpkg')),
+                                     ('tar', installed('tar') + '.1'),
+                                     ('ruby-nsxt-test', '1.0-1')):
+                name = '{0}.deb'.format(package)
+                with open(os.path.join(bundle, name), 'w') as f:
+                    f.write('{0} {1}'.format(package, version))
+                with open(os.path.join(bundle, name), 'rb') as f:
+                    sha256 = hashlib.sha256(f.read()).hexdigest()
+                lock.append(' '.join((sha256, package, version, name)))
+            with open(os.path.join(bundle, 'bundle.lock'), 'w') as f:
+                f.write('\n'.join(lock) + '\n')
+            result = run_ruby(GEM_BUNDLE, bundle)
+        finally:
+            shutil.rmtree(bundle)
+
+        assert_equal(result['present'], True)
+        assert_equal(result['pending'], ['tar', 'ruby-nsxt-test'])
+        assert_true('tar.deb' in result.get('error', ''),
+                    'Checksum mismatch is not reported')
@@ -0,0 +1,276 @@
+"""Copyright 2016 Mirantis, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may
+not use this file except in compliance with the License. You may obtain
+copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+License for the specific language governing permissions and limitations
+under the License.
+"""
+
+import os
+import shutil
+import tempfile
+import uuid
+
+from proboscis import test
+from proboscis.asserts import assert_equal
+from proboscis.asserts import assert_true
+
+from fuelweb_test import logger
+from helpers.fake_nsxt import FakeNsxtManager
+from helpers.ruby import run_ruby
+
+
+FIND_TRANSPORT_NODE = """
+require 'json'
+require 'puppet_x/nsxt/transport_nodes'
+manager, node_id = ARGV
+find = lambda do
+  PuppetX::Nsxt::TransportNodes.find_id(manager, node_id, 'admin', 'admin', '')
+end
+first = find.call
+second = find.call
+puts({'first' => first, 'second' => second}.to_json)
+"""
+
+REGISTER_NODES = """
+require 'json'
+require 'puppet_x/nsxt/admission'
+manager, window, node_ids = ARGV[0], ARGV[1].to_f, ARGV[2..-1]
+# without window nodes register all at once and give up on first 429
+admission = window > 0
+# one bucket per node, as every node runs its own puppet
+PuppetX::Nsxt::Session.max_connections = 50
+PuppetX::Nsxt::Admission.base_delay = 0.5
+started = Time.now
+threads = node_ids.map do |node_id|
+  Thread.new do
+    bucket = PuppetX::Nsxt::TokenBucket.new(5)
+    request = lambda do |method, path, payload|
+      call = lambda do
+        PuppetX::Nsxt::Session.request(method, "https://#{manager}#{path}",
+                                       'admin', 'admin', '', payload)
+      end
+      admission ? PuppetX::Nsxt::Admission.admit(bucket, &call) : call.call
+    end
+    begin
+      PuppetX::Nsxt::Admission.stagger(window)
+      request.call(:post, '/api/v1/transport-nodes',
+                   {'node_id' => node_id}.to_json)
+      loop do
+        status = request.call(:get, "/api/v1/fabric/nodes/#{node_id}/status",
+                              nil)
+        break if JSON.parse(status.body)['lcp_connectivity_status'] == 'UP'
+        sleep 0.5
+      end
+      {'elapsed' => Time.now - started}
+    rescue StandardError, Timeout::Error => error
+      {'error' => error.message}
+    end
+  end
+end
+puts threads.map(&:value).to_json
+"""
+
+UP_INTERFACES = """
+require 'json'
+require 'puppet_x/nsxt/interfaces'
+interfaces = PuppetX::Nsxt::Interfaces
+root, ifup, deadline, *names = ARGV
+interfaces.config_dir = File.join(root, 'interfaces.d')
+interfaces.sysfs = File.join(root, 'sys')
+interfaces.ifup = ifup
+started = Time.now
+written = interfaces.write_stanzas(names)
+results = interfaces.bring_up(names)
+up = Time.now - started
+down = interfaces.wait_link(names, deadline.to_f)
+puts({'written' => written, 'rewritten' => interfaces.write_stanzas(names),
+      'status' => Hash[results.map { |name, result| [name, result[0]] }],
+      'admin_up' => names.select { |name| interfaces.admin_up?(name) },
+      'down' => down, 'up' => up, 'elapsed' => Time.now - started}.to_json)
+"""
+
+# fake ifup: sets IFF_UP after 1 s, link comes up 1 s later, except of
+# interfaces without carrier
+FAKE_IFUP = """#!/bin/bash
+sys="$(dirname "$0")/sys/$1"
+sleep 1
+echo 0x1003 > "$sys/flags"
+if [ ! -e "$sys/no-carrier" ]; then
+  (sleep 1; echo up > "$sys/operstate") > /dev/null 2>&1 &
+fi
+"""
+
+
+def percentile(values, percent):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100.0))]
+
+
+@test(groups=['nsxt_providers', 'nsxt_registration'])
+class TestNSXtRegistration(object):
+    """Registration of nodes on NSX-T managers against local fakes."""
+
+    @test(groups=['nsxt_transport_node_lookup'])
+    def nsxt_transport_node_lookup(self):
+        """Check transport node lookup with server side filter.
+
+        Scenario:
+            1. Start fake NSX-T manager with 5000 transport nodes.
+            2. Look up transport node id of the last node twice.
+            3. Check that right id is found with single request and
+               the second lookup is served from run cache.
+
+        Duration: 1 min
+        """
+        with FakeNsxtManager(transport_nodes=5000) as manager:
+            node = manager.transport_nodes[-1]
+            result = run_ruby(FIND_TRANSPORT_NODE, manager.address,
+                              node['node_id'])
+            assert_equal(result['first'], node['id'])
+            assert_equal(result['second'], node['id'])
+            assert_equal(manager.requests['/api/v1/transport-nodes'], 1)
+
+    @test(groups=['nsxt_transport_node_lookup_paginated'])
+    def nsxt_transport_node_lookup_paginated(self):
+        """Check transport node lookup on manager without filters.
+
+        Scenario:
+            1. Start fake NSX-T manager with 5000 transport nodes that
+               ignores node_id filter and returns pages of 1000 nodes.
+            2. Look up transport node id of the last node.
+            3. Check that node beyond the first page is found by
+               following pagination cursor.
+            4. Check that lookup of unknown node returns nothing.
+
+        Duration: 1 min
+        """
+        with FakeNsxtManager(transport_nodes=5000, filters=False) as manager:
+            node = manager.transport_nodes[-1]
+            result = run_ruby(FIND_TRANSPORT_NODE, manager.address,
+                              node['node_id'])
+            assert_equal(result['first'], node['id'])
+            assert_equal(manager.requests['/api/v1/transport-nodes'], 5)
+
+            result = run_ruby(FIND_TRANSPORT_NODE, manager.address,
+                              'unknown-node')
+            assert_true(result['first'] is None,
+                        'Unknown node must not be found')
+
+    @test(groups=['nsxt_staggered_registration'])
+    def nsxt_staggered_registration(self):
+        """Check registration of 200 nodes at once on rate limited manager.
+
+        Scenario:
+            1. Start fake NSX-T manager which answers 429 above 50 requests
+               per second and brings LCP of transport node up in 1 s.
+            2. Join 200 nodes to management plane.
+            3. Create their transport nodes at once without admission
+               control and wait for LCP up.
+            4. Check that manager throttled the herd and some nodes failed.
+            5. Remove transport nodes, lower rate limit of manager to 35
+               requests per second, answer next 20 requests with 429 and
+               20 more with 503.
+            6. Create transport nodes again with 20 s start window and
+               admission control of every node.
+            7. Check that all 40 failures were answered, all nodes
+               completed after retries, and log completion time
+               distribution and throttled requests of both runs.
+
+        Duration: 2 min
+        """
+        with FakeNsxtManager(rate_limit=50, converge_after=1) as manager:
+            node_ids = [str(uuid.uuid4()) for _ in range(200)]
+            for node_id in node_ids:
+                manager.register_node(node_id)
+
+            herd = run_ruby(REGISTER_NODES, manager.address, '0', *node_ids)
+            herd_throttled = manager.throttled
+            herd_failed = [r for r in herd if 'error' in r]
+            assert_true(herd_throttled > 0, 'Herd was not throttled')
+            assert_true(herd_failed, 'No node of herd failed')
+
+            for node in list(manager.transport_nodes):
+                manager.delete_transport_node({}, b'', node['id'])
+            manager.throttled = 0
+            manager.rate_limit = 35
+            manager.fail_next(20, code=429)
+            manager.fail_next(20, code=503)
+            staggered = run_ruby(REGISTER_NODES, manager.address, '20',
+                                 *node_ids)
+            failed = [r for r in staggered if 'error' in r]
+            assert_true(manager.throttled > 0,
+                        'Staggered nodes were not throttled')
+            assert_equal(manager.failed, 40)
+            assert_equal(failed, [])
+
+            for name, results, throttled in (
+                    ('herd', herd, herd_throttled),
+                    ('staggered', staggered, manager.throttled)):
+                elapsed = [r['elapsed'] for r in results if 'elapsed' in r]
+                logger.info('{0}: {1}/{2} completed, {3} throttled, '
+                            'p50 {4:.1f}s p90 {5:.1f}s p99 {6:.1f}s '
+                            'max {7:.1f}s'.format(
+                                name, len(elapsed), len(results), throttled,
+                                percentile(elapsed, 50),
+                                percentile(elapsed, 90),
+                                percentile(elapsed, 99), max(elapsed)))
+
+    @test(groups=['nsxt_up_interfaces'])
+    def nsxt_up_interfaces(self):
+        """Check that VTEP interfaces are brought up at once.
+
+        Scenario:
+            1. Create fake sysfs with 4 down interfaces, one of them
+               without carrier, and fake ifup which takes 1 s and link
+               comes up 1 s later.
+            2. Write stanzas of interfaces and bring them up with 4 s
+               deadline for links.
+            3. Check that all ifup ran in parallel, all interfaces are
+               administratively up, and only interface without carrier
+               is reported down at deadline.
+            4. Check that stanzas are not written again.
+
+        Duration: 1 min
+        """
+        names = ['eth{0}'.format(i) for i in range(4)]
+        root = tempfile.mkdtemp()
+        try:
+            os.mkdir(os.path.join(root, 'interfaces.d'))
+            for name in names:
+                sys_dir = os.path.join(root, 'sys', name)
+                os.makedirs(sys_dir)
+                with open(os.path.join(sys_dir, 'flags'), 'w') as f:
+                    f.write('0x1002\n')
+                with open(os.path.join(sys_dir, 'operstate'), 'w') as f:
+                    f.write('down\n')
+            open(os.path.join(root, 'sys', 'eth3', 'no-carrier'), 'w').close()
+            ifup = os.path.join(root, 'ifup')
+            with open(ifup, 'w') as f:
+                f.write(FAKE_IFUP)
+            os.chmod(ifup, 0o755)
+            result = run_ruby(UP_INTERFACES, root, ifup, '4', *names)
+            with open(os.path.join(root, 'interfaces.d', 'ifcfg-eth0')) as f:
+                stanza = f.read()
+        finally:
+            shutil.rmtree(root)
+
+        assert_equal(result['written'], names)
+        assert_equal(result['rewritten'], [])
+        assert_equal(stanza, 'auto eth0\niface eth0 inet manual')
+        assert_equal(result['status'], dict((name, 0) for name in names))
+        assert_equal(result['admin_up'], names)
+        assert_equal(result['down'], ['eth3'])
+        # serial ifup would take 4 s
+        assert_true(result['up'] < 2,
+                    'ifup did not run in parallel: {0:.1f}s'.format(
+                        result['up']))
+        logger.info('4 interfaces up in {0:.1f}s, links waited until '
+                    '{1:.1f}s'.format(result['up'], result['elapsed']))
@@ -14,10 +14,14 @@ under the License.
 """
 
 import itertools
+import json
+from collections import defaultdict
 
 from proboscis import test
+from proboscis.asserts import assert_equal
 from proboscis.asserts import assert_true
 
+from fuelweb_test import logger
 from fuelweb_test.helpers import os_actions
 from fuelweb_test.helpers.decorators import log_snapshot_after_test
 from fuelweb_test.settings import DEPLOYMENT_MODE
@@ -29,6 +33,23 @@ from helpers import openstack as os_help
 from tests.base_plugin_test import TestNSXtBase
 
 
+def fusion_saving(records):
+    """Return dict fused task => estimated seconds saved on node.
+
+    Estimate is puppet load time of the first section times number of
+    other sections, which separate tasks would load puppet for; it is not
+    compared with deployment of separate tasks.
+
+    :param records: dicts of /var/log/nsx-t-task-timing.log of one node
+    """
+    sections = defaultdict(list)
+    for record in records:
+        sections[record['task']].append(record)
+    # separate tasks would load puppet once per section
+    return dict((task, task_records[0]['setup'] * (len(task_records) - 1))
+                for task, task_records in sections.items())
+
+
 @test(groups=['nsxt_plugin', 'nsxt_scale'])
 class TestNSXtScale(TestNSXtBase):
     """Tests from test plan that have been marked as 'Automated'."""
@@ -63,6 +84,7 @@ class TestNSXtScale(TestNSXtBase):
             15. Redeploy cluster.
             16. Check that all instances are in place.
             17. Run OSTF.
+            18. Check that neutron objects match NSX-T backend.
 
         Duration: 180 min
         """
@@ -139,6 +161,9 @@ class TestNSXtScale(TestNSXtBase):
         self.show_step(17)  # Run OSTF
         self.fuel_web.run_ostf(cluster_id)
 
+        self.show_step(18)  # Check neutron objects match NSX-T backend
+        self.check_backend_consistency(cluster_id)
+
     @test(depends_on=[SetupEnvironment.prepare_slaves_5],
           groups=['nsxt_add_delete_compute_node'])
     @log_snapshot_after_test
@@ -164,12 +189,16 @@ class TestNSXtScale(TestNSXtBase):
             8. Launch KVM vm.
             9. Add node with compute role.
             10. Redeploy cluster.
-            11. Check that instance is in place.
+            11. Check that instance is in place and neutron server was not
+                restarted on controllers. Check that nsx packages were
+                installed in at most two transactions on every compute and
+                log their wall time.
             12. Run OSTF.
             13. Remove node with compute role.
             14. Redeploy cluster.
             15. Check that instance is in place.
             16. Run OSTF.
+            17. Check that neutron objects match NSX-T backend.
 
         Duration: 180min
         """
@@ -214,14 +243,30 @@ class TestNSXtScale(TestNSXtBase):
         os_help.create_instance(os_conn)
 
         self.show_step(9)  # Add node with compute role
+        neutron_pids = self.get_neutron_server_pids(cluster_id)
         self.fuel_web.update_nodes(cluster_id, {'slave-05': ['compute']})
         self.reconfigure_cluster_interfaces(cluster_id)
 
         self.show_step(10)  # Redeploy cluster
         self.fuel_web.deploy_cluster_wait(cluster_id)
 
-        self.show_step(11)  # Check that instance is in place
+        # Check that instance is in place and neutron server kept running
+        self.show_step(11)
         os_help.check_instances_state(os_conn)
+        assert_equal(self.get_neutron_server_pids(cluster_id), neutron_pids,
+                     'Neutron server was restarted on existing controllers')
+        # existing compute installed packages on first deployment only
+        for node in self.fuel_web.get_nailgun_cluster_nodes_by_roles(
+                cluster_id, ['compute']):
+            records = self.get_package_install_records(node['ip'])
+            installs = [r for r in records if r['installed']]
+            assert_true(0 < len(installs) <= 2,
+                        'Packages of {0} were installed in {1} '
+                        'transactions'.format(node['name'], len(installs)))
+            for record in records:
+                logger.info('{0} {1}: {2} of {3} packages in {4}s'.format(
+                    node['name'], record['section'], record['installed'],
+                    record['packages'], record['elapsed']))
 
         self.show_step(12)  # Run OSTF
         self.fuel_web.run_ostf(cluster_id)
@@ -240,6 +285,9 @@ class TestNSXtScale(TestNSXtBase):
         self.show_step(16)  # Run OSTF
         self.fuel_web.run_ostf(cluster_id)
 
+        self.show_step(17)  # Check neutron objects match NSX-T backend
+        self.check_backend_consistency(cluster_id)
+
     @test(depends_on=[SetupEnvironment.prepare_slaves_5],
           groups=['nsxt_add_delete_compute_vmware_node'])
     @log_snapshot_after_test
@@ -274,6 +322,7 @@ class TestNSXtScale(TestNSXtBase):
             16. Reconfigure vcenter compute clusters.
             17. Redeploy cluster.
             18. Run OSTF.
+            19. Check that neutron objects match NSX-T backend.
 
         Duration: 240 min
         """
@@ -373,3 +422,95 @@ class TestNSXtScale(TestNSXtBase):
 
         self.show_step(18)  # Run OSTF
         self.fuel_web.run_ostf(cluster_id)
+
+        self.show_step(19)  # Check neutron objects match NSX-T backend
+        self.check_backend_consistency(cluster_id)
+
+    @test(depends_on=[SetupEnvironment.prepare_release],
+          groups=['nsxt_task_fusion'])
+    @log_snapshot_after_test
+    def nsxt_task_fusion(self):
+        """Measure fused plugin tasks on 3 controllers and 10 computes.
+
+        Scenario:
+            1. Install NSX-T plugin to Fuel Master node with 13 slaves.
+            2. Create new environment with the following parameters:
+                * Compute: KVM/QEMU
+                * Networking: Neutron with NSX-T plugin
+                * Storage: default
+            3. Add 3 nodes with controller role and 10 with compute role.
+            4. Configure interfaces on nodes.
+            5. Enable plugin with task fusion and configure network
+               settings.
+            6. Deploy cluster.
+            7. Check that every section of fused tasks succeeded on every
+               node, log time of sections and estimate of puppet load
+               saved.
+            8. Run OSTF.
+            9. Check that neutron objects match NSX-T backend.
+
+        Duration: 240 min
+        """
+        self.show_step(1)
+        self.env.revert_snapshot('ready')
+        self.env.bootstrap_nodes(self.env.d_env.nodes().slaves[:13])
+        self.install_nsxt_plugin()
+
+        self.show_step(2)  # Create new environment
+        cluster_id = self.fuel_web.create_cluster(
+            name=self.__class__.__name__,
+            mode=DEPLOYMENT_MODE,
+            settings=self.default.cluster_settings,
+            configure_ssl=False)
+
+        self.show_step(3)  # Add nodes
+        nodes = dict(('slave-{0:02d}'.format(i), ['controller'])
+                     for i in range(1, 4))
+        nodes.update(('slave-{0:02d}'.format(i), ['compute'])
+                     for i in range(4, 14))
+        self.fuel_web.update_nodes(cluster_id, nodes)
+
+        self.show_step(4)  # Configure interfaces on nodes
+        self.reconfigure_cluster_interfaces(cluster_id)
+
+        # Enable plugin with task fusion and configure network settings
+        self.show_step(5)
+        self.enable_plugin(cluster_id, {'task_fusion/value': True})
+
+        self.show_step(6)  # Deploy cluster
+        self.fuel_web.deploy_cluster_wait(cluster_id)
+
+        # Check sections of fused tasks and log estimate of time saved
+        self.show_step(7)
+        saved = 0
+        for node in self.fuel_web.client.list_cluster_nodes(cluster_id):
+            out = self.ssh_manager.check_call(
+                ip=node['ip'],
+                command='cat /var/log/nsx-t-task-timing.log').stdout
+            records = [json.loads(line) for line in out if line.strip()]
+            # create-repo, reg-node and configure-plugin on controllers
+            tasks = set(record['task'] for record in records)
+            assert_equal(len(tasks),
+                         3 if 'controller' in node['roles'] else 2,
+                         'Fused tasks of {0}: {1}'.format(node['name'],
+                                                          tasks))
+            for record in records:
+                assert_true(record['status'] in (0, 2),
+                            'Section failed on {0}: {1}'.format(node['name'],
+                                                                record))
+                logger.info('{0} {1}/{2}: {3}s'.format(
+                    node['name'], record['task'], record['section'],
+                    record['elapsed']))
+            node_saved = sum(fusion_saving(records).values())
+            logger.info('{0}: {1:.1f}s of puppet load saved, '
+                        'estimated'.format(node['name'], node_saved))
+            saved += node_saved
+        logger.info('Puppet load saved on 13 nodes, estimated: '
+                    '{0:.1f}s'.format(saved))
+        assert_true(saved > 0, 'Fused tasks saved no puppet load')
+
+        self.show_step(8)  # Run OSTF
+        self.fuel_web.run_ostf(cluster_id)
+
+        self.show_step(9)  # Check neutron objects match NSX-T backend
+        self.check_backend_consistency(cluster_id)
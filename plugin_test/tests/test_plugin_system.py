@@ -13,6 +13,8 @@ License for the specific language governing permissions and limitations
 under the License.
 """
 
+import ssl
+
 from devops.error import TimeoutError
 from devops.helpers.helpers import wait
 from proboscis import test
@@ -1073,3 +1075,66 @@ class TestNSXtSystem(TestNSXtBase):
 
         self.show_step(4)  # Run OSTF
         self.fuel_web.run_ostf(cluster_id)
+
+    @test(depends_on=[nsxt_setup_system],
+          groups=['nsxt_switch_insecure'])
+    @log_snapshot_after_test
+    def nsxt_switch_insecure(self):
+        """Check that nsx.ini follows insecure setting of plugin.
+
+        Scenario:
+            1. Set up for system tests.
+            2. Check that insecure and ca_file are not set in nsx.ini.
+            3. Disable insecure connection and upload CA certificate file
+               in plugin settings.
+            4. Run configure-plugin task on controller.
+            5. Check that nsx.ini has insecure = false and ca_file.
+            6. Enable insecure connection in plugin settings.
+            7. Run configure-plugin task on controller.
+            8. Check that insecure and ca_file are not set in nsx.ini.
+
+        Duration: 15 min
+        """
+        self.show_step(1)  # Set up for system tests
+        self.env.revert_snapshot('nsxt_setup_system')
+        cluster_id = self.fuel_web.get_last_created_cluster()
+        controller = self.fuel_web.get_nailgun_cluster_nodes_by_roles(
+            cluster_id, ['controller'])[0]
+
+        self.show_step(2)  # Check insecure and ca_file are not set
+        config = self.get_nsx_config(controller['ip'])
+        assert_true('insecure' not in config and 'ca_file' not in config,
+                    'nsx.ini of insecure deployment has {0}'.format(config))
+
+        # Disable insecure connection and upload CA certificate file
+        self.show_step(3)
+        manager = self.default.NSXT_MANAGERS_IP.split(',')[0].strip()
+        certificate = ssl.get_server_certificate((manager, 443))
+        self.enable_plugin(cluster_id, {
+            'insecure/value': False,
+            'ca_file/value': {'name': 'nsx-ca.pem', 'content': certificate}})
+
+        self.show_step(4)  # Run configure-plugin task on controller
+        self.fuel_web.execute_task_on_node('nsx-t-configure-plugin',
+                                           controller['id'], cluster_id)
+
+        self.show_step(5)  # Check nsx.ini has insecure = false and ca_file
+        config = self.get_nsx_config(controller['ip'])
+        assert_true(config.get('insecure', '').lower() == 'false' and
+                    config.get('ca_file') ==
+                    '/etc/neutron/plugins/vmware/nsx-ca.pem',
+                    'nsx.ini of secure deployment has {0}'.format(config))
+
+        self.show_step(6)  # Enable insecure connection in plugin settings
+        self.enable_plugin(cluster_id, {'insecure/value': True,
+                                        'ca_file/value': ''})
+
+        self.show_step(7)  # Run configure-plugin task on controller
+        self.fuel_web.execute_task_on_node('nsx-t-configure-plugin',
+                                           controller['id'], cluster_id)
+
+        self.show_step(8)  # Check insecure and ca_file are not set
+        config = self.get_nsx_config(controller['ip'])
+        assert_true('insecure' not in config and 'ca_file' not in config,
+                    'nsx.ini after insecure is enabled again has '
+                    '{0}'.format(config))
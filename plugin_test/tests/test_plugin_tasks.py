@@ -0,0 +1,257 @@
+"""Copyright 2016 Mirantis, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may
+not use this file except in compliance with the License. You may obtain
+copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+License for the specific language governing permissions and limitations
+under the License.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import uuid
+
+from proboscis import test
+from proboscis.asserts import assert_equal
+from proboscis.asserts import assert_true
+
+from fuelweb_test import logger
+from helpers.fake_haproxy import FakeHaproxy
+from helpers.fake_nsxt import FakeNsxtManager
+from helpers.ruby import run_ruby
+
+
+VALIDATE_SETTINGS = """
+require 'json'
+require 'puppet_x/nsxt/validator'
+manager, settings, node_counts = ARGV
+started = Time.now
+errors = PuppetX::Nsxt::Validator.validate(JSON.parse(settings),
+                                           JSON.parse(node_counts),
+                                           [manager], 'admin', 'admin')
+puts({'errors' => errors, 'elapsed' => Time.now - started}.to_json)
+"""
+
+TASK_FINGERPRINT = """
+require 'json'
+require 'puppet_x/nsxt/fingerprint'
+stamp_dir, config = ARGV
+fingerprint = PuppetX::Nsxt::Fingerprint
+fingerprint.stamp_dir = stamp_dir
+settings = {'nsx_api_managers' => '172.16.0.249', 'insecure' => false,
+            'ca_file' => {'name' => '', 'content' => ''}}
+reordered = Hash[settings.to_a.reverse]
+packages = ['nsxt-fingerprint-test-package']
+converged = lambda do |task, task_settings|
+  fingerprint.converged?(task, task_settings, [config], packages)
+end
+write = lambda { fingerprint.write('configure-plugin', settings, [config],
+                                   packages) }
+result = {}
+result['before'] = converged.call('configure-plugin', settings)
+write.call
+result['stamped'] = converged.call('configure-plugin', reordered)
+result['settings_changed'] = converged.call(
+  'configure-plugin', settings.merge('insecure' => true))
+File.open(config, 'a') { |file| file.puts('http_retries = 5') }
+result['file_changed'] = converged.call('configure-plugin', settings)
+write.call
+result['restamped'] = converged.call('configure-plugin', settings)
+result['other_task'] = converged.call('create-repo', settings)
+puts result.to_json
+"""
+
+ROLLING_RESTART = """
+require 'json'
+require 'net/http'
+require 'puppet_x/nsxt/rolling_restart'
+socket, vip, down, *nodes = ARGV
+reports = nodes.map do |node|
+  name, address = node.split('=')
+  PuppetX::Nsxt::RollingRestart.run(
+    'haproxy_socket' => socket, 'backend' => 'neutron', 'server' => name,
+    'health_url' => "http://#{address}/", 'vip_url' => "http://#{vip}/",
+    'interval' => 0.2, 'timeout' => 30) do
+    Net::HTTP.get(URI("http://#{address}/restart?down=#{down}"))
+  end
+end
+puts reports.to_json
+"""
+
+
+@test(groups=['nsxt_providers', 'nsxt_tasks'])
+class TestNSXtTasks(object):
+    """Settings validation, convergence and restart of deployment tasks."""
+
+    @test(groups=['nsxt_settings_validation'])
+    def nsxt_settings_validation(self):
+        """Check validation of NSX-T objects referenced by plugin settings.
+
+        Scenario:
+            1. Start fake NSX-T manager with 0.5 s latency per request,
+               overlay and VLAN transport zones, tier-0 router, edge
+               cluster, uplink profile with uplink-1 and uplink-2, IP
+               pools of 3 and 1 addresses.
+            2. Validate settings which reference them for 3 controllers
+               and 1 compute.
+            3. Check that there are no errors and all objects are read
+               concurrently.
+            4. Validate settings with VLAN transport zone as overlay one,
+               unknown tier-0 router, 2 computes for IP pool of 1
+               address, duplicate pnic and unknown uplink.
+            5. Check that every problem is reported.
+
+        Duration: 1 min
+        """
+        with FakeNsxtManager(latency=0.5) as manager:
+            overlay_tz = list(manager.transport_zones)[0]
+            vlan_tz = str(uuid.uuid4())
+            manager.transport_zones[vlan_tz] = {
+                'id': vlan_tz, 'display_name': 'vlan-tz',
+                'host_switch_name': 'nsxvswitch', 'transport_type': 'VLAN'}
+            tier0 = manager.add_objects(
+                'logical-routers', 1,
+                fields=lambda i: {'router_type': 'TIER0'})[0]
+            edge_cluster = manager.add_objects(
+                'edge-clusters', 1,
+                fields=lambda i: {'resource_type': 'EdgeCluster'})[0]
+            uplink_profile = manager.add_objects(
+                'host-switch-profiles', 1,
+                fields=lambda i: {
+                    'resource_type': 'UplinkHostSwitchProfile',
+                    'teaming': {
+                        'policy': 'FAILOVER_ORDER',
+                        'active_list': [{'uplink_name': 'uplink-1',
+                                         'uplink_type': 'PNIC'}],
+                        'standby_list': [{'uplink_name': 'uplink-2',
+                                          'uplink_type': 'PNIC'}]}})[0]
+            controller_pool, compute_pool = manager.add_objects(
+                'pools/ip-pools', 2,
+                fields=lambda i: {'resource_type': 'IpPool',
+                                  'pool_usage': {'total_ids': (3, 1)[i],
+                                                 'allocated_ids': 0,
+                                                 'free_ids': (3, 1)[i]}})
+            settings = {
+                'default_overlay_tz_uuid': overlay_tz,
+                'default_vlan_tz_uuid': vlan_tz,
+                'default_tier0_router_uuid': tier0,
+                'default_edge_cluster_uuid': edge_cluster,
+                'uplink_profile_uuid': uplink_profile,
+                'controller_ip_pool_uuid': controller_pool,
+                'controller_pnics_pairs': 'enp0s1:uplink-1\nenp0s2:uplink-2',
+                'compute_ip_pool_uuid': compute_pool,
+                'compute_pnics_pairs': 'enp0s1:uplink-1'}
+
+            result = run_ruby(VALIDATE_SETTINGS, manager.address,
+                              json.dumps(settings),
+                              json.dumps({'controller': 3, 'compute': 1}))
+            assert_equal(result['errors'], [])
+            # node probe and 7 objects, 0.5 s each
+            assert_true(result['elapsed'] < 2,
+                        'Objects are not read concurrently: {0}s'.format(
+                            result['elapsed']))
+
+            settings.update({
+                'default_overlay_tz_uuid': vlan_tz,
+                'default_tier0_router_uuid': str(uuid.uuid4()),
+                'compute_pnics_pairs': 'enp0s1:uplink-1\nenp0s1:uplink-3'})
+            result = run_ruby(VALIDATE_SETTINGS, manager.address,
+                              json.dumps(settings),
+                              json.dumps({'controller': 3, 'compute': 2}))
+            errors = '\n'.join(result['errors'])
+            assert_equal(len(result['errors']), 5, errors)
+            for setting in ('default_overlay_tz_uuid',
+                            'default_tier0_router_uuid',
+                            'compute_ip_pool_uuid: IP pool',
+                            "compute_pnics_pairs: 'enp0s1'",
+                            "compute_pnics_pairs: uplink 'uplink-3'"):
+                assert_true(setting in errors,
+                            '{0} is not reported:\n{1}'.format(setting,
+                                                               errors))
+
+    @test(groups=['nsxt_task_fingerprint'])
+    def nsxt_task_fingerprint(self):
+        """Check convergence stamps of deployment tasks.
+
+        Scenario:
+            1. Check that task without stamp is not converged.
+            2. Write stamp of task with settings, config file and package.
+            3. Check that task is converged with the same settings in other
+               order, and is not converged with changed setting or config
+               file.
+            4. Write stamp again and check that task is converged, while
+               other task is not.
+
+        Duration: 1 min
+        """
+        stamp_dir = tempfile.mkdtemp()
+        try:
+            config = os.path.join(stamp_dir, 'nsx.ini')
+            with open(config, 'w') as f:
+                f.write('[nsx_v3]\n')
+            result = run_ruby(TASK_FINGERPRINT,
+                              os.path.join(stamp_dir, 'stamps'), config)
+        finally:
+            shutil.rmtree(stamp_dir)
+        assert_equal(result, {'before': False, 'stamped': True,
+                              'settings_changed': False,
+                              'file_changed': False, 'restamped': True,
+                              'other_task': False})
+
+    @test(groups=['nsxt_rolling_restart'])
+    def nsxt_rolling_restart(self):
+        """Check rolling restart of neutron server on 3 controllers.
+
+        Scenario:
+            1. Start fake haproxy with neutron server of 3 controllers
+               behind VIP, servers answer 2 s after restart.
+            2. Restart servers one by one with stats socket on admin level.
+            3. Check that every server was taken out of backend, was
+               unavailable at least 2 s and neutron API on VIP answered
+               all the time.
+            4. Restart servers one by one with stats socket on user level.
+            5. Check that servers were not taken out of backend and some
+               requests to VIP failed, log unavailability of both runs.
+
+        Duration: 1 min
+        """
+        runs = {}
+        for admin in (True, False):
+            with FakeHaproxy(admin=admin) as haproxy:
+                nodes = ['{0}={1}'.format(node, haproxy.address(node))
+                         for node in ('node-1', 'node-2', 'node-3')]
+                reports = run_ruby(ROLLING_RESTART, haproxy.socket_path,
+                                   haproxy.vip_address, '2', *nodes)
+                runs[admin] = (reports, haproxy.vip_failures,
+                               haproxy.vip_requests)
+            for report in reports:
+                assert_true(report['healthy'],
+                            '{0} is not healthy'.format(report['server']))
+                assert_true(report['unavailable'] >= 2,
+                            '{0} was not restarted'.format(report['server']))
+                assert_equal(report['drained'], admin)
+
+        reports, failures, requests = runs[True]
+        assert_equal(failures, 0)
+        assert_equal([r['vip_failures'] for r in reports], [0, 0, 0])
+        reports, failures, requests = runs[False]
+        assert_true(failures > 0, 'VIP answered while node was restarted '
+                    'in backend')
+
+        for admin, (reports, failures, requests) in sorted(runs.items()):
+            for report in reports:
+                logger.info('{0} drained {1}: unavailable {2:.1f}s, VIP '
+                            'unavailable {3:.1f}s'.format(
+                                report['server'], report['drained'],
+                                report['unavailable'],
+                                report['vip_unavailable']))
+            logger.info('drained {0}: {1} of {2} VIP requests failed'.format(
+                admin, failures, requests))